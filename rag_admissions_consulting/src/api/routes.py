@@ -9,6 +9,7 @@ from loguru import logger
 from services.chat_service import ChatService
 from services.user_service import UserService
 from core.session_manager import session_manager
+from core.app_manager import app_manager
 from config.settings import settings, initialize_settings_with_backend
 
 router = APIRouter()
@@ -76,7 +77,7 @@ async def stream_chat_response(request: ChatRequest) -> AsyncGenerator[str, None
             )
 
         # Get or create conversation_id using SessionManager
-        conversation_id = session_manager.get_or_create_conversation_id(
+        conversation_id = await session_manager.get_or_create_conversation_id(
             request.user_email, request.conversation_id
         )
 
@@ -123,6 +124,11 @@ async def reload_config_endpoint():
         # Reload configuration from backend
         await initialize_settings_with_backend()
 
+        # Recompile prompt templates only if personality or contact info changed
+        prompts_recompiled = False
+        if "prompt_engine" in app_manager.components:
+            prompts_recompiled = app_manager.get_component("prompt_engine").refresh()
+
         # Check if config was successfully loaded
         new_status = settings.is_backend_config_loaded()
         new_personality = settings.personality.personality
@@ -144,6 +150,7 @@ async def reload_config_endpoint():
                     "changed": previous_name != new_name,
                 },
             },
+            "prompts_recompiled": prompts_recompiled,
         }
 
         if new_status:
@@ -37,6 +37,16 @@ class EmbeddingConfig:
     default_model: str = os.getenv("DEFAULT_EMBEDDING_MODEL", "HUGGINGFACE")
     model_name: str = os.getenv("EMBEDDING_MODEL_NAME", "intfloat/multilingual-e5-base")
     cache_dir: str = os.getenv("EMBEDDING_CACHE_DIR", "./models/embeddings")
+    executor_workers: int = int(os.getenv("EMBEDDING_EXECUTOR_WORKERS", "2"))
+    cache_enabled: bool = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    vector_cache_path: str = os.getenv(
+        "EMBEDDING_VECTOR_CACHE_PATH", "./data/embedding_cache.sqlite"
+    )
+    memory_cache_size: int = int(os.getenv("EMBEDDING_MEMORY_CACHE_SIZE", "10000"))
+    # Bulk (seeding) embedding: 0 = library defaults, >1 process workers = pool
+    encode_batch_size: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+    torch_threads: int = int(os.getenv("EMBEDDING_TORCH_THREADS", "0"))
+    process_workers: int = int(os.getenv("EMBEDDING_PROCESS_WORKERS", "0"))
 
 
 @dataclass
@@ -54,6 +64,102 @@ class VectorStoreConfig:
     pinecone_environment: str = os.getenv("PINECONE_ENVIRONMENT", "")
     index_name: str = os.getenv("PINECONE_INDEX_NAME", "test222222")
     top_k: int = int(os.getenv("VECTOR_STORE_TOP_K", "5"))
+    backend: str = os.getenv("VECTOR_STORE_BACKEND", "pinecone")  # pinecone, local
+    local_index_dir: str = os.getenv("LOCAL_INDEX_DIR", "./data/vector_index")
+    seed_manifest_dir: str = os.getenv("SEED_MANIFEST_DIR", "./data/seed_manifests")
+    # Bulk upload pipeline
+    upsert_batch_size: int = int(os.getenv("UPSERT_BATCH_SIZE", "100"))
+    embed_batch_size: int = int(os.getenv("EMBED_BATCH_SIZE", "512"))
+    upsert_concurrency: int = int(os.getenv("UPSERT_CONCURRENCY", "4"))
+    # Metadata-filtered retrieval by query category
+    category_filter_enabled: bool = (
+        os.getenv("CATEGORY_FILTER_ENABLED", "true").lower() == "true"
+    )
+    # Fewer filtered hits than this tops up with an unfiltered search
+    category_filter_min_docs: int = int(os.getenv("CATEGORY_FILTER_MIN_DOCS", "3"))
+
+
+@dataclass
+class HybridSearchConfig:
+    """BM25 keyword index fused with vector search"""
+
+    enabled: bool = os.getenv("HYBRID_SEARCH_ENABLED", "true").lower() == "true"
+    index_dir: str = os.getenv("BM25_INDEX_DIR", "./data/bm25_index")
+    top_k: int = int(os.getenv("BM25_TOP_K", "10"))
+    k1: float = float(os.getenv("BM25_K1", "1.5"))
+    b: float = float(os.getenv("BM25_B", "0.75"))
+    # Reciprocal rank fusion constant
+    rrf_k: int = int(os.getenv("RRF_K", "60"))
+
+
+@dataclass
+class RerankConfig:
+    """Optional rerank stage over retrieved candidates"""
+
+    enabled: bool = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+    scorer: str = os.getenv("RERANK_SCORER", "lexical")  # lexical, cross_encoder
+    model: str = os.getenv(
+        "RERANK_MODEL", "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"
+    )
+    # Past the budget the retrieval order is kept
+    budget_ms: float = float(os.getenv("RERANK_BUDGET_MS", "150"))
+    batch_window_ms: float = float(os.getenv("RERANK_BATCH_WINDOW_MS", "5"))
+    max_batch_pairs: int = int(os.getenv("RERANK_MAX_BATCH_PAIRS", "128"))
+
+
+@dataclass
+class AnswerCacheConfig:
+    """Semantic answer cache configuration"""
+
+    enabled: bool = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    similarity_threshold: float = float(
+        os.getenv("ANSWER_CACHE_SIMILARITY_THRESHOLD", "0.95")
+    )
+    max_entries: int = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "2000"))
+    ttl_minutes: int = int(os.getenv("ANSWER_CACHE_TTL_MINUTES", "1440"))
+    invalidation_path: str = os.getenv(
+        "ANSWER_CACHE_INVALIDATION_PATH", "./data/answer_cache_invalidations.json"
+    )
+
+
+@dataclass
+class IntentConfig:
+    """Embedding-based intent classifier configuration"""
+
+    enabled: bool = os.getenv("INTENT_CLASSIFIER_ENABLED", "true").lower() == "true"
+    # e5 cosine similarities are compressed into roughly 0.7-0.95
+    min_similarity: float = float(os.getenv("INTENT_MIN_SIMILARITY", "0.80"))
+    min_margin: float = float(os.getenv("INTENT_MIN_MARGIN", "0.01"))
+
+
+@dataclass
+class StateStoreConfig:
+    """Shared session/context store configuration"""
+
+    backend: str = os.getenv("STATE_STORE_BACKEND", "memory")  # memory, redis
+    redis_url: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    key_prefix: str = os.getenv("STATE_STORE_KEY_PREFIX", "rag")
+
+
+@dataclass
+class PipelineConfig:
+    """Data ingestion pipeline configuration"""
+
+    # Data sources processed at the same time by one runner
+    concurrency: int = int(os.getenv("PIPELINE_CONCURRENCY", "4"))
+    website_max_pages: int = int(os.getenv("PIPELINE_WEBSITE_MAX_PAGES", "1"))
+    # Long-running ingestion worker (worker.py)
+    worker_host: str = os.getenv("INGESTION_WORKER_HOST", "127.0.0.1")
+    worker_port: int = int(os.getenv("INGESTION_WORKER_PORT", "8001"))
+    worker_queue_size: int = int(os.getenv("INGESTION_QUEUE_SIZE", "100"))
+    # PATCHed with job status; reporting is off unless both are set. The
+    # token must match INGESTION_WORKER_TOKEN on the backend.
+    status_url: str = os.getenv(
+        "INGESTION_STATUS_URL",
+        os.getenv("API_BASE_URL", "http://localhost:5000/api/v1")
+        + "/data-sources/{data_source_id}/ingestion-status",
+    )
+    status_token: str = os.getenv("INGESTION_STATUS_TOKEN", "")
 
 
 @dataclass
@@ -65,6 +171,31 @@ class ChatConfig:
     max_response_tokens: int = int(os.getenv("MAX_RESPONSE_TOKENS", "1024"))
     stream_delay_ms: int = int(os.getenv("STREAM_DELAY_MS", "1"))
     trigger_pattern: str = os.getenv("TRIGGER_PATTERN", "")
+    context_cache_max_entries: int = int(os.getenv("CONTEXT_CACHE_MAX_ENTRIES", "5000"))
+    context_cache_max_bytes: int = int(
+        os.getenv("CONTEXT_CACHE_MAX_BYTES", str(64 * 1024 * 1024))
+    )
+    context_cache_ttl_minutes: int = int(os.getenv("CONTEXT_CACHE_TTL_MINUTES", "120"))
+    context_cache_sweep_seconds: int = int(
+        os.getenv("CONTEXT_CACHE_SWEEP_SECONDS", "60")
+    )
+    # Prompt token budget: system prompt, then documents, then recent turns
+    prompt_token_budget: int = int(os.getenv("PROMPT_TOKEN_BUDGET", "3000"))
+    prompt_history_messages: int = int(os.getenv("PROMPT_HISTORY_MESSAGES", "6"))
+    prompt_min_partial_tokens: int = int(
+        os.getenv("PROMPT_MIN_PARTIAL_TOKENS", "64")
+    )
+    # Rolling summary: past the trigger, all but the most recent turns are folded
+    summary_enabled: bool = os.getenv("SUMMARY_ENABLED", "true").lower() == "true"
+    summary_trigger_messages: int = int(os.getenv("SUMMARY_TRIGGER_MESSAGES", "12"))
+    summary_keep_recent_messages: int = int(
+        os.getenv("SUMMARY_KEEP_RECENT_MESSAGES", "6")
+    )
+    summary_max_words: int = int(os.getenv("SUMMARY_MAX_WORDS", "150"))
+    # Rewrite context-dependent questions into standalone search queries
+    query_rewrite_enabled: bool = (
+        os.getenv("QUERY_REWRITE_ENABLED", "true").lower() == "true"
+    )
 
 
 @dataclass
@@ -95,6 +226,13 @@ class APIConfig:
     )
 
 
+@dataclass
+class TracingConfig:
+    """Latency tracing exported on /metrics"""
+
+    enabled: bool = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+
+
 @dataclass
 class LoggingConfig:
     """Logging configuration"""
@@ -113,10 +251,17 @@ class Settings:
         self.llm = LLMConfig()
         self.embedding = EmbeddingConfig()
         self.vector_store = VectorStoreConfig()
+        self.hybrid_search = HybridSearchConfig()
+        self.rerank = RerankConfig()
+        self.answer_cache = AnswerCacheConfig()
+        self.intent = IntentConfig()
+        self.state_store = StateStoreConfig()
+        self.pipeline = PipelineConfig()
         self.chat = ChatConfig()
         self.personality = PersonalityConfig()
         self.api = APIConfig()
         self.logging = LoggingConfig()
+        self.tracing = TracingConfig()
         self.human_handoff = HumanHandoffConfig()
 
         # Environment
@@ -0,0 +1,236 @@
+"""
+Semantic answer cache for repeated admissions questions.
+
+Answers are stored next to the normalised embedding of the question that
+produced them. A new question whose cosine similarity to a cached one is
+above the configured threshold is answered by replaying the cached text,
+skipping retrieval and generation entirely.
+
+Entries remember which data sources their context came from. seed.py
+records an invalidation for a data_source_id in a small JSON file, under
+a file lock shared by every seeding process; the API process notices the
+file change and drops every entry that cited
+that source. A TTL bounds staleness for answers that new sources could
+improve.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import numpy as np
+from loguru import logger
+
+from config.settings import settings
+from infrastructure.file_lock import file_lock, file_stamp
+
+_TOKEN_PATTERN = re.compile(r"\S+\s*|\s+")
+
+
+def _prompt_version() -> str:
+    """Answers are only reusable under the same persona and contact info"""
+    raw = json.dumps(
+        [
+            settings.personality.personality,
+            settings.personality.persona,
+            settings.personality.name,
+            settings.contact_info,
+        ],
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def invalidate_data_source(data_source_id: str, path: Optional[str] = None):
+    """Record that `data_source_id` changed so running APIs drop its answers"""
+    path = path or settings.answer_cache.invalidation_path
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        os.makedirs(directory, exist_ok=True)
+        # The CLI, the pipeline runner and the worker all update this file
+        with file_lock(path):
+            invalidations = {}
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    invalidations = json.load(f)
+            invalidations[str(data_source_id)] = time.time()
+
+            # Unique temp file in the same directory, so the replace is atomic
+            fd, tmp_path = tempfile.mkstemp(
+                dir=directory, prefix=os.path.basename(path), suffix=".tmp"
+            )
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(invalidations, f)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        logger.info(f"Answer cache invalidated for DataSource: {data_source_id}")
+    except Exception as e:
+        logger.warning(f"Failed to record answer cache invalidation: {e}")
+
+
+class SemanticAnswerCache:
+    """Nearest-neighbour cache of answers keyed by question embedding"""
+
+    def __init__(
+        self,
+        similarity_threshold: float = None,
+        max_entries: int = None,
+        ttl_seconds: float = None,
+        invalidation_path: str = None,
+    ):
+        config = settings.answer_cache
+        self.similarity_threshold = similarity_threshold or config.similarity_threshold
+        self.max_entries = max_entries or config.max_entries
+        self.ttl_seconds = ttl_seconds or config.ttl_minutes * 60
+        self.invalidation_path = invalidation_path or config.invalidation_path
+
+        self._vectors: Optional[np.ndarray] = None
+        self._entries: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._invalidation_stamp = None
+        self._invalidations_checked_at = 0.0
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "invalidated": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _normalize(vector: Iterable[float]) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _remove_rows(self, rows: List[int]):
+        if not rows:
+            return
+        keep = np.setdiff1d(np.arange(len(self._entries)), rows)
+        self._entries = [self._entries[row] for row in keep]
+        self._vectors = self._vectors[keep] if len(keep) else None
+
+    def _check_invalidations(self):
+        """Pick up invalidations written by seed.py (at most once per second)"""
+        now = time.time()
+        if now - self._invalidations_checked_at < 1.0:
+            return
+        self._invalidations_checked_at = now
+        stamp = file_stamp(self.invalidation_path)
+        if stamp is None or stamp == self._invalidation_stamp:
+            return
+        self._invalidation_stamp = stamp
+
+        try:
+            with open(self.invalidation_path, "r", encoding="utf-8") as f:
+                invalidations = json.load(f)
+        except Exception as e:
+            logger.warning(f"Failed to read answer cache invalidations: {e}")
+            return
+
+        stale = [
+            row
+            for row, entry in enumerate(self._entries)
+            if any(
+                invalidations.get(source_id, 0) > entry["created_at"]
+                for source_id in entry["data_source_ids"]
+            )
+        ]
+        self._remove_rows(stale)
+        self.stats["invalidated"] += len(stale)
+        if stale:
+            logger.info(f"Answer cache dropped {len(stale)} entries after re-seeding")
+
+    def lookup(self, query_embedding: Iterable[float]) -> Optional[str]:
+        """Return the cached answer of the most similar question, if close enough"""
+        with self._lock:
+            self._check_invalidations()
+            if self._vectors is None:
+                self.stats["misses"] += 1
+                return None
+
+            now = time.time()
+            expired = [
+                row
+                for row, entry in enumerate(self._entries)
+                if now - entry["created_at"] > self.ttl_seconds
+            ]
+            self._remove_rows(expired)
+            if self._vectors is None:
+                self.stats["misses"] += 1
+                return None
+
+            scores = self._vectors @ self._normalize(query_embedding)
+            version = _prompt_version()
+            for row in np.argsort(-scores)[:5]:
+                if scores[row] < self.similarity_threshold:
+                    break
+                entry = self._entries[row]
+                if entry["prompt_version"] == version:
+                    entry["hits"] += 1
+                    self.stats["hits"] += 1
+                    logger.info(f"Answer cache hit (similarity={scores[row]:.3f})")
+                    return entry["answer"]
+
+            self.stats["misses"] += 1
+            return None
+
+    def store(
+        self,
+        query: str,
+        query_embedding: Iterable[float],
+        answer: str,
+        data_source_ids: Set[str],
+    ):
+        """Cache an answer; evicts the least used, oldest entries when full"""
+        if not answer:
+            return
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                by_value = sorted(
+                    range(len(self._entries)),
+                    key=lambda row: (
+                        self._entries[row]["hits"],
+                        self._entries[row]["created_at"],
+                    ),
+                )
+                self._remove_rows(by_value[: max(1, self.max_entries // 10)])
+
+            vector = self._normalize(query_embedding)[np.newaxis, :]
+            self._vectors = (
+                vector if self._vectors is None else np.vstack([self._vectors, vector])
+            )
+            self._entries.append(
+                {
+                    "query": query,
+                    "answer": answer,
+                    "data_source_ids": {str(source_id) for source_id in data_source_ids},
+                    "prompt_version": _prompt_version(),
+                    "created_at": time.time(),
+                    "hits": 0,
+                }
+            )
+            self.stats["stores"] += 1
+
+    @staticmethod
+    def replay_tokens(answer: str) -> List[str]:
+        """Split a cached answer into word-sized chunks for streaming"""
+        return _TOKEN_PATTERN.findall(answer)
+
+    def clear(self):
+        with self._lock:
+            self._entries = []
+            self._vectors = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), **self.stats}
+
+
+# Global instance
+answer_cache = SemanticAnswerCache()
@@ -1,10 +1,12 @@
 import asyncio
-from typing import Dict, Any, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 from loguru import logger
 import time
 
 from core.rag_engine import RagEngine
 from core.query_analyzer import QueryAnalyzer
+from core.intent_classifier import IntentClassifier
+from core.reranker import create_reranker
 from core.prompt_engine import PromptEngine
 from infrastructure.embeddings import embeddings
 from infrastructure.store import store
@@ -28,48 +30,91 @@ class ApplicationManager:
         if not self._initialized:
             self.components: Dict[str, Any] = {}
             self.initialization_times: Dict[str, float] = {}
+            # Offsets (seconds since startup began) of each stage
+            self.stage_timeline: Dict[str, Dict[str, float]] = {}
+            self.failed_stages: Dict[str, str] = {}
+            self.total_initialization_time: Optional[float] = None
             self._initialized = True
 
+    def _stages(self) -> Dict[str, Tuple[Callable[[], Awaitable[None]], List[str]]]:
+        """Các bước khởi tạo và phụ thuộc của chúng
+
+        Backend config có thể đổi LLM và personality nên LLM/PromptEngine chờ nó;
+        embedding, vector store và query analyzer chạy song song ngay từ đầu.
+        """
+        return {
+            "backend_config": (self._initialize_backend_config, []),
+            "embedding_model": (self._initialize_embedding_model, []),
+            "vector_store": (self._initialize_vector_store, []),
+            "query_analyzer": (self._initialize_query_analyzer, []),
+            "llm_model": (self._initialize_llm_model, ["backend_config"]),
+            "prompt_engine": (self._initialize_prompt_engine, ["backend_config"]),
+            "intent_classifier": (
+                self._initialize_intent_classifier,
+                ["embedding_model"],
+            ),
+            "reranker": (self._initialize_reranker, []),
+            "rag_engine": (
+                self._initialize_rag_engine,
+                [
+                    "embedding_model",
+                    "vector_store",
+                    "llm_model",
+                    "query_analyzer",
+                    "prompt_engine",
+                    "intent_classifier",
+                    "reranker",
+                ],
+            ),
+        }
+
     async def initialize_all_components(self):
-        """Khởi tạo tất cả các thành phần cần thiết"""
+        """Khởi tạo tất cả các thành phần cần thiết (song song theo phụ thuộc)"""
         logger.info("🚀 Bắt đầu khởi tạo tất cả thành phần...")
 
         start_time = time.time()
+        self.failed_stages = {}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_stage(name: str, initializer, dependencies: List[str]):
+            # Lỗi của bước phụ thuộc được truyền tiếp qua await
+            for dependency in dependencies:
+                await tasks[dependency]
+            self.stage_timeline[name] = {"start": time.time() - start_time}
+            try:
+                await initializer()
+            finally:
+                self.stage_timeline[name]["end"] = time.time() - start_time
+
+        # Thứ tự khai báo đảm bảo phụ thuộc luôn được tạo task trước
+        for name, (initializer, dependencies) in self._stages().items():
+            tasks[name] = asyncio.create_task(
+                run_stage(name, initializer, dependencies)
+            )
 
-        try:
-            # 0. Load configuration from backend first
-            await self._initialize_backend_config()
-
-            # 1. Khởi tạo Embedding Model
-            await self._initialize_embedding_model()
-
-            # 2. Khởi tạo Vector Store
-            await self._initialize_vector_store()
-
-            # 3. Khởi tạo LLM Model
-            await self._initialize_llm_model()
-
-            # 4. Khởi tạo Query Analyzer
-            await self._initialize_query_analyzer()
-
-            # 5. Khởi tạo Prompt Engine
-            await self._initialize_prompt_engine()
+        results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        self.total_initialization_time = time.time() - start_time
 
-            # 6. Khởi tạo RAG Engine
-            await self._initialize_rag_engine()
+        for name, result in zip(tasks, results):
+            if isinstance(result, Exception):
+                self.failed_stages[name] = str(result)
 
-            total_time = time.time() - start_time
+        # Log thời gian khởi tạo từng thành phần
+        for component, timeline in self.stage_timeline.items():
             logger.info(
-                f"✅ Hoàn thành khởi tạo tất cả thành phần trong {total_time:.2f}s"
+                f"  - {component}: {timeline['start']:.2f}s → {timeline.get('end', 0):.2f}s"
             )
 
-            # Log thời gian khởi tạo từng thành phần
-            for component, init_time in self.initialization_times.items():
-                logger.info(f"  - {component}: {init_time:.2f}s")
+        if self.failed_stages:
+            logger.error(f"❌ Lỗi khi khởi tạo thành phần: {self.failed_stages}")
+            raise next(
+                result for result in results if isinstance(result, Exception)
+            )
 
-        except Exception as e:
-            logger.error(f"❌ Lỗi khi khởi tạo thành phần: {e}")
-            raise
+        logger.info(
+            f"✅ Hoàn thành khởi tạo tất cả thành phần trong {self.total_initialization_time:.2f}s "
+            f"(tổng các bước: {sum(self.initialization_times.values()):.2f}s)"
+        )
 
     async def _initialize_backend_config(self):
         """Load configuration from backend API"""
@@ -94,7 +139,9 @@ class ApplicationManager:
         start_time = time.time()
         try:
             logger.info("📝 Khởi tạo Embedding Model...")
-            embedding_model = embeddings.get_embeddings(ModelType.HUGGINGFACE)
+            embedding_model = await asyncio.to_thread(
+                embeddings.get_embeddings, ModelType.HUGGINGFACE
+            )
 
             # Test embedding để đảm bảo model hoạt động
             test_text = "Test embedding"
@@ -129,7 +176,7 @@ class ApplicationManager:
         start_time = time.time()
         try:
             logger.info("🤖 Khởi tạo LLM Model...")
-            llm_model = LLms.getLLm(ModelType.GEMINI)
+            llm_model = await asyncio.to_thread(LLms.getLLm, ModelType.GEMINI)
 
             # Test LLM với câu hỏi đơn giản
             test_prompt = "Xin chào"
@@ -149,7 +196,7 @@ class ApplicationManager:
         start_time = time.time()
         try:
             logger.info("🔍 Khởi tạo Query Analyzer...")
-            query_analyzer = QueryAnalyzer()
+            query_analyzer = await asyncio.to_thread(QueryAnalyzer)
 
             self.components["query_analyzer"] = query_analyzer
             self.initialization_times["query_analyzer"] = time.time() - start_time
@@ -159,12 +206,44 @@ class ApplicationManager:
             logger.error(f"❌ Lỗi khởi tạo Query Analyzer: {e}")
             raise
 
+    async def _initialize_intent_classifier(self):
+        """Tính centroid intent từ câu ví dụ (không bắt buộc: lỗi thì dùng keyword)"""
+        start_time = time.time()
+        intent_classifier = None
+        if settings.intent.enabled:
+            try:
+                logger.info("🧭 Khởi tạo Intent Classifier...")
+                intent_classifier = await asyncio.to_thread(
+                    IntentClassifier(self.components["embedding_model"]).build
+                )
+                logger.info("✅ Intent Classifier đã sẵn sàng")
+            except Exception as e:
+                logger.warning(f"⚠️ Intent Classifier lỗi, chỉ dùng keyword: {e}")
+
+        self.components["intent_classifier"] = intent_classifier
+        self.initialization_times["intent_classifier"] = time.time() - start_time
+
+    async def _initialize_reranker(self):
+        """Nạp model rerank (không bắt buộc: lỗi thì giữ thứ tự retrieval)"""
+        start_time = time.time()
+        reranker = None
+        if settings.rerank.enabled:
+            try:
+                logger.info("🔀 Khởi tạo Reranker...")
+                reranker = await asyncio.to_thread(lambda: create_reranker().load())
+                logger.info("✅ Reranker đã sẵn sàng")
+            except Exception as e:
+                logger.warning(f"⚠️ Reranker lỗi, giữ thứ tự retrieval: {e}")
+
+        self.components["reranker"] = reranker
+        self.initialization_times["reranker"] = time.time() - start_time
+
     async def _initialize_prompt_engine(self):
         """Khởi tạo Prompt Engine"""
         start_time = time.time()
         try:
             logger.info("📋 Khởi tạo Prompt Engine...")
-            prompt_engine = PromptEngine()
+            prompt_engine = await asyncio.to_thread(PromptEngine)
 
             self.components["prompt_engine"] = prompt_engine
             self.initialization_times["prompt_engine"] = time.time() - start_time
@@ -179,12 +258,16 @@ class ApplicationManager:
         start_time = time.time()
         try:
             logger.info("⚙️ Khởi tạo RAG Engine...")
-            rag_engine = RagEngine(
+            # RagEngine connects the retriever to the index; keep it off the loop
+            rag_engine = await asyncio.to_thread(
+                RagEngine,
                 embedding_model=self.components["embedding_model"],
                 vector_store=self.components["vector_store"],
                 llm_model=self.components["llm_model"],
                 query_analyzer=self.components["query_analyzer"],
                 prompt_engine=self.components["prompt_engine"],
+                intent_classifier=self.components["intent_classifier"],
+                reranker=self.components["reranker"],
             )
 
             self.components["rag_engine"] = rag_engine
@@ -205,6 +288,10 @@ class ApplicationManager:
         """Lấy RAG Engine đã được khởi tạo"""
         return self.get_component("rag_engine")
 
+    def is_ready(self) -> bool:
+        """Sẵn sàng nhận request khi critical path (RAG Engine) đã xong"""
+        return "rag_engine" in self.components
+
     def is_initialized(self) -> bool:
         """Kiểm tra xem tất cả thành phần đã được khởi tạo chưa"""
         required_components = [
@@ -214,6 +301,8 @@ class ApplicationManager:
             "llm_model",
             "query_analyzer",
             "prompt_engine",
+            "intent_classifier",
+            "reranker",
             "rag_engine",
         ]
         return all(comp in self.components for comp in required_components)
@@ -223,7 +312,11 @@ class ApplicationManager:
         return {
             "initialized": self.is_initialized(),
             "components": list(self.components.keys()),
+            "ready": self.is_ready(),
             "initialization_times": self.initialization_times,
+            "stage_timeline": self.stage_timeline,
+            "failed_stages": self.failed_stages,
+            "total_initialization_time": self.total_initialization_time,
             "total_components": len(self.components),
         }
 
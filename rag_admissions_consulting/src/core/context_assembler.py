@@ -0,0 +1,174 @@
+"""
+Token-budgeted prompt context.
+
+Fills a fixed prompt token budget by priority: the fixed system prompt
+first, then retrieved documents in rank order, then the most recent
+conversation turns. Tokens are counted with the embedding model's own
+tokenizer (already in memory, no network call) or, without one, a
+syllable-based estimate. History that the prompt already carries - the
+current question and repeated messages - is dropped before it costs any
+budget.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from langchain_core.documents import Document
+from loguru import logger
+
+from config.settings import settings
+
+_PIECE_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# Per-item formatting around the text ("Tài liệu 1:", source line, role name)
+DOCUMENT_OVERHEAD_TOKENS = 16
+MESSAGE_OVERHEAD_TOKENS = 6
+
+
+def tokenizer_from_embeddings(embedding_model) -> Optional[Any]:
+    """The HuggingFace tokenizer behind an embeddings model, if it has one"""
+    underlying = getattr(embedding_model, "underlying", embedding_model)
+    encoder = getattr(underlying, "_client", None) or getattr(underlying, "client", None)
+    return getattr(encoder, "tokenizer", None)
+
+
+class TokenCounter:
+    """Token counts from a local tokenizer, estimated when none is available"""
+
+    def __init__(self, tokenizer=None):
+        self.tokenizer = tokenizer
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.tokenizer is None:
+            # Roughly one token per Vietnamese syllable or punctuation mark
+            return len(_PIECE_PATTERN.findall(text))
+        return len(self.tokenizer.encode(text, add_special_tokens=False))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Longest prefix of `text` within `max_tokens`"""
+        if max_tokens <= 0:
+            return ""
+        if self.tokenizer is None:
+            pieces = list(_PIECE_PATTERN.finditer(text))
+            if len(pieces) <= max_tokens:
+                return text
+            return text[: pieces[max_tokens - 1].end()]
+        ids = self.tokenizer.encode(text, add_special_tokens=False)
+        if len(ids) <= max_tokens:
+            return text
+        return self.tokenizer.decode(ids[:max_tokens], skip_special_tokens=True)
+
+
+@dataclass
+class AssembledContext:
+    """What made it into the prompt, and what it cost"""
+
+    documents: List[Any] = field(default_factory=list)
+    messages: List[Dict[str, Any]] = field(default_factory=list)
+    tokens: Dict[str, int] = field(default_factory=dict)
+    dropped_documents: int = 0
+    dropped_messages: int = 0
+
+
+class ContextAssembler:
+    """Choose documents and history turns that fit the prompt token budget"""
+
+    def __init__(
+        self,
+        counter: TokenCounter = None,
+        budget: int = None,
+        max_history_messages: int = None,
+        min_partial_tokens: int = None,
+    ):
+        config = settings.chat
+        self.counter = counter or TokenCounter()
+        self.budget = budget or config.prompt_token_budget
+        self.max_history_messages = (
+            config.prompt_history_messages
+            if max_history_messages is None
+            else max_history_messages
+        )
+        self.min_partial_tokens = (
+            config.prompt_min_partial_tokens
+            if min_partial_tokens is None
+            else min_partial_tokens
+        )
+
+    def assemble(
+        self,
+        query: str,
+        docs: List[Any],
+        context_messages: Optional[List[Dict[str, Any]]],
+        reserved_tokens: int = 0,
+    ) -> AssembledContext:
+        """Fill the budget left after `reserved_tokens` (system prompt) and the query"""
+        result = AssembledContext()
+        query_tokens = self.counter.count(query)
+        remaining = self.budget - reserved_tokens - query_tokens
+
+        # Documents in rank order; the first that does not fit is cut short
+        for doc in docs or []:
+            cost = self.counter.count(doc.page_content) + DOCUMENT_OVERHEAD_TOKENS
+            if cost <= remaining:
+                result.documents.append(doc)
+                remaining -= cost
+                continue
+            available = remaining - DOCUMENT_OVERHEAD_TOKENS
+            if available >= self.min_partial_tokens:
+                result.documents.append(
+                    Document(
+                        page_content=self.counter.truncate(doc.page_content, available),
+                        metadata=doc.metadata,
+                    )
+                )
+                remaining = 0
+            break
+        result.dropped_documents = len(docs or []) - len(result.documents)
+        documents_tokens = self.budget - reserved_tokens - query_tokens - remaining
+
+        # Recent turns, newest first, skipping what the prompt already carries
+        candidates = list(context_messages or [])
+        if candidates and candidates[-1]["content"].strip() == query.strip():
+            candidates.pop()  # the current question is the human message
+        seen = set()
+        selected = []
+        for message in reversed(candidates):
+            if len(selected) >= self.max_history_messages:
+                break
+            content = message["content"].strip()
+            if not content or content in seen:
+                continue
+            cost = self.counter.count(content) + MESSAGE_OVERHEAD_TOKENS
+            if cost > remaining:
+                available = remaining - MESSAGE_OVERHEAD_TOKENS
+                if available >= self.min_partial_tokens:
+                    selected.append(
+                        {**message, "content": self.counter.truncate(content, available)}
+                    )
+                    remaining = 0
+                break
+            seen.add(content)
+            selected.append(message)
+            remaining -= cost
+        result.messages = list(reversed(selected))
+        result.dropped_messages = len(candidates) - len(selected)
+
+        result.tokens = {
+            "system": reserved_tokens,
+            "query": query_tokens,
+            "documents": documents_tokens,
+            "history": self.budget
+            - reserved_tokens
+            - query_tokens
+            - documents_tokens
+            - remaining,
+        }
+        result.tokens["total"] = sum(result.tokens.values())
+        logger.debug(
+            f"Prompt context: {result.tokens} "
+            f"({result.dropped_documents} documents, {result.dropped_messages} messages dropped)"
+        )
+        return result
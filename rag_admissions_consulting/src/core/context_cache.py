@@ -1,12 +1,21 @@
 from typing import Dict, Optional
-from datetime import datetime, timedelta
+from collections import OrderedDict
+import asyncio
+import time
 from loguru import logger
 
+from config.settings import settings
 from core.context_manager import ContextManager
+from infrastructure.state_store import state_store
 
 
 class ContextCache:
-    """Cache ContextManager instances theo conversation_id để duy trì ngữ cảnh"""
+    """Cache ContextManager instances theo conversation_id để duy trì ngữ cảnh
+
+    Bounded LRU: OrderedDict giữ thứ tự truy cập (cũ nhất ở đầu), giới hạn
+    theo số conversation và tổng dung lượng tin nhắn; TTL được dọn bởi
+    background sweeper.
+    """
 
     _instance: Optional["ContextCache"] = None
     _initialized = False
@@ -18,68 +27,155 @@ class ContextCache:
 
     def __init__(self):
         if not ContextCache._initialized:
-            self.context_managers: Dict[str, ContextManager] = {}
-            self.cache_timeout_minutes = 120  # Cache timeout 2 giờ
+            self.context_managers: "OrderedDict[str, ContextManager]" = OrderedDict()
+            self.last_access: Dict[str, float] = {}
+            self.cache_timeout_minutes = settings.chat.context_cache_ttl_minutes
+            self.max_entries = settings.chat.context_cache_max_entries
+            self.max_total_bytes = settings.chat.context_cache_max_bytes
+            self.sweep_interval_seconds = settings.chat.context_cache_sweep_seconds
+            # Only write message windows through when other workers can read them
+            self.shared_store = state_store if state_store.shared else None
+            self.total_bytes = 0
+            self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+            self._sweeper_task: Optional[asyncio.Task] = None
             ContextCache._initialized = True
             logger.info("ContextCache initialized")
 
     def get_or_create_context_manager(
         self, user_id: int, conversation_id: str, user_email: str
     ) -> ContextManager:
-        """Lấy hoặc tạo ContextManager cho conversation_id"""
+        """Lấy hoặc tạo ContextManager cho conversation_id
+
+        Không đọc shared store; ChatService gọi sync_from_shared_store() trước
+        mỗi tin nhắn vì worker khác có thể đã trả lời.
+        """
 
         # Kiểm tra xem đã có ContextManager cho conversation_id này chưa
         if conversation_id in self.context_managers:
             context_manager = self.context_managers[conversation_id]
+            self._touch(conversation_id)
+            self.stats["hits"] += 1
             logger.info(
                 f"Reusing existing ContextManager for conversation: {conversation_id}"
             )
             return context_manager
 
         # Tạo ContextManager mới
-        context_manager = ContextManager(user_id, conversation_id, user_email)
+        context_manager = ContextManager(
+            user_id,
+            conversation_id,
+            user_email,
+            on_size_change=self._on_context_size_change,
+            shared_store=self.shared_store,
+        )
         self.context_managers[conversation_id] = context_manager
+        self._touch(conversation_id)
+        self.stats["misses"] += 1
+        self._evict_if_needed()
 
         logger.info(f"Created new ContextManager for conversation: {conversation_id}")
         return context_manager
 
+    def _touch(self, conversation_id: str):
+        """Đánh dấu conversation vừa được dùng (O(1))"""
+        self.context_managers.move_to_end(conversation_id)
+        self.last_access[conversation_id] = time.monotonic()
+
+    def _on_context_size_change(self, context_manager: ContextManager, delta: int):
+        """Callback từ ContextManager khi dung lượng tin nhắn thay đổi"""
+        conversation_id = context_manager.conversation_id
+        # Bỏ qua ContextManager đã bị evict (ChatService cũ vẫn có thể giữ tham chiếu)
+        if self.context_managers.get(conversation_id) is not context_manager:
+            return
+        self.total_bytes += delta
+        self._touch(conversation_id)
+        self._evict_if_needed()
+
+    def _pop(self, conversation_id: str) -> Optional[ContextManager]:
+        context_manager = self.context_managers.pop(conversation_id, None)
+        self.last_access.pop(conversation_id, None)
+        if context_manager is not None:
+            self.total_bytes -= context_manager.message_bytes
+        return context_manager
+
+    def _evict_if_needed(self):
+        """Xóa conversation ít dùng nhất khi vượt giới hạn số lượng hoặc dung lượng
+
+        Conversation vừa được dùng nằm cuối OrderedDict nên không bao giờ bị xóa.
+        """
+        while len(self.context_managers) > 1 and (
+            len(self.context_managers) > self.max_entries
+            or self.total_bytes > self.max_total_bytes
+        ):
+            oldest_id = next(iter(self.context_managers))
+            self._pop(oldest_id)
+            self.stats["evictions"] += 1
+            logger.info(f"Evicted ContextManager for conversation: {oldest_id}")
+
     def remove_context_manager(self, conversation_id: str):
         """Xóa ContextManager khỏi cache"""
-        if conversation_id in self.context_managers:
-            del self.context_managers[conversation_id]
+        if self._pop(conversation_id) is not None:
             logger.info(f"Removed ContextManager for conversation: {conversation_id}")
 
     def cleanup_expired_contexts(self):
         """Dọn dẹp các ContextManager đã hết hạn"""
-        current_time = datetime.now()
+        cutoff = time.monotonic() - self.cache_timeout_minutes * 60
         expired_conversations = []
 
-        for conversation_id, context_manager in self.context_managers.items():
-            # Kiểm tra tin nhắn cuối cùng
-            if context_manager.messages:
-                last_message_time = context_manager.messages[-1]["timestamp"]
-                if (
-                    current_time - last_message_time
-                ).total_seconds() > self.cache_timeout_minutes * 60:
-                    expired_conversations.append(conversation_id)
-            else:
-                # Nếu không có tin nhắn nào, xóa luôn
-                expired_conversations.append(conversation_id)
+        # Thứ tự LRU: dừng ở conversation đầu tiên còn hạn
+        for conversation_id in self.context_managers:
+            if self.last_access.get(conversation_id, 0) > cutoff:
+                break
+            expired_conversations.append(conversation_id)
 
         for conversation_id in expired_conversations:
-            del self.context_managers[conversation_id]
+            self._pop(conversation_id)
             logger.info(
                 f"Cleaned up expired ContextManager for conversation: {conversation_id}"
             )
 
         if expired_conversations:
+            self.stats["expired"] += len(expired_conversations)
             logger.info(
                 f"Cleaned up {len(expired_conversations)} expired ContextManagers"
             )
 
+    async def _sweep_periodically(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval_seconds)
+            try:
+                self.cleanup_expired_contexts()
+            except Exception as e:
+                logger.warning(f"Context cache sweep failed: {e}")
+
+    def start_sweeper(self):
+        """Chạy background task dọn dẹp TTL (gọi khi app startup)"""
+        if self._sweeper_task is None or self._sweeper_task.done():
+            self._sweeper_task = asyncio.create_task(self._sweep_periodically())
+            logger.info(
+                f"Context cache sweeper started (every {self.sweep_interval_seconds}s)"
+            )
+
+    async def stop_sweeper(self):
+        """Dừng background task dọn dẹp (gọi khi app shutdown)"""
+        if self._sweeper_task is not None:
+            self._sweeper_task.cancel()
+            try:
+                await self._sweeper_task
+            except asyncio.CancelledError:
+                pass
+            self._sweeper_task = None
+
     def get_cache_stats(self) -> Dict:
         """Lấy thống kê cache"""
-        stats = {"total_contexts": len(self.context_managers), "conversations": {}}
+        stats = {
+            "total_contexts": len(self.context_managers),
+            "total_bytes": self.total_bytes,
+            "max_entries": self.max_entries,
+            "max_total_bytes": self.max_total_bytes,
+            **self.stats,
+            "conversations": {},
+        }
 
         for conversation_id, context_manager in self.context_managers.items():
             context_stats = context_manager.get_context_stats()
@@ -87,6 +183,7 @@ class ContextCache:
                 "total_messages": context_stats["total_messages"],
                 "user_messages": context_stats["user_messages"],
                 "assistant_messages": context_stats["assistant_messages"],
+                "message_bytes": context_stats["message_bytes"],
                 "oldest_message": (
                     context_stats["oldest_message"].isoformat()
                     if context_stats["oldest_message"]
@@ -104,6 +201,8 @@ class ContextCache:
     def clear_all_contexts(self):
         """Xóa tất cả contexts"""
         self.context_managers.clear()
+        self.last_access.clear()
+        self.total_bytes = 0
         logger.info("Cleared all ContextManagers from cache")
 
 
@@ -1,23 +1,43 @@
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional
 from loguru import logger
 import asyncio
 from datetime import datetime, timedelta
 
+from config.settings import settings
 from shared.enum import RoleType
 from shared.chat_history_manager import ChatHistoryManager
+from infrastructure.state_store import StateStore
 
 
 class ContextManager:
     """Intelligent context manager for conversation history with backend integration"""
 
-    def __init__(self, user_id: int, conversation_id: str, user_email: str):
+    def __init__(
+        self,
+        user_id: int,
+        conversation_id: str,
+        user_email: str,
+        on_size_change: Optional[Callable[["ContextManager", int], None]] = None,
+        shared_store: Optional[StateStore] = None,
+    ):
         self.user_id = user_id
         self.conversation_id = conversation_id
         self.user_email = user_email
         self.messages: List[Dict[str, Any]] = []
+        self.message_bytes = 0  # UTF-8 size of cached message contents
+        self._on_size_change = on_size_change
+        # Recent message window shared with other workers (None = local only)
+        self.shared_store = shared_store
         self.max_context_length = 20  # Maximum messages to keep in context
         self.context_window_minutes = 30  # Context window in minutes
 
+        # Rolling summary of turns older than `summarized_until`
+        self.summary = ""
+        self.summarized_until: Optional[datetime] = None
+        self.summary_trigger_messages = settings.chat.summary_trigger_messages
+        self.summary_keep_recent_messages = settings.chat.summary_keep_recent_messages
+        self._summary_task: Optional[asyncio.Task] = None
+
         # Initialize ChatHistoryManager for backend integration
         self.history_manager = ChatHistoryManager(user_id, user_email)
         self.history_manager.set_conversation_id(conversation_id)
@@ -32,6 +52,21 @@ class ContextManager:
         }
 
         self.messages.append(message)
+        self._update_size(self.message_bytes + len(content.encode("utf-8")))
+        if self.shared_store:
+            try:
+                await self.shared_store.append(
+                    self._shared_key,
+                    {
+                        "role": message["role"],
+                        "content": content,
+                        "timestamp": message["timestamp"].isoformat(),
+                    },
+                    max_len=self.max_context_length * 2,
+                    ttl_seconds=self.context_window_minutes * 2 * 60,
+                )
+            except Exception as e:
+                logger.warning(f"Failed to share message with other workers: {e}")
         print(
             f"🚀 FAST: Added {role} message to local cache. Total: {len(self.messages)}"
         )
@@ -54,15 +89,111 @@ class ContextManager:
             f"Added {role} message to context. Total messages: {len(self.messages)}"
         )
 
+    @property
+    def _shared_key(self) -> str:
+        return f"context:{self.conversation_id}"
+
+    @property
+    def _summary_key(self) -> str:
+        return f"summary:{self.conversation_id}"
+
+    def _unsummarized(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if self.summarized_until is None:
+            return messages
+        return [msg for msg in messages if msg["timestamp"] > self.summarized_until]
+
+    def schedule_summary(self, summarizer) -> Optional[asyncio.Task]:
+        """Fold older turns into the summary in the background once past the trigger
+
+        Called after a reply has streamed; the next turn uses whatever
+        summary is ready and the raw turns after it.
+        """
+        if summarizer is None or (self._summary_task and not self._summary_task.done()):
+            return None
+        pending = self._unsummarized(self.messages)
+        if len(pending) <= self.summary_trigger_messages:
+            return None
+        self._summary_task = asyncio.create_task(
+            self._fold_into_summary(
+                summarizer, pending[: -self.summary_keep_recent_messages]
+            )
+        )
+        return self._summary_task
+
+    async def _fold_into_summary(self, summarizer, messages: List[Dict[str, Any]]):
+        try:
+            summary = await summarizer.summarize(self.summary, messages)
+        except Exception as e:
+            logger.warning(f"Failed to summarize conversation, keeping raw turns: {e}")
+            return
+
+        self.summary = summary
+        self.summarized_until = messages[-1]["timestamp"]
+        if self.shared_store:
+            try:
+                await self.shared_store.set(
+                    self._summary_key,
+                    {
+                        "summary": summary,
+                        "summarized_until": self.summarized_until.isoformat(),
+                    },
+                    ttl_seconds=self.context_window_minutes * 2 * 60,
+                )
+            except Exception as e:
+                logger.warning(f"Failed to share conversation summary: {e}")
+        logger.debug(
+            f"Folded {len(messages)} messages into summary for conversation: "
+            f"{self.conversation_id} ({len(summary)} chars)"
+        )
+
+    async def sync_from_shared_store(self):
+        """Replace the local window with the shared one (written by any worker)"""
+        if not self.shared_store:
+            return
+        try:
+            shared_messages = await self.shared_store.get_list(self._shared_key)
+        except Exception as e:
+            logger.warning(f"Shared context unavailable, using local cache: {e}")
+            return
+
+        self.messages = [
+            {
+                "role": RoleType(msg["role"]),
+                "content": msg["content"],
+                "timestamp": datetime.fromisoformat(msg["timestamp"]),
+                "conversation_id": self.conversation_id,
+            }
+            for msg in shared_messages
+        ]
+        self._update_size(
+            sum(len(msg["content"].encode("utf-8")) for msg in self.messages)
+        )
+
+        try:
+            shared_summary = await self.shared_store.get(self._summary_key)
+        except Exception as e:
+            logger.warning(f"Shared summary unavailable, using local one: {e}")
+            return
+        if shared_summary:
+            self.summary = shared_summary["summary"]
+            self.summarized_until = datetime.fromisoformat(
+                shared_summary["summarized_until"]
+            )
+
     async def get_context_messages(
         self, limit: Optional[int] = None
     ) -> List[Dict[str, Any]]:
-        """OPTIMIZED: Get recent context messages - prioritize local cache for speed"""
+        """OPTIMIZED: Get recent context messages - prioritize local cache for speed
+
+        Turns already folded into `summary` are left out.
+        """
 
         # Always prioritize local cache for speed
         cutoff_time = datetime.now() - timedelta(minutes=self.context_window_minutes)
         local_messages = [
-            msg for msg in self.messages if msg["timestamp"] > cutoff_time
+            msg
+            for msg in self._unsummarized(self.messages)
+            if msg["timestamp"] > cutoff_time
         ]
 
         # Apply limit if specified
@@ -129,6 +260,8 @@ class ContextManager:
         summary_parts = []
         summary_parts.append(f"Cuộc trò chuyện có {len(self.messages)} tin nhắn")
         summary_parts.append(f"Người dùng đã hỏi {len(user_questions)} câu hỏi")
+        if self.summary:
+            summary_parts.append(f"Tóm tắt: {self.summary}")
 
         # Get main topics from recent questions
         recent_questions = (
@@ -154,9 +287,28 @@ class ContextManager:
         if len(self.messages) > self.max_context_length * 2:
             self.messages = self.messages[-self.max_context_length * 2 :]
 
+        self._update_size(
+            sum(len(msg["content"].encode("utf-8")) for msg in self.messages)
+        )
+
+    def _update_size(self, new_size: int):
+        """Track message bytes and report the change to the owning cache"""
+        delta = new_size - self.message_bytes
+        self.message_bytes = new_size
+        if delta and self._on_size_change:
+            self._on_size_change(self, delta)
+
     async def clear_context(self):
         """Clear all conversation context"""
         self.messages.clear()
+        self._update_size(0)
+        if self._summary_task and not self._summary_task.done():
+            self._summary_task.cancel()
+        self.summary = ""
+        self.summarized_until = None
+        if self.shared_store:
+            await self.shared_store.delete(self._shared_key)
+            await self.shared_store.delete(self._summary_key)
         logger.info(f"Context cleared for conversation: {self.conversation_id}")
 
     def get_context_stats(self) -> Dict[str, Any]:
@@ -171,6 +323,9 @@ class ContextManager:
             "user_messages": user_messages,
             "assistant_messages": assistant_messages,
             "conversation_id": self.conversation_id,
+            "message_bytes": self.message_bytes,
+            "summary_chars": len(self.summary),
+            "summarized_until": self.summarized_until,
             "oldest_message": self.messages[0]["timestamp"] if self.messages else None,
             "newest_message": self.messages[-1]["timestamp"] if self.messages else None,
         }
@@ -0,0 +1,63 @@
+"""
+Rolling conversation summary.
+
+Long chats fold their older turns into one short running summary so the
+prompt carries the summary plus a few recent turns instead of an
+ever-growing transcript. Each update only reads the previous summary and
+the newly folded turns, and runs after the reply has streamed.
+"""
+
+from typing import Any, Dict, List
+
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from loguru import logger
+
+from config.settings import settings
+from shared.enum import RoleType
+
+SUMMARY_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            """Bạn tóm tắt cuộc trò chuyện tư vấn tuyển sinh để tư vấn viên tiếp tục hỗ trợ.
+Cập nhật bản tóm tắt hiện có với các lượt trò chuyện mới:
+- Giữ lại thông tin về người hỏi (ngành quan tâm, điểm số, khu vực, mong muốn)
+- Giữ lại các câu hỏi đã được trả lời và số liệu quan trọng (học phí, điểm chuẩn, thời hạn)
+- Bỏ lời chào hỏi và nội dung lặp lại
+- Viết bằng tiếng Việt, tối đa {max_words} từ, không thêm thông tin mới""",
+        ),
+        (
+            "human",
+            "Bản tóm tắt hiện có:\n{summary}\n\nCác lượt trò chuyện mới:\n{transcript}\n\nBản tóm tắt cập nhật:",
+        ),
+    ]
+)
+
+
+class ConversationSummarizer:
+    """Fold older turns into a conversation's running summary with the LLM"""
+
+    def __init__(self, llm, max_words: int = None):
+        self.chain = SUMMARY_PROMPT | llm | StrOutputParser()
+        self.max_words = max_words or settings.chat.summary_max_words
+
+    async def summarize(self, summary: str, messages: List[Dict[str, Any]]) -> str:
+        """Previous summary updated with `messages`, oldest first"""
+        transcript = "\n".join(
+            f"{'Người dùng' if msg['role'] == RoleType.USER else 'Tư vấn viên'}: {msg['content']}"
+            for msg in messages
+        )
+        updated = await self.chain.ainvoke(
+            {
+                "summary": summary or "(chưa có)",
+                "transcript": transcript,
+                "max_words": self.max_words,
+            }
+        )
+        words = updated.split()
+        # The model usually respects the limit; the prompt must not depend on it
+        if len(words) > self.max_words * 2:
+            logger.debug(f"Summary of {len(words)} words cut to {self.max_words * 2}")
+            updated = " ".join(words[: self.max_words * 2])
+        return updated.strip()
@@ -0,0 +1,150 @@
+"""
+Embedding-based intent classifier.
+
+Each QueryAnalyzer category gets a centroid: the normalised mean of the
+embeddings of a few labelled example questions, computed once at startup
+(the embedding cache makes restarts cheap). Classifying a query is a single
+matrix-vector product against the centroids using the embedding already
+computed for retrieval, so paraphrases such as "bao nhiêu tiền một kỳ"
+route like "học phí" at almost no extra cost.
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from loguru import logger
+
+from config.settings import settings
+
+# Labelled examples per QueryAnalyzer category
+INTENT_EXAMPLES: Dict[str, List[str]] = {
+    "specific_program": [
+        "Trường có những ngành nào?",
+        "Ngành công nghệ thông tin học những môn gì?",
+        "Chuyên ngành quản trị kinh doanh đào tạo mấy năm?",
+        "Khoa kỹ thuật có những chuyên ngành nào?",
+        "Học marketing ở trường ra bằng gì?",
+        "Chương trình đào tạo ngành du lịch như thế nào?",
+        "Ngành điều dưỡng có chương trình liên kết quốc tế không?",
+        "Em muốn học về trí tuệ nhân tạo thì chọn ngành nào?",
+    ],
+    "admission_process": [
+        "Thủ tục xét tuyển vào trường như thế nào?",
+        "Hồ sơ đăng ký xét tuyển gồm những gì?",
+        "Điểm chuẩn năm ngoái là bao nhiêu?",
+        "Khi nào hết hạn nộp hồ sơ?",
+        "Trường xét học bạ hay xét điểm thi tốt nghiệp?",
+        "Em cần điều kiện gì để trúng tuyển?",
+        "Có những phương thức tuyển sinh nào?",
+        "Làm sao để đăng ký nguyện vọng vào trường?",
+    ],
+    "fees_scholarships": [
+        "Học phí một năm là bao nhiêu?",
+        "Bao nhiêu tiền một kỳ?",
+        "Một tín chỉ giá bao nhiêu?",
+        "Trường có học bổng cho tân sinh viên không?",
+        "Có được miễn giảm học phí không?",
+        "Có thể đóng tiền học theo từng đợt không?",
+        "Sinh viên có được vay vốn ngân hàng để đi học không?",
+        "Chi phí sinh hoạt khi học ở Đà Nẵng khoảng bao nhiêu?",
+    ],
+    "facilities_campus": [
+        "Trường có ký túc xá không?",
+        "Trường nằm ở đâu?",
+        "Thư viện mở cửa đến mấy giờ?",
+        "Phòng thí nghiệm có hiện đại không?",
+        "Có chỗ gửi xe cho sinh viên không?",
+        "Ký túc xá một tháng bao nhiêu tiền?",
+        "Cơ sở vật chất của trường thế nào?",
+        "Căng tin trong trường có rẻ không?",
+    ],
+    "career_prospects": [
+        "Ra trường làm công việc gì?",
+        "Cơ hội việc làm của ngành này thế nào?",
+        "Mức lương sau khi tốt nghiệp khoảng bao nhiêu?",
+        "Trường có giới thiệu việc làm cho sinh viên không?",
+        "Sinh viên có được đi thực tập ở doanh nghiệp không?",
+        "Tỷ lệ sinh viên có việc làm sau tốt nghiệp là bao nhiêu?",
+        "Học ngành này sau này có dễ xin việc không?",
+        "Trường liên kết với những công ty nào?",
+    ],
+    "general_info": [
+        "Giới thiệu về trường Đại học Đông Á",
+        "Trường thành lập năm nào?",
+        "Trường có uy tín không?",
+        "Chất lượng đào tạo của trường thế nào?",
+        "Trường là trường công hay tư?",
+        "Trường xếp hạng thứ mấy?",
+        "Cho em xin thông tin liên hệ của phòng tuyển sinh",
+        "Trường có bao nhiêu sinh viên?",
+    ],
+}
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+class IntentClassifier:
+    """Nearest-centroid classifier over query embeddings"""
+
+    def __init__(
+        self,
+        embedding_model,
+        examples: Dict[str, List[str]] = None,
+        min_similarity: float = None,
+        min_margin: float = None,
+    ):
+        config = settings.intent
+        self.embedding_model = embedding_model
+        self.examples = examples or INTENT_EXAMPLES
+        self.min_similarity = (
+            config.min_similarity if min_similarity is None else min_similarity
+        )
+        self.min_margin = config.min_margin if min_margin is None else min_margin
+        self.labels: List[str] = []
+        self.centroids: Optional[np.ndarray] = None
+
+    def build(self) -> "IntentClassifier":
+        """Embed the labelled examples and compute one centroid per category"""
+        labels = list(self.examples)
+        texts = [text for label in labels for text in self.examples[label]]
+        vectors = _normalize(
+            np.asarray(self.embedding_model.embed_documents(texts), dtype=np.float32)
+        )
+
+        centroids = []
+        start = 0
+        for label in labels:
+            count = len(self.examples[label])
+            centroids.append(vectors[start : start + count].mean(axis=0))
+            start += count
+
+        self.labels = labels
+        self.centroids = _normalize(np.stack(centroids))
+        logger.info(
+            f"Intent classifier built: {len(labels)} categories from {len(texts)} examples"
+        )
+        return self
+
+    @property
+    def ready(self) -> bool:
+        return self.centroids is not None
+
+    def scores(self, query_embedding: Sequence[float]) -> Dict[str, float]:
+        """Cosine similarity of the query to every category centroid"""
+        query = _normalize(np.asarray(query_embedding, dtype=np.float32))
+        similarities = self.centroids @ query
+        return {label: float(score) for label, score in zip(self.labels, similarities)}
+
+    def classify(self, query_embedding: Sequence[float]) -> Optional[Dict[str, object]]:
+        """Best category, or None when the match is too weak or ambiguous"""
+        if not self.ready:
+            return None
+        scores = self.scores(query_embedding)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        (best, best_score), runner_up = ranked[0], ranked[1][1] if len(ranked) > 1 else 0.0
+        if best_score < self.min_similarity or best_score - runner_up < self.min_margin:
+            return None
+        return {"type": best, "similarity": best_score, "scores": scores}
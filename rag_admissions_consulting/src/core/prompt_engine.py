@@ -1,9 +1,15 @@
 from typing import List, Dict, Any, Optional
+from langchain_core.messages import BaseMessage
 from langchain_core.prompts import ChatPromptTemplate
 from loguru import logger
 from config.settings import settings
 
 
+def _escape(text: str) -> str:
+    """Make literal text safe inside a prompt template"""
+    return text.replace("{", "{{").replace("}", "}}")
+
+
 class PromptEngine:
     """Intelligent prompt engine for context-aware responses"""
 
@@ -136,6 +142,33 @@ Người dùng cần làm rõ thông tin. Hãy:
 """,
         }
 
+        # Compiled templates, valid while personality and contact info are unchanged
+        self._compiled: Dict[tuple, ChatPromptTemplate] = {}
+        self._prompt_tokens: Dict[tuple, int] = {}
+        self._compiled_for = self._settings_fingerprint()
+
+    def _settings_fingerprint(self) -> tuple:
+        """Settings baked into compiled prompts"""
+        return (
+            settings.personality.personality,
+            settings.personality.persona,
+            tuple(sorted(settings.contact_info.items())),
+        )
+
+    def refresh(self) -> bool:
+        """Drop compiled prompts if personality or contact info changed
+
+        Called after /reload-config; returns whether prompts will be recompiled.
+        """
+        fingerprint = self._settings_fingerprint()
+        if fingerprint == self._compiled_for:
+            return False
+        self._compiled = {}
+        self._prompt_tokens = {}
+        self._compiled_for = fingerprint
+        logger.info("Prompt templates invalidated after configuration change")
+        return True
+
     def _get_base_system_prompt(self) -> str:
         """Get the base system prompt with dynamic personality configuration"""
         personality_style = self.personality_styles.get(
@@ -155,81 +188,145 @@ Người dùng cần làm rõ thông tin. Hãy:
 
         return base_prompt
 
-    def create_context_aware_prompt(
-        self,
-        query: str,
-        enhanced_query: str,
-        context_messages: List[Dict[str, Any]] = None,
-        query_analysis: Dict[str, Any] = None,
-        relevant_docs: List[Any] = None,
+    def _get_contact_info_prompt(self) -> str:
+        return f"""
+**Thông tin liên hệ khi cần hỗ trợ thêm**:
+📞 Hotline: {settings.contact_info['hotline']}
+📧 Email: {settings.contact_info['email']}
+🌐 Website: {settings.contact_info['website']}
+📍 Địa chỉ: {settings.contact_info['address']}
+"""
+
+    def _get_context_aware_template(
+        self, query_type: Optional[str], context_type: Optional[str]
     ) -> ChatPromptTemplate:
-        """Create a context-aware prompt based on query analysis and conversation history"""
+        """Compiled template for a (query type, context type) pair, built once
+
+        Settings text is escaped so braces in a persona cannot break the
+        template; per-turn text only enters through the variables.
+        """
+        key = ("context_aware", query_type, context_type)
+        template = self._compiled.get(key)
+        if template is not None:
+            return template
 
         # Build system prompt with dynamic personality
-        system_prompt = self._get_base_system_prompt()
+        system_prompt = _escape(self._get_base_system_prompt())
 
         # Add specialized instructions based on query type
-        if query_analysis and query_analysis.get("type") in self.specialized_prompts:
-            query_type = query_analysis["type"]
-            system_prompt += f"\n\n**Hướng dẫn đặc biệt cho loại câu hỏi này**:\n{self.specialized_prompts[query_type]}"
+        if query_type:
+            system_prompt += _escape(
+                f"\n\n**Hướng dẫn đặc biệt cho loại câu hỏi này**:\n{self.specialized_prompts[query_type]}"
+            )
 
         # Add context-specific instructions
-        if query_analysis and query_analysis.get("context_type"):
-            context_type = query_analysis["context_type"]
-            if context_type in self.specialized_prompts:
-                system_prompt += f"\n\n**Hướng dẫn xử lý ngữ cảnh**:\n{self.specialized_prompts[context_type]}"
+        if context_type:
+            system_prompt += _escape(
+                f"\n\n**Hướng dẫn xử lý ngữ cảnh**:\n{self.specialized_prompts[context_type]}"
+            )
 
-        # Add conversation context if available
-        if context_messages:
-            system_prompt += self._build_conversation_context_prompt(context_messages)
+        # Conversation context changes every turn
+        system_prompt += "{conversation_context}"
 
         # Add document context instructions with dynamic contact info
-        system_prompt += f"""
+        system_prompt += """
 
 **Sử dụng thông tin từ tài liệu**:
-- Dựa vào thông tin trong {{context}} để trả lời
+- Dựa vào thông tin trong phần tài liệu được cung cấp bên dưới để trả lời
 - Nếu không tìm thấy thông tin cần thiết, hãy thành thật nói rằng bạn không có thông tin đó
 - Luôn ưu tiên thông tin chính thức từ trường
-- Có thể tham khảo lịch sử trò chuyện trong {{chat_history}} để hiểu rõ hơn ngữ cảnh
-
-**Thông tin liên hệ khi cần hỗ trợ thêm**:
-📞 Hotline: {settings.contact_info['hotline']}
-📧 Email: {settings.contact_info['email']}
-🌐 Website: {settings.contact_info['website']}
-📍 Địa chỉ: {settings.contact_info['address']}
+- Có thể tham khảo ngữ cảnh cuộc trò chuyện ở trên để hiểu rõ hơn câu hỏi
 """
+        system_prompt += _escape(self._get_contact_info_prompt())
 
         # Create the prompt template
-        prompt = ChatPromptTemplate.from_messages(
+        template = ChatPromptTemplate.from_messages(
             [
                 ("system", system_prompt),
                 ("system", "Thông tin liên quan từ cơ sở dữ liệu:\n{context}"),
-                ("system", "Lịch sử cuộc trò chuyện: {chat_history}"),
                 ("human", "{input}"),
             ]
         )
-
+        self._compiled[key] = template
         logger.debug(
-            f"Created context-aware prompt for query type: {query_analysis.get('type', 'unknown') if query_analysis else 'unknown'}"
+            f"Compiled prompt template for query type: {query_type}, context type: {context_type}, "
+            f"personality: {settings.personality.personality}"
         )
-        logger.debug(
-            f"Using personality: {settings.personality.personality} with creativity level: {settings.personality.creativity_level}"
+        return template
+
+    def _template_key(self, query_analysis: Dict[str, Any] = None) -> tuple:
+        query_analysis = query_analysis or {}
+        query_type = query_analysis.get("type")
+        context_type = query_analysis.get("context_type")
+        return (
+            query_type if query_type in self.specialized_prompts else None,
+            context_type if context_type in self.specialized_prompts else None,
+        )
+
+    def _select_template(
+        self, query_analysis: Dict[str, Any] = None
+    ) -> ChatPromptTemplate:
+        return self._get_context_aware_template(*self._template_key(query_analysis))
+
+    def count_prompt_tokens(self, query_analysis: Dict[str, Any], counter) -> int:
+        """Tokens of the fixed template text, before any per-turn variables"""
+        key = self._template_key(query_analysis)
+        tokens = self._prompt_tokens.get(key)
+        if tokens is None:
+            messages = self._get_context_aware_template(*key).format_messages(
+                input="", context="", conversation_context=""
+            )
+            tokens = sum(counter.count(message.content) for message in messages)
+            self._prompt_tokens[key] = tokens
+        return tokens
+
+    def create_context_aware_prompt(
+        self,
+        query: str,
+        enhanced_query: str,
+        context_messages: List[Dict[str, Any]] = None,
+        query_analysis: Dict[str, Any] = None,
+        relevant_docs: List[Any] = None,
+    ) -> ChatPromptTemplate:
+        """Create a context-aware prompt based on query analysis and conversation history"""
+        return self._select_template(query_analysis).partial(
+            conversation_context=self._build_conversation_context_prompt(
+                context_messages
+            )
         )
 
-        return prompt
+    def format_context_aware_messages(
+        self,
+        query: str,
+        context: str,
+        context_messages: List[Dict[str, Any]] = None,
+        query_analysis: Dict[str, Any] = None,
+        conversation_summary: str = None,
+    ) -> List[BaseMessage]:
+        """Messages for one turn: a compiled-template lookup plus variable filling"""
+        return self._select_template(query_analysis).format_messages(
+            input=query,
+            context=context,
+            conversation_context=self._build_conversation_context_prompt(
+                context_messages, conversation_summary
+            ),
+        )
 
     def _build_conversation_context_prompt(
-        self, context_messages: List[Dict[str, Any]]
+        self, context_messages: List[Dict[str, Any]], summary: str = None
     ) -> str:
         """Build conversation context section for the prompt"""
 
-        if not context_messages:
+        if not context_messages and not summary:
             return ""
 
         context_prompt = "\n\n**Ngữ cảnh cuộc trò chuyện**:\n"
+        if summary:
+            context_prompt += f"Tóm tắt phần trước của cuộc trò chuyện:\n{summary}\n\n"
         context_prompt += "Hãy xem xét thông tin sau từ cuộc trò chuyện trước đó để hiểu rõ hơn câu hỏi hiện tại:\n\n"
 
         # Get recent messages (last 6 messages = 3 exchanges)
+        context_messages = context_messages or []
         recent_messages = (
             context_messages[-6:] if len(context_messages) > 6 else context_messages
         )
@@ -246,6 +343,10 @@ Người dùng cần làm rõ thông tin. Hãy:
 
     def create_simple_prompt(self, query_type: str = "general") -> ChatPromptTemplate:
         """Create a simple prompt for basic queries"""
+        key = ("simple", query_type)
+        template = self._compiled.get(key)
+        if template is not None:
+            return template
 
         system_prompt = self._get_base_system_prompt()
 
@@ -253,19 +354,14 @@ Người dùng cần làm rõ thông tin. Hãy:
             system_prompt += f"\n\n{self.specialized_prompts[query_type]}"
 
         # Add contact info to simple prompt as well
-        system_prompt += f"""
+        system_prompt += "\n" + self._get_contact_info_prompt()
 
-**Thông tin liên hệ khi cần hỗ trợ thêm**:
-📞 Hotline: {settings.contact_info['hotline']}
-📧 Email: {settings.contact_info['email']}
-🌐 Website: {settings.contact_info['website']}
-📍 Địa chỉ: {settings.contact_info['address']}
-"""
-
-        return ChatPromptTemplate.from_messages(
+        template = ChatPromptTemplate.from_messages(
             [
-                ("system", system_prompt),
+                ("system", _escape(system_prompt)),
                 ("system", "Thông tin từ cơ sở dữ liệu: {context}"),
                 ("human", "{input}"),
             ]
         )
+        self._compiled[key] = template
+        return template
@@ -1,8 +1,41 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set
 import re
 from loguru import logger
 
 
+def _trie_pattern(terms) -> str:
+    """Regex matching any of `terms`, factored by common prefix (longest first)"""
+    trie: Dict[str, dict] = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [
+            re.escape(char) + build(child) for char, child in sorted(node.items()) if char
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Greedy optional: prefer the longer term when both end here
+        return "(?:" + body + ")?" if "" in node else body
+
+    return build(trie)
+
+
+# Category tag stored on indexed chunks for each query type (general_info is untagged)
+CATEGORY_TAGS = {
+    "specific_program": "program",
+    "fees_scholarships": "fees",
+    "admission_process": "process",
+    "facilities_campus": "campus",
+    "career_prospects": "career",
+}
+CATEGORY_FIELD = "categories"
+
+
 class QueryAnalyzer:
     """Analyze user queries to understand intent and improve response quality"""
 
@@ -137,174 +170,220 @@ class QueryAnalyzer:
             "comparison": ["so với", "khác", "giống", "tương tự", "hơn", "kém"],
         }
 
+        # Word lists used by intent / context / complexity checks
+        self.intent_words = {
+            "question": [
+                "gì",
+                "ai",
+                "đâu",
+                "khi nào",
+                "như thế nào",
+                "tại sao",
+                "bao nhiêu",
+            ],
+            "action": ["đăng ký", "nộp", "làm", "thực hiện", "liên hệ"],
+            "comparison": ["so với", "khác", "giống", "tương tự", "hơn"],
+        }
+        self.pronouns = ["nó", "đó", "này", "kia", "đấy", "ấy"]
+        self.conjunctions = ["và", "hoặc"]
+
+        self._compile()
+
+    def _compile(self):
+        """Compile every word list into one matcher and precompile the patterns
+
+        All terms go into a single prefix-trie regex inside a lookahead, so
+        one pass finds the longest term starting at each position; shorter
+        terms that are prefixes of it are added from a precomputed table.
+        The matched set is therefore exactly the set of terms for which
+        `term in query` is true.
+        """
+        self._category_keywords = {
+            query_type: frozenset(patterns["keywords"])
+            for query_type, patterns in self.query_patterns.items()
+        }
+        self._category_patterns = {
+            query_type: [re.compile(pattern) for pattern in patterns["patterns"]]
+            for query_type, patterns in self.query_patterns.items()
+        }
+        self._all_keywords = frozenset().union(*self._category_keywords.values())
+        self._context_words = {
+            name: frozenset(words) for name, words in self.context_keywords.items()
+        }
+        self._intent_words = {
+            name: frozenset(words) for name, words in self.intent_words.items()
+        }
+        self._pronouns = frozenset(self.pronouns)
+        self._conjunctions = frozenset(self.conjunctions)
+
+        terms = set(self._all_keywords).union(
+            *self._context_words.values(),
+            *self._intent_words.values(),
+            self._pronouns,
+            self._conjunctions,
+        )
+        first_chars = "".join(sorted({term[0] for term in terms}))
+        self._matcher = re.compile(
+            "(?=[" + re.escape(first_chars) + "])(?=(" + _trie_pattern(terms) + "))"
+        )
+        self._prefix_terms = {
+            term: tuple(other for other in terms if term.startswith(other))
+            for term in terms
+        }
+
     async def analyze_query(
         self, query: str, context_messages: List[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """Analyze query to understand intent and context"""
+        analysis = self.analyze(query, context_messages)
+        logger.debug(f"Query analysis: {analysis}")
+        return analysis
 
-        analysis = {
-            "type": "general",
-            "confidence": 0.0,
-            "keywords": [],
-            "intent": "information_seeking",
-            "context_type": None,
-            "requires_context": False,
-            "complexity": "simple",
-        }
-
+    def analyze(
+        self, query: str, context_messages: List[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Single-pass analysis: one regex scan, then set lookups"""
         query_lower = query.lower()
+        matched = self._match_terms(query_lower)
+        word_count = len(query_lower.split())
 
         # Analyze query type
         max_confidence = 0
         best_type = "general"
 
-        for query_type, patterns in self.query_patterns.items():
-            confidence = self._calculate_type_confidence(query_lower, patterns)
+        for query_type in self.query_patterns:
+            confidence = self._calculate_type_confidence(
+                query_lower, query_type, matched
+            )
             if confidence > max_confidence:
                 max_confidence = confidence
                 best_type = query_type
 
-        analysis["type"] = best_type
-        analysis["confidence"] = max_confidence
-
-        # Extract keywords
-        analysis["keywords"] = self._extract_keywords(query_lower)
-
-        # Analyze intent
-        analysis["intent"] = self._analyze_intent(query_lower, context_messages)
+        keywords = self._extract_keywords(matched)
+
+        return {
+            "type": best_type,
+            "confidence": max_confidence,
+            "keywords": keywords,
+            "intent": self._analyze_intent(matched, context_messages),
+            "context_type": self._get_context_type(matched),
+            "requires_context": self._requires_context(matched, word_count),
+            "complexity": self._determine_complexity(
+                query_lower, matched, word_count, keywords
+            ),
+        }
 
-        # Check if context is needed
-        analysis["requires_context"] = self._requires_context(
-            query_lower, context_messages
-        )
-        analysis["context_type"] = self._get_context_type(query_lower)
+    def _match_terms(self, query: str) -> Set[str]:
+        """All known terms that occur in the query (substring semantics)"""
+        matched: Set[str] = set()
+        for match in self._matcher.finditer(query):
+            matched.update(self._prefix_terms[match.group(1)])
+        return matched
+
+    def categorize_text(self, text: str) -> List[str]:
+        """Category tags of a document chunk: every category with a keyword in it
+
+        Tagging is deliberately generous; retrieval falls back to an unfiltered
+        search when a category filter returns too few chunks.
+        """
+        matched = self._match_terms(text.lower())
+        return [
+            tag
+            for query_type, tag in CATEGORY_TAGS.items()
+            if not matched.isdisjoint(self._category_keywords[query_type])
+        ]
 
-        # Determine complexity
-        analysis["complexity"] = self._determine_complexity(
-            query_lower, context_messages
+    def match_keywords(self, text: str, query_types=None) -> List[str]:
+        """Category keywords in `text` (optionally only of `query_types`),
+        leaving out those contained in a longer match ("phí" in "học phí")"""
+        keywords = self._all_keywords
+        if query_types is not None:
+            keywords = frozenset().union(
+                *(self._category_keywords[query_type] for query_type in query_types)
+            )
+        found = self._match_terms(text.lower()) & keywords
+        return sorted(
+            (term for term in found if not any(term in other for other in found if other != term)),
+            key=len,
+            reverse=True,
         )
 
-        logger.debug(f"Query analysis: {analysis}")
-        return analysis
-
     def _calculate_type_confidence(
-        self, query: str, patterns: Dict[str, List[str]]
+        self, query: str, query_type: str, matched: Set[str]
     ) -> float:
         """Calculate confidence score for a query type"""
-        keyword_matches = 0
-        pattern_matches = 0
+        keywords = self._category_keywords[query_type]
+        patterns = self._category_patterns[query_type]
 
-        # Check keyword matches
-        for keyword in patterns["keywords"]:
-            if keyword in query:
-                keyword_matches += 1
-
-        # Check pattern matches
-        for pattern in patterns["patterns"]:
-            if re.search(pattern, query):
-                pattern_matches += 1
+        keyword_matches = len(keywords & matched)
+        pattern_matches = sum(1 for pattern in patterns if pattern.search(query))
 
         # Calculate confidence (weighted)
-        keyword_score = keyword_matches / len(patterns["keywords"]) * 0.7
-        pattern_score = pattern_matches / len(patterns["patterns"]) * 0.3
+        keyword_score = keyword_matches / len(keywords) * 0.7
+        pattern_score = pattern_matches / len(patterns) * 0.3
 
         return keyword_score + pattern_score
 
-    def _extract_keywords(self, query: str) -> List[str]:
+    def _extract_keywords(self, matched: Set[str]) -> List[str]:
         """Extract important keywords from query"""
-        keywords = []
-
-        # Extract all keywords from all patterns
-        for patterns in self.query_patterns.values():
-            for keyword in patterns["keywords"]:
-                if keyword in query:
-                    keywords.append(keyword)
-
-        return list(set(keywords))  # Remove duplicates
+        return list(self._all_keywords & matched)
 
     def _analyze_intent(
-        self, query: str, context_messages: List[Dict[str, Any]] = None
+        self, matched: Set[str], context_messages: List[Dict[str, Any]] = None
     ) -> str:
         """Analyze the intent behind the query"""
 
         # Question words indicate information seeking
-        question_words = [
-            "gì",
-            "ai",
-            "đâu",
-            "khi nào",
-            "như thế nào",
-            "tại sao",
-            "bao nhiêu",
-        ]
-        if any(word in query for word in question_words):
+        if not matched.isdisjoint(self._intent_words["question"]):
             return "information_seeking"
 
         # Action words indicate action intent
-        action_words = ["đăng ký", "nộp", "làm", "thực hiện", "liên hệ"]
-        if any(word in query for word in action_words):
+        if not matched.isdisjoint(self._intent_words["action"]):
             return "action_seeking"
 
         # Comparison words
-        comparison_words = ["so với", "khác", "giống", "tương tự", "hơn"]
-        if any(word in query for word in comparison_words):
+        if not matched.isdisjoint(self._intent_words["comparison"]):
             return "comparison"
 
         # Follow-up indicators
-        if context_messages and any(
-            word in query for word in self.context_keywords["follow_up"]
-        ):
+        if context_messages and not matched.isdisjoint(self._context_words["follow_up"]):
             return "follow_up"
 
         return "information_seeking"
 
-    def _requires_context(
-        self, query: str, context_messages: List[Dict[str, Any]] = None
-    ) -> bool:
+    def _requires_context(self, matched: Set[str], word_count: int) -> bool:
         """Determine if the query requires conversation context"""
 
         # Short queries often need context
-        if len(query.split()) <= 3:
+        if word_count <= 3:
             return True
 
         # Pronouns indicate context dependency
-        pronouns = ["nó", "đó", "này", "kia", "đấy", "ấy"]
-        if any(pronoun in query for pronoun in pronouns):
+        if not matched.isdisjoint(self._pronouns):
             return True
 
-        # Follow-up keywords
-        if any(word in query for word in self.context_keywords["follow_up"]):
-            return True
-
-        # Clarification requests
-        if any(word in query for word in self.context_keywords["clarification"]):
-            return True
-
-        return False
+        # Follow-up keywords and clarification requests
+        return not (
+            matched.isdisjoint(self._context_words["follow_up"])
+            and matched.isdisjoint(self._context_words["clarification"])
+        )
 
-    def _get_context_type(self, query: str) -> Optional[str]:
+    def _get_context_type(self, matched: Set[str]) -> Optional[str]:
         """Determine what type of context is needed"""
 
-        if any(word in query for word in self.context_keywords["follow_up"]):
-            return "follow_up"
-
-        if any(word in query for word in self.context_keywords["clarification"]):
-            return "clarification"
-
-        if any(word in query for word in self.context_keywords["comparison"]):
-            return "comparison"
+        for context_type in ("follow_up", "clarification", "comparison"):
+            if not matched.isdisjoint(self._context_words[context_type]):
+                return context_type
 
         return None
 
     def _determine_complexity(
-        self, query: str, context_messages: List[Dict[str, Any]] = None
+        self, query: str, matched: Set[str], word_count: int, keywords: List[str]
     ) -> str:
         """Determine query complexity"""
 
-        word_count = len(query.split())
-
         # Multiple questions or conditions
-        if "và" in query or "hoặc" in query or "?" in query:
+        if not matched.isdisjoint(self._conjunctions) or "?" in query:
             return "complex"
 
         # Long queries
@@ -312,7 +391,7 @@ class QueryAnalyzer:
             return "complex"
 
         # Medium length with specific terms
-        if word_count > 8 and len(self._extract_keywords(query)) > 2:
+        if word_count > 8 and len(keywords) > 2:
             return "medium"
 
         return "simple"
@@ -0,0 +1,141 @@
+"""
+Standalone search queries for follow-up questions.
+
+"còn ngành luật thì sao?" or "học phí của nó bao nhiêu?" only make sense
+next to earlier turns. Instead of embedding the transcript, the rewriter
+keeps the question's own words, drops the references and filler, and adds
+back the program, topic and year the conversation was last about. Entities
+are extracted once per message text and cached, so each turn only scans
+the new question.
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from core.query_analyzer import QueryAnalyzer
+
+ENTITY_CACHE_SIZE = 4096
+
+TOPIC_TYPES = (
+    "fees_scholarships",
+    "admission_process",
+    "facilities_campus",
+    "career_prospects",
+)
+# Program keywords that name no particular program
+GENERIC_PROGRAM_WORDS = {"ngành", "chuyên ngành", "khoa", "bằng cử nhân", "bằng thạc sĩ"}
+
+_REFERENCE = re.compile(
+    r"\b(?:chuyên ngành|ngành|trường)\s+(?:này|đó|kia|ấy|đấy)\b", re.IGNORECASE
+)
+_FILLER = re.compile(
+    r"\b(?:còn|thì sao|vậy|nó|đó|này|kia|đấy|ấy|ạ|nhé|nữa)\b", re.IGNORECASE
+)
+# Capitalised names after "ngành": "ngành Điều dưỡng", "ngành CNTT"
+_NAMED_PROGRAM = re.compile(r"\bngành\s+(\w+(?:\s+\w+){0,3})")
+_YEAR = re.compile(r"\b20\d{2}\b")
+
+
+@dataclass(frozen=True)
+class Entities:
+    """Entities of one message, each in order of appearance"""
+
+    programs: Tuple[str, ...] = ()
+    topics: Tuple[str, ...] = ()
+    years: Tuple[str, ...] = ()
+
+
+class QueryRewriter:
+    """Rewrite context-dependent questions into short standalone search queries"""
+
+    def __init__(self, query_analyzer: QueryAnalyzer = None):
+        self.query_analyzer = query_analyzer or QueryAnalyzer()
+        self.extract_entities = lru_cache(maxsize=ENTITY_CACHE_SIZE)(
+            self._extract_entities
+        )
+
+    def _extract_entities(self, text: str) -> Entities:
+        lowered = text.lower()
+
+        def by_position(terms):
+            return tuple(
+                sorted(set(terms), key=lambda term: (lowered.find(term), -len(term)))
+            )
+
+        programs = [
+            term
+            for term in self.query_analyzer.match_keywords(text, ["specific_program"])
+            if term not in GENERIC_PROGRAM_WORDS
+        ]
+        for match in _NAMED_PROGRAM.finditer(text):
+            words = []
+            for word in match.group(1).split():
+                if not word[0].isupper():
+                    break
+                words.append(word)
+            name = " ".join(words).lower()
+            # "ngành Du lịch" is already matched as "du lịch", not "du"
+            if name and not any(name in program for program in programs):
+                programs.append(name)
+        return Entities(
+            programs=by_position(programs),
+            topics=by_position(self.query_analyzer.match_keywords(text, TOPIC_TYPES)),
+            years=by_position(_YEAR.findall(text)),
+        )
+
+    def _recent_entities(
+        self, history: List[Dict[str, Any]], summary: Optional[str]
+    ) -> Dict[str, str]:
+        """The program, topic and year mentioned most recently"""
+        texts = [msg["content"] for msg in reversed(history)]
+        if summary:
+            texts.append(summary)
+
+        recent: Dict[str, str] = {}
+        for text in texts:
+            entities = self.extract_entities(text)
+            for field in ("programs", "topics", "years"):
+                values = getattr(entities, field)
+                if values and field not in recent:
+                    recent[field] = values[0]
+            if len(recent) == 3:
+                break
+        return recent
+
+    def rewrite(
+        self,
+        query: str,
+        context_messages: Optional[List[Dict[str, Any]]] = None,
+        summary: Optional[str] = None,
+    ) -> str:
+        """Search query for `query` given the turns (and summary) before it"""
+        history = list(context_messages or [])
+        if history and history[-1]["content"].strip() == query.strip():
+            history.pop()  # the current question itself
+        if not history and not summary:
+            return query
+
+        current = self.extract_entities(query)
+        recent = self._recent_entities(history, summary)
+
+        core = _FILLER.sub(" ", _REFERENCE.sub(" ", query))
+        core = " ".join(core.replace("?", " ").split())
+        parts = []
+        if not current.topics and "topics" in recent:
+            parts.append(recent["topics"])
+        if core:
+            parts.append(core)
+        if not current.programs and "programs" in recent:
+            parts.append(f"ngành {recent['programs']}")
+        if not current.years and "years" in recent:
+            parts.append(recent["years"])
+
+        rewritten = " ".join(parts)
+        if not rewritten:
+            return query
+        logger.debug(f"Rewrote query '{query}' -> '{rewritten}'")
+        return rewritten
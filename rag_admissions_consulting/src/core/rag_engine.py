@@ -1,16 +1,30 @@
 from typing import List, Dict, Any, AsyncGenerator, Optional
-from langchain.chains import create_retrieval_chain
-from langchain.chains.combine_documents import create_stuff_documents_chain
-from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.documents import Document
+from langchain_core.output_parsers import StrOutputParser
 from loguru import logger
+from concurrent.futures import ThreadPoolExecutor
 import asyncio
+import time
 
 from infrastructure.llms import LLms
 from infrastructure.store import store
 from infrastructure.embeddings import embeddings
+from infrastructure.bm25_index import bm25_index
 from shared.enum import ModelType
+from config.settings import settings
+from core.answer_cache import answer_cache
 from core.prompt_engine import PromptEngine
-from core.query_analyzer import QueryAnalyzer
+from core.query_analyzer import CATEGORY_FIELD, CATEGORY_TAGS, QueryAnalyzer
+from core.query_rewriter import QueryRewriter
+from core.intent_classifier import IntentClassifier
+from core.reranker import create_reranker
+from core.tracing import tracer
+from core.conversation_summarizer import ConversationSummarizer
+from core.context_assembler import (
+    ContextAssembler,
+    TokenCounter,
+    tokenizer_from_embeddings,
+)
 
 
 class RagEngine:
@@ -23,14 +37,41 @@ class RagEngine:
         llm_model=None,
         query_analyzer=None,
         prompt_engine=None,
+        intent_classifier=None,
+        keyword_index=None,
+        reranker=None,
+        context_assembler=None,
+        query_rewriter=None,
     ):
         """Initialize RAG engine with optional pre-initialized components"""
         self.llm = llm_model
         self.retriever = None
+        self.answer_chain = None
         self.prompt_engine = prompt_engine or PromptEngine()
         self.query_analyzer = query_analyzer or QueryAnalyzer()
+        self.query_rewriter = query_rewriter or (
+            QueryRewriter(self.query_analyzer)
+            if settings.chat.query_rewrite_enabled
+            else None
+        )
+        self.intent_classifier = intent_classifier
+        self.reranker = reranker
+        self.context_assembler = context_assembler
+        self.conversation_summarizer = None
         self.embedding_model = embedding_model
         self.vector_store = vector_store
+        self.docsearch = None
+        self.answer_cache = answer_cache if settings.answer_cache.enabled else None
+        self.keyword_index = keyword_index or (
+            bm25_index if settings.hybrid_search.enabled else None
+        )
+
+        # Query embedding is CPU-bound; keep it off the event loop but bounded
+        # so concurrent chats cannot oversubscribe the cores torch is using
+        self._embedding_executor = ThreadPoolExecutor(
+            max_workers=settings.embedding.executor_workers,
+            thread_name_prefix="query-embedding",
+        )
 
         if not self._components_provided():
             self._initialize_components()
@@ -52,6 +93,9 @@ class RagEngine:
 
             # Setup retriever with provided components
             self.retriever = self.vector_store.getRetriever(self.embedding_model)
+            self.docsearch = getattr(self.retriever, "vectorstore", None)
+            self.answer_chain = self._create_answer_chain()
+            self._setup_conversation_context()
 
             logger.info("RAG engine setup completed with pre-initialized components")
 
@@ -76,7 +120,22 @@ class RagEngine:
             if self.vector_store is None:
                 self.vector_store = store
 
+            if self.intent_classifier is None and settings.intent.enabled:
+                try:
+                    self.intent_classifier = IntentClassifier(self.embedding_model).build()
+                except Exception as e:
+                    logger.warning(f"Intent classifier unavailable, using keywords only: {e}")
+
+            if self.reranker is None and settings.rerank.enabled:
+                try:
+                    self.reranker = create_reranker().load()
+                except Exception as e:
+                    logger.warning(f"Reranker unavailable, keeping retrieval order: {e}")
+
             self.retriever = self.vector_store.getRetriever(self.embedding_model)
+            self.docsearch = getattr(self.retriever, "vectorstore", None)
+            self.answer_chain = self._create_answer_chain()
+            self._setup_conversation_context()
 
             logger.info("RAG engine components initialized successfully")
 
@@ -84,116 +143,333 @@ class RagEngine:
             logger.error(f"Error initializing RAG engine: {e}")
             raise
 
+    def _setup_conversation_context(self):
+        """Prompt token budgeting (with the embedding model's tokenizer when it
+        has one) and rolling summaries of long conversations"""
+        if self.context_assembler is None:
+            tokenizer = tokenizer_from_embeddings(self.embedding_model)
+            if tokenizer is None:
+                logger.warning("No local tokenizer found, estimating prompt tokens")
+            self.context_assembler = ContextAssembler(TokenCounter(tokenizer))
+        if settings.chat.summary_enabled:
+            self.conversation_summarizer = ConversationSummarizer(self.llm)
+
     async def generate_response_stream(
         self,
         query: str,
         original_query: str,
         context_messages: List[Dict[str, Any]] = None,
+        conversation_summary: str = None,
     ) -> AsyncGenerator[str, None]:
         """Generate streaming response with intelligent context awareness"""
 
         try:
             # Analyze query intent and type
-            query_analysis = await self.query_analyzer.analyze_query(
-                original_query, context_messages
-            )
+            with tracer.span("query_analysis"):
+                query_analysis = await self.query_analyzer.analyze_query(
+                    original_query, context_messages
+                )
+
+            # Follow-ups are searched as a short standalone question
+            if self.query_rewriter is not None and query_analysis.get(
+                "requires_context"
+            ):
+                with tracer.span("query_rewrite"):
+                    query = self.query_rewriter.rewrite(
+                        query, context_messages, conversation_summary
+                    )
+
+            # One embedding of the retrieval query serves intent routing and search
+            query_embedding = None
+            if self.docsearch is not None:
+                with tracer.span("embedding"):
+                    query_embedding = await self._aembed_query(query)
+                with tracer.span("intent_classification"):
+                    self._apply_intent_classification(query_analysis, query_embedding)
+
+            # Serve repeated standalone questions straight from the answer cache
+            cache_embedding = None
+            if self._is_cacheable(query_analysis, context_messages):
+                with tracer.span("answer_cache"):
+                    cache_embedding = (
+                        query_embedding
+                        if query == original_query
+                        else await self._aembed_query(original_query)
+                    )
+                    cached_answer = self.answer_cache.lookup(cache_embedding)
+                if cached_answer is not None:
+                    for token in self.answer_cache.replay_tokens(cached_answer):
+                        yield token
+                    return
 
             # Get relevant documents with enhanced retrieval
-            relevant_docs = await self._enhanced_retrieval(query, query_analysis)
-
-            # Create context-aware prompt
-            prompt = self.prompt_engine.create_context_aware_prompt(
-                query=original_query,
-                enhanced_query=query,
-                context_messages=context_messages,
-                query_analysis=query_analysis,
-                relevant_docs=relevant_docs,
-            )
-
-            # Create RAG chain
-            rag_chain = self._create_rag_chain(prompt)
+            with tracer.span("retrieval"):
+                relevant_docs = await self._enhanced_retrieval(
+                    query, query_analysis, query_embedding=query_embedding
+                )
+
+            with tracer.span("prompt_build"):
+                # Keep the prompt within its token budget: system prompt first,
+                # then the top documents, then the most recent distinct turns
+                assembled = self.context_assembler.assemble(
+                    original_query,
+                    relevant_docs,
+                    context_messages,
+                    reserved_tokens=self.prompt_engine.count_prompt_tokens(
+                        query_analysis, self.context_assembler.counter
+                    )
+                    + self.context_assembler.counter.count(conversation_summary),
+                )
+
+                # Fill the precompiled context-aware prompt with the documents we
+                # already retrieved so the LLM call never triggers a second
+                # embedding + vector search
+                prompt_messages = self.prompt_engine.format_context_aware_messages(
+                    query=original_query,
+                    context=self._format_documents(assembled.documents),
+                    context_messages=assembled.messages,
+                    query_analysis=query_analysis,
+                    conversation_summary=conversation_summary,
+                )
 
             logger.info(
                 f"Generating response for query type: {query_analysis.get('type', 'general')}"
             )
 
-            # Stream response
+            # Stream response; spans cannot wrap a yield, so time it by hand
             response_tokens = []
-            async for token in rag_chain.astream(
-                {
-                    "input": original_query,
-                    "context": self._format_documents(relevant_docs),
-                    "chat_history": self._format_chat_history(context_messages or []),
-                }
-            ):
-                if "answer" in token:
-                    response_tokens.append(token["answer"])
-                    yield token["answer"]
+            llm_started = time.perf_counter()
+            async for token in self.answer_chain.astream(prompt_messages):
+                if token:
+                    if not response_tokens:
+                        tracer.observe_stage(
+                            "llm_first_token", time.perf_counter() - llm_started
+                        )
+                    response_tokens.append(token)
+                    yield token
+            tracer.observe_stage("llm_stream", time.perf_counter() - llm_started)
 
             logger.info(
                 f"Response generation completed. Tokens: {len(response_tokens)}"
             )
 
+            if cache_embedding is not None and relevant_docs and response_tokens:
+                self.answer_cache.store(
+                    original_query,
+                    cache_embedding,
+                    "".join(response_tokens),
+                    {
+                        doc.metadata["data_source_id"]
+                        for doc in relevant_docs
+                        if doc.metadata.get("data_source_id")
+                    },
+                )
+
         except Exception as e:
+            # The caller answers with the apology and labels the request "error"
             logger.error(f"Error in generate_response_stream: {e}")
-            error_message = (
-                "Xin lỗi, tôi đang gặp sự cố kỹ thuật. Vui lòng thử lại sau."
-            )
-            yield error_message
+            raise
+
+    def _is_cacheable(
+        self, query_analysis: Dict[str, Any], context_messages: List[Dict[str, Any]]
+    ) -> bool:
+        """Only standalone questions have answers that do not depend on history"""
+        if self.answer_cache is None or self.docsearch is None:
+            return False
+        # context_messages already contains the current user message
+        is_first_turn = not context_messages or len(context_messages) <= 1
+        return is_first_turn or not query_analysis.get("requires_context")
+
+    def _apply_intent_classification(
+        self, query_analysis: Dict[str, Any], query_embedding: List[float]
+    ):
+        """Route by nearest intent centroid when it is confident, else keep keywords"""
+        if self.intent_classifier is None:
+            return
+        result = self.intent_classifier.classify(query_embedding)
+        if result is None:
+            return
+        query_analysis["keyword_type"] = query_analysis.get("type")
+        query_analysis["type"] = result["type"]
+        query_analysis["intent_similarity"] = result["similarity"]
+        logger.debug(
+            f"Intent classifier: {result['type']} ({result['similarity']:.3f}), "
+            f"keywords: {query_analysis['keyword_type']}"
+        )
+
+    async def _aembed_query(self, text: str) -> List[float]:
+        """Embed text on the bounded embedding executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._embedding_executor, self.embedding_model.embed_query, text
+        )
 
     async def _enhanced_retrieval(
-        self, query: str, query_analysis: Dict[str, Any]
+        self,
+        query: str,
+        query_analysis: Dict[str, Any],
+        query_embedding: Optional[List[float]] = None,
     ) -> List[Any]:
         """Enhanced document retrieval based on query analysis"""
         try:
-            # Get base relevant documents
-            docs = self.retriever.get_relevant_documents(query)
+            # Get relevant documents without blocking the event loop, searching
+            # only the query's category when it has one
+            docs = await self._aretrieve_documents(
+                query, query_embedding, self._category_filter(query_analysis)
+            )
+
+            # Reorder candidates by relevance within the latency budget
+            if self.reranker is not None:
+                with tracer.span("rerank"):
+                    docs = await self.reranker.rerank(query, docs)
 
             # Log retrieval results
             logger.info(f"Retrieved {len(docs)} documents for query")
             for i, doc in enumerate(docs[:3]):  # Log first 3 docs
                 logger.debug(f"Doc {i+1}: {doc.page_content[:100]}...")
 
-            # Apply query-specific filtering and ranking
-            if query_analysis.get("type") == "specific_program":
-                docs = self._filter_program_specific_docs(docs, query_analysis)
-            elif query_analysis.get("type") == "admission_process":
-                docs = self._filter_admission_process_docs(docs, query_analysis)
-            elif query_analysis.get("type") == "fees_scholarships":
-                docs = self._filter_financial_docs(docs, query_analysis)
-
             return docs[:5]  # Return top 5 most relevant
 
         except Exception as e:
             logger.error(f"Error in enhanced retrieval: {e}")
             return []
 
-    def _filter_program_specific_docs(
-        self, docs: List[Any], query_analysis: Dict[str, Any]
+    def _category_filter(
+        self, query_analysis: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Metadata filter restricting the search to the query's category"""
+        if not settings.vector_store.category_filter_enabled:
+            return None
+        tag = CATEGORY_TAGS.get(query_analysis.get("type"))
+        if tag is None:
+            return None
+        return {CATEGORY_FIELD: {"$in": [tag]}}
+
+    async def _aretrieve_documents(
+        self,
+        query: str,
+        query_embedding: Optional[List[float]] = None,
+        metadata_filter: Optional[Dict[str, Any]] = None,
     ) -> List[Any]:
-        """Filter documents for program-specific queries"""
-        # Implement program-specific filtering logic
+        """Dense search (embedding in the bounded executor) fused with BM25
+
+        A filtered search that finds too few chunks (category untagged or
+        mis-tagged) is topped up with unfiltered results.
+        """
+        if self.docsearch is None:
+            # Fallback retrievers (e.g. EmptyRetriever) only expose the runnable API
+            with tracer.span("vector_search"):
+                dense_docs = await self.retriever.ainvoke(query)
+        else:
+            if query_embedding is None:
+                with tracer.span("embedding"):
+                    query_embedding = await self._aembed_query(query)
+            with tracer.span("vector_search"):
+                dense_docs = await self._asearch_by_vector(
+                    query_embedding, metadata_filter
+                )
+                if metadata_filter and self._needs_top_up(dense_docs, metadata_filter):
+                    dense_docs = self._merge_unique(
+                        dense_docs, await self._asearch_by_vector(query_embedding)
+                    )
+
+        if self.keyword_index is None:
+            return dense_docs
+
+        # In-memory keyword search: cheap enough to run on the event loop
+        with tracer.span("keyword_search"):
+            keyword_docs = self._keyword_search(query, metadata_filter)
+            if metadata_filter and self._needs_top_up(keyword_docs, metadata_filter):
+                keyword_docs = self._merge_unique(
+                    keyword_docs, self._keyword_search(query)
+                )
+        return self._reciprocal_rank_fusion([dense_docs, keyword_docs])
+
+    @staticmethod
+    def _needs_top_up(docs: List[Any], metadata_filter: Dict[str, Any]) -> bool:
+        if len(docs) >= settings.vector_store.category_filter_min_docs:
+            return False
+        logger.debug(
+            f"Category filter {metadata_filter} matched {len(docs)} documents, "
+            f"adding unfiltered results"
+        )
+        return True
+
+    @staticmethod
+    def _merge_unique(docs: List[Any], extra_docs: List[Any]) -> List[Any]:
+        """Append `extra_docs` that are not already in `docs`"""
+        seen = {doc.page_content for doc in docs}
+        merged = list(docs)
+        for doc in extra_docs:
+            if doc.page_content not in seen:
+                seen.add(doc.page_content)
+                merged.append(doc)
+        return merged
+
+    def _keyword_search(
+        self, query: str, metadata_filter: Optional[Dict[str, Any]] = None
+    ) -> List[Document]:
+        """BM25 results as documents shaped like the vector store's"""
+        try:
+            hits = self.keyword_index.search(
+                query, settings.hybrid_search.top_k, metadata_filter
+            )
+        except Exception as e:
+            logger.warning(f"Keyword search failed, using vector results only: {e}")
+            return []
+        docs = []
+        for doc_id, _ in hits:
+            entry = self.keyword_index.get(doc_id)
+            if entry is None:  # deleted since the search
+                continue
+            text, metadata = entry
+            docs.append(Document(page_content=text, metadata=dict(metadata), id=doc_id))
         return docs
 
-    def _filter_admission_process_docs(
-        self, docs: List[Any], query_analysis: Dict[str, Any]
+    @staticmethod
+    def _reciprocal_rank_fusion(rankings: List[List[Any]]) -> List[Any]:
+        """Order documents by the sum of 1 / (rrf_k + rank) over the rankings"""
+        rrf_k = settings.hybrid_search.rrf_k
+        scores: Dict[str, float] = {}
+        docs: Dict[str, Any] = {}
+        for ranking in rankings:
+            for rank, doc in enumerate(ranking, start=1):
+                docs.setdefault(doc.page_content, doc)
+                scores[doc.page_content] = scores.get(doc.page_content, 0.0) + 1.0 / (
+                    rrf_k + rank
+                )
+        # Stable sort: ties keep dense-first order
+        return [docs[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+    async def _asearch_by_vector(
+        self,
+        query_embedding: List[float],
+        metadata_filter: Optional[Dict[str, Any]] = None,
     ) -> List[Any]:
-        """Filter documents for admission process queries"""
-        # Implement admission process filtering logic
-        return docs
+        """Run the configured vector search for a precomputed query embedding"""
+        search_kwargs = dict(self.vector_store.search_kwargs)
+        k = search_kwargs.pop("k", settings.vector_store.top_k)
+        if metadata_filter:
+            search_kwargs["filter"] = metadata_filter
+
+        if self.vector_store.search_type == "mmr":
+            return await self.docsearch.amax_marginal_relevance_search_by_vector(
+                query_embedding, k=k, **search_kwargs
+            )
 
-    def _filter_financial_docs(
-        self, docs: List[Any], query_analysis: Dict[str, Any]
-    ) -> List[Any]:
-        """Filter documents for financial information queries"""
-        # Implement financial information filtering logic
-        return docs
+        search_kwargs.pop("fetch_k", None)
+        search_kwargs.pop("lambda_mult", None)
+        return await self.docsearch.asimilarity_search_by_vector(
+            query_embedding, k=k, **search_kwargs
+        )
 
-    def _create_rag_chain(self, prompt: ChatPromptTemplate):
-        """Create RAG chain with the given prompt"""
-        question_answer_chain = create_stuff_documents_chain(self.llm, prompt)
-        rag_chain = create_retrieval_chain(self.retriever, question_answer_chain)
-        return rag_chain
+    def _create_answer_chain(self):
+        """Create the LLM chain shared by every request.
+
+        Retrieval happens once in `_enhanced_retrieval`, so the chain only
+        needs to turn already-formatted prompt messages into text tokens.
+        """
+        return self.llm | StrOutputParser()
 
     def _format_documents(self, docs: List[Any]) -> str:
         """Format retrieved documents for context"""
@@ -212,13 +488,3 @@ class RagEngine:
             formatted_docs.append(doc_info)
 
         return "\n\n".join(formatted_docs)
-
-    def _format_chat_history(
-        self, context_messages: List[Dict[str, Any]]
-    ) -> List[tuple]:
-        """Format chat history for the RAG chain"""
-        formatted_history = []
-        for msg in context_messages:
-            role = "human" if msg["role"] == "USER" else "assistant"
-            formatted_history.append((role, msg["content"]))
-        return formatted_history
@@ -0,0 +1,206 @@
+"""
+Rerank stage for retrieved candidates.
+
+Scores (query, chunk) pairs with either a vectorised lexical-overlap
+scorer or a small CPU cross-encoder. Requests arriving within a short
+window are scored together in one batch on a single worker thread, and
+each request waits at most its time budget: past it the candidates keep
+their retrieval (MMR / rank fusion) order and the late work is dropped.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+
+from config.settings import settings
+from infrastructure.bm25_index import tokenize
+
+
+class LexicalOverlapScorer:
+    """IDF-weighted share of query terms (syllables and bigrams) found in the chunk"""
+
+    def load(self):
+        pass
+
+    def score(
+        self, pairs: Sequence[Tuple[str, str]], segments: Sequence[int] = None
+    ) -> np.ndarray:
+        """`segments` are the pair counts of each request in a shared batch"""
+        vocabulary = {}
+        query_terms = []
+        for query, _ in pairs:
+            terms = {vocabulary.setdefault(t, len(vocabulary)) for t in tokenize(query)}
+            query_terms.append(list(terms))
+        if not vocabulary:
+            return np.zeros(len(pairs), dtype=np.float32)
+
+        queries = np.zeros((len(pairs), len(vocabulary)), dtype=np.float32)
+        chunks = np.zeros((len(pairs), len(vocabulary)), dtype=np.float32)
+        for row, ((_, text), terms) in enumerate(zip(pairs, query_terms)):
+            queries[row, terms] = 1.0
+            present = [vocabulary[t] for t in set(tokenize(text)) if t in vocabulary]
+            chunks[row, present] = 1.0
+
+        # Terms found in fewer of a request's own candidates are more
+        # discriminative; other requests in the batch must not shift the weights
+        weights = np.zeros_like(chunks)
+        offset = 0
+        for size in segments or [len(pairs)]:
+            rows = slice(offset, offset + size)
+            document_frequency = chunks[rows].sum(axis=0)
+            weights[rows] = np.log1p(size / (1.0 + document_frequency))
+            offset += size
+        matched = (queries * chunks * weights).sum(axis=1)
+        total = (queries * weights).sum(axis=1)
+        return np.divide(matched, total, out=np.zeros_like(matched), where=total > 0)
+
+
+class CrossEncoderScorer:
+    """sentence-transformers CrossEncoder on CPU"""
+
+    def __init__(self, model_name: str = None, max_length: int = 256):
+        self.model_name = model_name or settings.rerank.model
+        self.max_length = max_length
+        self.model = None
+
+    def load(self):
+        if self.model is None:
+            from sentence_transformers import CrossEncoder
+
+            self.model = CrossEncoder(
+                self.model_name, max_length=self.max_length, device="cpu"
+            )
+            logger.info(f"Loaded rerank cross-encoder {self.model_name}")
+
+    def score(
+        self, pairs: Sequence[Tuple[str, str]], segments: Sequence[int] = None
+    ) -> np.ndarray:
+        # Pairs are scored independently, so request boundaries do not matter
+        self.load()
+        return np.asarray(
+            self.model.predict(list(pairs), batch_size=len(pairs), show_progress_bar=False),
+            dtype=np.float32,
+        )
+
+
+class Reranker:
+    """Batched, time-boxed reranking of retrieved documents"""
+
+    def __init__(
+        self,
+        scorer,
+        budget_ms: float = None,
+        batch_window_ms: float = None,
+        max_batch_pairs: int = None,
+    ):
+        config = settings.rerank
+        self.scorer = scorer
+        self.budget = (config.budget_ms if budget_ms is None else budget_ms) / 1000
+        self.batch_window = (
+            config.batch_window_ms if batch_window_ms is None else batch_window_ms
+        ) / 1000
+        self.max_batch_pairs = max_batch_pairs or config.max_batch_pairs
+        # One scoring thread: concurrent requests share batches instead of cores
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"reranked": 0, "timeouts": 0, "errors": 0, "batches": 0}
+
+    def load(self) -> "Reranker":
+        """Load the scoring model up front so the first request is not slow"""
+        self.scorer.load()
+        return self
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._batch_loop())
+
+    async def rerank(self, query: str, docs: List[Any]) -> List[Any]:
+        """Documents reordered by relevance, or unchanged if over budget"""
+        if len(docs) < 2:
+            return docs
+        self._ensure_started()
+        future = self._loop.create_future()
+        self._queue.put_nowait((query, docs, future))
+        try:
+            scores = await asyncio.wait_for(asyncio.shield(future), self.budget)
+        except asyncio.TimeoutError:
+            future.cancel()  # the batch loop skips it if not started yet
+            self.stats["timeouts"] += 1
+            logger.warning(
+                f"Rerank exceeded {self.budget * 1000:.0f}ms budget, keeping retrieval order"
+            )
+            return docs
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Rerank failed, keeping retrieval order: {e}")
+            return docs
+
+        self.stats["reranked"] += 1
+        return [docs[i] for i in np.argsort(-scores, kind="stable")]
+
+    async def _next_batch(self) -> List[Tuple[str, List[Any], asyncio.Future]]:
+        """First waiting request plus whatever arrives within the batch window"""
+        batch = [await self._queue.get()]
+        pairs = len(batch[0][1])
+        deadline = self._loop.time() + self.batch_window
+        while pairs < self.max_batch_pairs:
+            if self._queue.empty():
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                item = self._queue.get_nowait()
+            batch.append(item)
+            pairs += len(item[1])
+        # Requests that already gave up are not worth scoring
+        return [item for item in batch if not item[2].done()]
+
+    async def _batch_loop(self):
+        while True:
+            batch = await self._next_batch()
+            if not batch:
+                continue
+            pairs = [(query, doc.page_content) for query, docs, _ in batch for doc in docs]
+            segments = [len(docs) for _, docs, _ in batch]
+            try:
+                scores = await self._loop.run_in_executor(
+                    self._executor, self.scorer.score, pairs, segments
+                )
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.stats["batches"] += 1
+            offset = 0
+            for _, docs, future in batch:
+                if not future.done():
+                    future.set_result(scores[offset : offset + len(docs)])
+                offset += len(docs)
+
+
+def create_reranker() -> Optional[Reranker]:
+    """Reranker configured by RERANK_*, or None when disabled"""
+    config = settings.rerank
+    if not config.enabled:
+        return None
+    if config.scorer == "cross_encoder":
+        scorer = CrossEncoderScorer(config.model)
+    elif config.scorer == "lexical":
+        scorer = LexicalOverlapScorer()
+    else:
+        raise ValueError(f"Unknown rerank scorer: {config.scorer}")
+    return Reranker(scorer)
@@ -0,0 +1,183 @@
+"""
+Latency tracing for the chat path.
+
+Per-stage spans (query analysis, embedding, vector / keyword search,
+rerank, prompt building, the LLM's first token and the full stream),
+time to first token, output tokens per second and total request latency
+(labelled ok / error / cancelled) are kept as histograms and rendered in the Prometheus text format on
+/metrics. With TRACING_ENABLED=false every span is one shared no-op
+object and nothing is timed.
+"""
+
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from typing import Dict, List, Sequence, Tuple
+
+from config.settings import settings
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+TOKEN_RATE_BUCKETS = (5, 10, 20, 40, 80, 160, 320, 640)
+
+_NOOP_SPAN = nullcontext()
+
+
+class Histogram:
+    """Prometheus-style histogram with optional labels"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+        labelnames: Tuple[str, ...] = (),
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.labelnames = labelnames
+        # label values -> [per-bucket counts (+Inf last), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labelvalues: str):
+        series = self._series.get(labelvalues)
+        if series is None:
+            series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def count(self, *labelvalues: str) -> int:
+        series = self._series.get(labelvalues)
+        return sum(series[0]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for labelvalues, (counts, total) in sorted(self._series.items()):
+            labels = [
+                f'{name}="{value}"' for name, value in zip(self.labelnames, labelvalues)
+            ]
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                bucket_labels = ",".join(labels + [f'le="{le}"'])
+                lines.append(f"{self.name}_bucket{{{bucket_labels}}} {cumulative}")
+            suffix = f"{{{','.join(labels)}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {total}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+class _Span:
+    __slots__ = ("tracer", "stage", "started")
+
+    def __init__(self, tracer: "Tracer", stage: str):
+        self.tracer = tracer
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.tracer.stage_seconds.observe(time.perf_counter() - self.started, self.stage)
+        return False
+
+
+class RequestTrace:
+    """Timing of one chat request: first token, output rate and total latency"""
+
+    __slots__ = ("tracer", "started", "first_token_at")
+
+    def __init__(self, tracer: "Tracer"):
+        self.tracer = tracer
+        self.started = time.perf_counter()
+        self.first_token_at = None
+
+    def token(self):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+            self.tracer.time_to_first_token.observe(self.first_token_at - self.started)
+
+    def finish(self, output: str = "", counter=None, status: str = "ok"):
+        """End of the reply; `counter` (a TokenCounter) sizes `output` in tokens
+
+        Only completed replies feed the token rate: a failed or cancelled
+        stream stops early and would skew it.
+        """
+        finished = time.perf_counter()
+        self.tracer.request_seconds.observe(finished - self.started, status)
+        streaming = finished - (self.first_token_at or finished)
+        if status == "ok" and output and counter is not None and streaming > 0:
+            self.tracer.tokens_per_second.observe(counter.count(output) / streaming)
+
+
+class _NoopRequestTrace:
+    __slots__ = ()
+
+    def token(self):
+        pass
+
+    def finish(self, output: str = "", counter=None, status: str = "ok"):
+        pass
+
+
+_NOOP_REQUEST = _NoopRequestTrace()
+
+
+class Tracer:
+    """Process-wide latency histograms for the chat path"""
+
+    def __init__(self, enabled: bool = None):
+        self.enabled = settings.tracing.enabled if enabled is None else enabled
+        self.stage_seconds = Histogram(
+            "rag_stage_duration_seconds",
+            "Duration of each chat pipeline stage",
+            labelnames=("stage",),
+        )
+        self.time_to_first_token = Histogram(
+            "rag_time_to_first_token_seconds",
+            "Time from receiving a message to streaming the first token",
+        )
+        self.request_seconds = Histogram(
+            "rag_request_duration_seconds",
+            "Time from receiving a message to the end of the reply",
+            labelnames=("status",),
+        )
+        self.tokens_per_second = Histogram(
+            "rag_output_tokens_per_second",
+            "Reply tokens per second after the first token",
+            buckets=TOKEN_RATE_BUCKETS,
+        )
+
+    def span(self, stage: str):
+        """Context manager timing one stage"""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, stage)
+
+    def observe_stage(self, stage: str, seconds: float):
+        """Record a stage timed by the caller (e.g. across yields)"""
+        if self.enabled:
+            self.stage_seconds.observe(seconds, stage)
+
+    def start_request(self):
+        return RequestTrace(self) if self.enabled else _NOOP_REQUEST
+
+    def render(self) -> str:
+        histograms = (
+            self.stage_seconds,
+            self.time_to_first_token,
+            self.request_seconds,
+            self.tokens_per_second,
+        )
+        return "\n".join(line for h in histograms for line in h.render()) + "\n"
+
+
+# Global instance
+tracer = Tracer()
@@ -7,14 +7,18 @@ from scraper import WebScraper
 
 def main():
     # Initialize the scraper with the base URL
-    scraper = WebScraper("https://donga.edu.vn/tuyensinh")
+    scraper = WebScraper(
+        "https://donga.edu.vn/tuyensinh",
+        "donga_admissions",
+        cache_path="crawl_cache_donga_admissions.json",
+    )
 
     # Scrape admission-related pages
     print("Starting to scrape Donga University admission pages...")
-    results = scraper.scrape_site("/", max_pages=500)
+    scraper.scrape_site(max_pages=500)
 
     # Save the results
-    scraper.save_results(results, "donga_admissions.json")
+    scraper.save_results(os.path.abspath("donga_admissions.json"))
     print("Scraping completed. Results saved to donga_admissions.json")
 
 
@@ -7,11 +7,15 @@ Scrapes website content and saves to JSON format
 import sys
 import os
 import json
+import asyncio
+from collections import deque
+from typing import Optional
+import httpx
 import requests
 from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urldefrag, urljoin, urlparse
+from urllib.robotparser import RobotFileParser
 from loguru import logger
-import time
 import chardet
 
 
@@ -26,25 +30,74 @@ def update_backend_status(data_source_id: str, status: str, error_message: str =
         logger.error(f"Failed to update backend status: {e}")
 
 
+# Crawl politeness defaults
+MAX_CONCURRENCY = 8  # Tổng số request đồng thời
+PER_HOST_CONCURRENCY = 4  # Số request đồng thời tối đa cho mỗi host
+REQUESTS_PER_SECOND = 4.0  # Tốc độ tối đa cho mỗi host
+SKIPPED_EXTENSIONS = (".pdf", ".doc", ".zip", ".jpg", ".png", ".gif")
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Accept-Language": "vi-VN,vi;q=0.9,en;q=0.8",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+    "Upgrade-Insecure-Requests": "1",
+}
+
+
+class HostLimiter:
+    """Giới hạn số request đồng thời và tốc độ request cho một host"""
+
+    def __init__(self, concurrency: int, requests_per_second: float):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.min_interval = 1.0 / requests_per_second if requests_per_second else 0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self.semaphore.acquire()
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            wait = self._next_slot - loop.time()
+            self._next_slot = max(self._next_slot, loop.time()) + self.min_interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.semaphore.release()
+
+
 class WebScraper:
-    def __init__(self, base_url: str, data_source_id: str):
+    def __init__(
+        self,
+        base_url: str,
+        data_source_id: str,
+        max_concurrency: int = MAX_CONCURRENCY,
+        per_host_concurrency: int = PER_HOST_CONCURRENCY,
+        requests_per_second: float = REQUESTS_PER_SECOND,
+        cache_path: str = None,
+        respect_robots: bool = True,
+    ):
         self.base_url = base_url
         self.data_source_id = data_source_id
         self.visited_urls = set()
         self.results = []
 
-        # Setup session with proper headers
+        self.max_concurrency = max_concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.requests_per_second = requests_per_second
+        self.respect_robots = respect_robots
+
+        # ETag/Last-Modified + parsed page per URL, reused on 304 Not Modified
+        self.cache_path = cache_path
+        self.page_cache = self._load_page_cache()
+        self.stats = {"fetched": 0, "not_modified": 0, "failed": 0, "robots_blocked": 0}
+
+        # Setup session with proper headers (synchronous scrape_page)
         self.session = requests.Session()
-        self.session.headers.update(
-            {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-                "Accept-Language": "vi-VN,vi;q=0.9,en;q=0.8",
-                "Accept-Encoding": "gzip, deflate, br",
-                "Connection": "keep-alive",
-                "Upgrade-Insecure-Requests": "1",
-            }
-        )
+        self.session.headers.update(HEADERS)
 
     def _detect_encoding(self, content: bytes) -> str:
         """Detect content encoding"""
@@ -66,6 +119,115 @@ class WebScraper:
 
         return "utf-8"  # Final fallback
 
+    def _resolve_encoding(self, url: str, declared: str, content: bytes) -> str:
+        """Use the declared charset unless it is missing or the latin1 default"""
+        if declared is None or declared.lower() in ["iso-8859-1", "latin1"]:
+            detected_encoding = self._detect_encoding(content)
+            logger.info(f"Detected encoding for {url}: {detected_encoding}")
+            return detected_encoding
+        logger.info(f"Using response encoding for {url}: {declared}")
+        return declared
+
+    def _is_crawlable(self, url: str) -> bool:
+        """Only crawl internal links that are HTML pages"""
+        return urlparse(url).netloc == urlparse(self.base_url).netloc and not any(
+            ext in url.lower() for ext in SKIPPED_EXTENSIONS
+        )
+
+    def parse_page(self, url: str, content: bytes, encoding: str):
+        """Parse one downloaded page into (page_data, links) with a single soup
+
+        `url` is the final URL after redirects; relative links resolve against it.
+        """
+        soup = BeautifulSoup(content, "html.parser", from_encoding=encoding)
+
+        # Collect links before navigation elements are stripped below
+        links = []
+        for link in soup.find_all("a", href=True):
+            href = link.get("href", "").strip()
+            if not href:
+                continue
+            full_url, _ = urldefrag(urljoin(url, href))
+            if self._is_crawlable(full_url):
+                links.append(full_url)
+
+        # Extract title
+        title = soup.find("title")
+        title_text = title.get_text().strip() if title else ""
+
+        # Extract main content
+        content = []
+
+        # Remove unwanted elements
+        for unwanted in soup(
+            ["script", "style", "nav", "footer", "header", "aside", "noscript"]
+        ):
+            unwanted.decompose()
+
+        # Extract text from content elements
+        content_selectors = [
+            "main",
+            "article",
+            ".content",
+            "#content",
+            ".main-content",
+            ".post-content",
+            ".entry-content",
+            ".page-content",
+        ]
+
+        main_content = None
+        for selector in content_selectors:
+            main_content = soup.select_one(selector)
+            if main_content:
+                break
+
+        # If no main content found, use body
+        if not main_content:
+            main_content = soup.find("body")
+
+        if main_content:
+            # Extract text from paragraphs, headings, and lists
+            for element in main_content.find_all(
+                [
+                    "p",
+                    "h1",
+                    "h2",
+                    "h3",
+                    "h4",
+                    "h5",
+                    "h6",
+                    "li",
+                    "div",
+                    "span",
+                    "td",
+                    "th",
+                ]
+            ):
+                text = element.get_text(separator=" ", strip=True)
+                if text and len(text) > 15:  # Filter out very short text
+                    # Clean up text
+                    text = " ".join(text.split())  # Normalize whitespace
+                    content.append(text)
+
+        # Remove duplicates while preserving order
+        seen = set()
+        unique_content = []
+        for item in content:
+            if item not in seen:
+                seen.add(item)
+                unique_content.append(item)
+
+        result = {
+            "url": url,
+            "title": title_text,
+            "content": unique_content,
+            "encoding": encoding,
+        }
+
+        logger.info(f"Successfully scraped {url} - {len(unique_content)} content blocks")
+        return result, links
+
     def scrape_page(self, url: str) -> dict:
         """Scrape single page with proper encoding handling"""
         try:
@@ -73,170 +235,211 @@ class WebScraper:
             response.raise_for_status()
 
             # Handle encoding properly
-            if response.encoding is None or response.encoding.lower() in [
-                "iso-8859-1",
-                "latin1",
-            ]:
-                # Detect encoding from content
-                detected_encoding = self._detect_encoding(response.content)
-                response.encoding = detected_encoding
-                logger.info(f"Detected encoding for {url}: {detected_encoding}")
-            else:
-                logger.info(f"Using response encoding for {url}: {response.encoding}")
+            encoding = self._resolve_encoding(url, response.encoding, response.content)
+            result, _ = self.parse_page(response.url, response.content, encoding)
+            return result
 
-            # Parse with BeautifulSoup
-            soup = BeautifulSoup(
-                response.content, "html.parser", from_encoding=response.encoding
-            )
+        except requests.RequestException as e:
+            logger.error(f"Request error scraping {url}: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Error scraping {url}: {e}")
+            return None
 
-            # Extract title
-            title = soup.find("title")
-            title_text = title.get_text().strip() if title else ""
+    async def _fetch_page(self, client: httpx.AsyncClient, url: str):
+        """Fetch and parse one page; conditional GET when we have validators"""
+        cached = self.page_cache.get(url)
+        headers = {}
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
 
-            # Extract main content
-            content = []
+        try:
+            async with self._host_limiter(urlparse(url).netloc):
+                response = await client.get(url, headers=headers)
 
-            # Remove unwanted elements
-            for unwanted in soup(
-                ["script", "style", "nav", "footer", "header", "aside", "noscript"]
-            ):
-                unwanted.decompose()
-
-            # Extract text from content elements
-            content_selectors = [
-                "main",
-                "article",
-                ".content",
-                "#content",
-                ".main-content",
-                ".post-content",
-                ".entry-content",
-                ".page-content",
-            ]
-
-            main_content = None
-            for selector in content_selectors:
-                main_content = soup.select_one(selector)
-                if main_content:
-                    break
-
-            # If no main content found, use body
-            if not main_content:
-                main_content = soup.find("body")
+            if response.status_code == 304 and cached:
+                self.stats["not_modified"] += 1
+                logger.info(f"Not modified, reusing cached page: {url}")
+                return cached["page"], cached["links"]
 
-            if main_content:
-                # Extract text from paragraphs, headings, and lists
-                for element in main_content.find_all(
-                    [
-                        "p",
-                        "h1",
-                        "h2",
-                        "h3",
-                        "h4",
-                        "h5",
-                        "h6",
-                        "li",
-                        "div",
-                        "span",
-                        "td",
-                        "th",
-                    ]
-                ):
-                    text = element.get_text(separator=" ", strip=True)
-                    if text and len(text) > 15:  # Filter out very short text
-                        # Clean up text
-                        text = " ".join(text.split())  # Normalize whitespace
-                        content.append(text)
-
-            # Remove duplicates while preserving order
-            seen = set()
-            unique_content = []
-            for item in content:
-                if item not in seen:
-                    seen.add(item)
-                    unique_content.append(item)
-
-            result = {
-                "url": url,
-                "title": title_text,
-                "content": unique_content,
-                "encoding": response.encoding,
-            }
-
-            logger.info(
-                f"Successfully scraped {url} - {len(unique_content)} content blocks"
+            response.raise_for_status()
+            self.stats["fetched"] += 1
+
+            encoding = self._resolve_encoding(
+                url, response.charset_encoding, response.content
+            )
+            # BeautifulSoup parsing is CPU-bound; keep the event loop fetching.
+            # Links resolve against the final URL, not the one we asked for
+            page_data, links = await asyncio.to_thread(
+                self.parse_page, str(response.url), response.content, encoding
             )
-            return result
 
-        except requests.RequestException as e:
+            etag = response.headers.get("etag")
+            last_modified = response.headers.get("last-modified")
+            if etag or last_modified:
+                self.page_cache[url] = {
+                    "etag": etag,
+                    "last_modified": last_modified,
+                    "page": page_data,
+                    "links": links,
+                }
+            return page_data, links
+
+        except httpx.HTTPError as e:
+            self.stats["failed"] += 1
             logger.error(f"Request error scraping {url}: {e}")
-            return None
         except Exception as e:
+            self.stats["failed"] += 1
             logger.error(f"Error scraping {url}: {e}")
-            return None
+        return None, []
 
-    def scrape_site(self, max_pages: int = 1) -> list:
-        """Scrape multiple pages from the site"""
-        to_visit = [self.base_url]
-        scraped_count = 0
+    def _host_limiter(self, host: str) -> HostLimiter:
+        limiter = self._host_limiters.get(host)
+        if limiter is None:
+            limiter = self._host_limiters[host] = HostLimiter(
+                self.per_host_concurrency, self.requests_per_second
+            )
+        return limiter
 
-        while to_visit and scraped_count < max_pages:
-            url = to_visit.pop(0)
+    async def _fetch_robots(
+        self, client: httpx.AsyncClient, origin: str
+    ) -> Optional[RobotFileParser]:
+        """Download and parse robots.txt; None means everything is allowed"""
+        robots_url = f"{origin}/robots.txt"
+        try:
+            async with self._host_limiter(urlparse(origin).netloc):
+                response = await client.get(robots_url)
+        except httpx.HTTPError as e:
+            logger.warning(f"Could not fetch {robots_url}, crawling without it: {e}")
+            return None
+        if response.status_code >= 400:
+            return None
 
-            if url in self.visited_urls:
-                continue
+        parser = RobotFileParser(robots_url)
+        parser.parse(response.text.splitlines())
+        crawl_delay = parser.crawl_delay(HEADERS["User-Agent"])
+        if crawl_delay:
+            host = urlparse(origin).netloc
+            self._host_limiters[host] = HostLimiter(
+                self.per_host_concurrency,
+                min(self.requests_per_second, 1.0 / float(crawl_delay)),
+            )
+            logger.info(f"Honouring Crawl-delay of {crawl_delay}s for {host}")
+        return parser
+
+    async def _robots_allows(self, client: httpx.AsyncClient, url: str) -> bool:
+        """Whether robots.txt of the URL's host lets us fetch it (read once per host)"""
+        if not self.respect_robots:
+            return True
+        parts = urlparse(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        if origin not in self._robots:
+            self._robots[origin] = await self._fetch_robots(client, origin)
+        parser = self._robots[origin]
+        if parser is None or parser.can_fetch(HEADERS["User-Agent"], url):
+            return True
+        self.stats["robots_blocked"] += 1
+        logger.info(f"Disallowed by robots.txt: {url}")
+        return False
+
+    async def scrape_site_async(
+        self,
+        max_pages: int = 1,
+        transport: httpx.AsyncBaseTransport = None,
+        max_depth: int = None,
+    ) -> list:
+        """Crawl the site breadth-first with bounded, per-host rate-limited workers
+
+        `max_depth` limits how many links away from the start page the crawl
+        goes (0 = only the start page, None = unlimited).
+        """
+        start_url, _ = urldefrag(self.base_url)
+        frontier = deque()
+        seen = {start_url}  # Dedupe at enqueue time: O(1) per link
+        in_flight = {}  # task -> (url, depth)
+        self._host_limiters = {}
+        self._robots = {}
+
+        async with httpx.AsyncClient(
+            headers=HEADERS,
+            timeout=15.0,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=self.max_concurrency),
+            transport=transport,
+        ) as client:
+            if await self._robots_allows(client, start_url):
+                frontier.append((start_url, 0))
+
+            while (frontier or in_flight) and len(self.results) < max_pages:
+                # Keep at most max_concurrency pages downloading
+                while (
+                    frontier
+                    and len(in_flight) < self.max_concurrency
+                    and len(self.results) + len(in_flight) < max_pages
+                ):
+                    url, depth = frontier.popleft()
+                    task = asyncio.create_task(self._fetch_page(client, url))
+                    in_flight[task] = (url, depth)
+
+                done, _ = await asyncio.wait(
+                    in_flight, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    url, depth = in_flight.pop(task)
+                    page_data, links = task.result()
+                    self.visited_urls.add(url)
+
+                    if page_data:
+                        # A redirect target is the same page under another URL
+                        seen.add(page_data["url"])
+                    if page_data and page_data.get("content"):
+                        if len(self.results) < max_pages:
+                            self.results.append(page_data)
+                            logger.info(
+                                f"Scraped page {len(self.results)}/{max_pages}: {url}"
+                            )
+
+                    if max_depth is not None and depth >= max_depth:
+                        continue
+                    for link in links:
+                        if link not in seen:
+                            seen.add(link)
+                            if await self._robots_allows(client, link):
+                                frontier.append((link, depth + 1))
+
+            for task in in_flight:
+                task.cancel()
+
+        self._save_page_cache()
+        logger.info(f"Crawl finished: {self.stats}")
+        return self.results
 
-            logger.info(f"Scraping page {scraped_count + 1}/{max_pages}: {url}")
-
-            page_data = self.scrape_page(url)
-            if page_data and page_data.get("content"):
-                self.results.append(page_data)
-                self.visited_urls.add(url)
-                scraped_count += 1
-
-                # Find more links to crawl (simplified)
-                if scraped_count < max_pages:
-                    try:
-                        response = self.session.get(url, timeout=10)
-                        soup = BeautifulSoup(
-                            response.content,
-                            "html.parser",
-                            from_encoding=response.encoding,
-                        )
-
-                        for link in soup.find_all("a", href=True):
-                            href = link.get("href", "").strip()
-                            if not href:
-                                continue
-
-                            full_url = urljoin(url, href)
-
-                            # Only crawl internal links
-                            if (
-                                urlparse(full_url).netloc
-                                == urlparse(self.base_url).netloc
-                                and full_url not in self.visited_urls
-                                and full_url not in to_visit
-                                and not any(
-                                    ext in full_url.lower()
-                                    for ext in [
-                                        ".pdf",
-                                        ".doc",
-                                        ".zip",
-                                        ".jpg",
-                                        ".png",
-                                        ".gif",
-                                    ]
-                                )
-                            ):
-                                to_visit.append(full_url)
-
-                    except Exception as e:
-                        logger.error(f"Error finding links in {url}: {e}")
-
-            time.sleep(1)  # Be respectful to the server
+    def scrape_site(self, max_pages: int = 1, max_depth: int = None) -> list:
+        """Scrape multiple pages from the site"""
+        return asyncio.run(self.scrape_site_async(max_pages, max_depth=max_depth))
 
-        return self.results
+    def _load_page_cache(self) -> dict:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable crawl cache {self.cache_path}: {e}")
+            return {}
+
+    def _save_page_cache(self):
+        if not self.cache_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(self.cache_path, "w", encoding="utf-8") as f:
+                json.dump(self.page_cache, f, ensure_ascii=False)
+        except Exception as e:
+            logger.warning(f"Failed to save crawl cache: {e}")
 
     def save_results(self, output_path: str) -> str:
         """Save scraping results to JSON file with proper UTF-8 encoding"""
@@ -257,12 +460,13 @@ class WebScraper:
 
 def main():
     """Main scraper function"""
-    if len(sys.argv) != 3:
-        print("Usage: python scraper.py <url> <data_source_id>")
+    if len(sys.argv) not in (3, 4):
+        print("Usage: python scraper.py <url> <data_source_id> [max_pages]")
         sys.exit(1)
 
     url = sys.argv[1]
     data_source_id = sys.argv[2]
+    max_pages = int(sys.argv[3]) if len(sys.argv) == 4 else 1
 
     logger.info(f"🕷️ Starting web scraping for: {url}")
     logger.info(f"📊 DataSource ID: {data_source_id}")
@@ -271,20 +475,26 @@ def main():
         # Update status to processing
         update_backend_status(data_source_id, "processing")
 
-        # Initialize scraper
-        scraper = WebScraper(url, data_source_id)
+        # Get the correct base directory (project root)
+        script_dir = os.path.dirname(os.path.abspath(__file__))  # crawlers/
+        data_pipeline_dir = os.path.dirname(script_dir)  # data_pipeline/
+        base_dir = os.path.dirname(os.path.dirname(data_pipeline_dir))  # project root
+
+        # Initialize scraper (validators of the previous crawl enable 304s)
+        scraper = WebScraper(
+            url,
+            data_source_id,
+            cache_path=os.path.join(
+                data_pipeline_dir, "raw_data", f"crawl_cache_{data_source_id}.json"
+            ),
+        )
 
         # Scrape the website
-        results = scraper.scrape_site(max_pages=1)
+        results = scraper.scrape_site(max_pages=max_pages)
 
         if not results:
             raise Exception("No content scraped from the website")
 
-        # Get the correct base directory (project root)
-        script_dir = os.path.dirname(os.path.abspath(__file__))  # crawlers/
-        data_pipeline_dir = os.path.dirname(script_dir)  # data_pipeline/
-        base_dir = os.path.dirname(os.path.dirname(data_pipeline_dir))  # project root
-
         # Save results to JSON - using correct project structure
         json_output_path = os.path.join(
             data_pipeline_dir, "raw_data", f"scraped_{data_source_id}.json"
@@ -314,10 +524,42 @@ def main():
         sys.exit(1)
 
 
+def pages_to_texts(pages: list) -> list:
+    """Turn scraped pages into cleaned "title. content" texts for seeding"""
+    import re
+
+    texts = []
+    for entry in pages:
+        title = entry.get("title", "").strip()
+        content = entry.get("content", [])
+
+        # Clean and combine content
+        filtered_content = []
+        for c in content if isinstance(content, list) else [content]:
+            c_text = str(c).strip()
+            if c_text and len(c_text) > 20:  # Filter short content
+                # Additional text cleaning
+                c_text = re.sub(r"[\n\r\t]+", " ", c_text)
+                c_text = re.sub(r"\s+", " ", c_text)
+                filtered_content.append(c_text)
+
+        # Combine title and content
+        if filtered_content:
+            if title:
+                text = f"{title}. {' '.join(filtered_content)}"
+            else:
+                text = " ".join(filtered_content)
+
+            # Final text cleaning
+            text = text.strip()
+            if len(text) > 50:  # Only include substantial content
+                texts.append(text)
+    return texts
+
+
 def convert_json_to_csv(json_path: str, csv_path: str):
     """Convert scraped JSON to CSV format for vector store with proper UTF-8 handling"""
     import csv
-    import re
 
     try:
         # Ensure output directory exists
@@ -329,39 +571,8 @@ def convert_json_to_csv(json_path: str, csv_path: str):
         with open(csv_path, "w", encoding="utf-8", newline="") as csvfile:
             writer = csv.writer(csvfile)
             writer.writerow(["Text"])
-
-            for entry in data:
-                title = entry.get("title", "").strip()
-                content = entry.get("content", [])
-
-                # Clean and combine content
-                filtered_content = []
-                if isinstance(content, list):
-                    for c in content:
-                        c_text = str(c).strip()
-                        if c_text and len(c_text) > 20:  # Filter short content
-                            # Additional text cleaning
-                            c_text = re.sub(r"[\n\r\t]+", " ", c_text)
-                            c_text = re.sub(r"\s+", " ", c_text)
-                            filtered_content.append(c_text)
-                else:
-                    c_text = str(content).strip()
-                    if c_text and len(c_text) > 20:
-                        c_text = re.sub(r"[\n\r\t]+", " ", c_text)
-                        c_text = re.sub(r"\s+", " ", c_text)
-                        filtered_content.append(c_text)
-
-                # Combine title and content
-                if filtered_content:
-                    if title:
-                        text = f"{title}. {' '.join(filtered_content)}"
-                    else:
-                        text = " ".join(filtered_content)
-
-                    # Final text cleaning
-                    text = text.strip()
-                    if len(text) > 50:  # Only include substantial content
-                        writer.writerow([text])
+            for text in pages_to_texts(data):
+                writer.writerow([text])
 
         logger.success(f"Converted JSON to CSV: {csv_path}")
 
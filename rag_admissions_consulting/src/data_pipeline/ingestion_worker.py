@@ -0,0 +1,214 @@
+"""
+Long-running ingestion worker.
+
+Keeps one PipelineRunner (and therefore one warm embedding model and store
+connection) alive for the lifetime of the process. Jobs are submitted to a
+bounded local queue, processed by at most PIPELINE_CONCURRENCY workers, and
+every status change is PATCHed to the backend's ingestion status endpoint,
+authenticated with a shared service token.
+worker.py exposes this over HTTP.
+"""
+
+import asyncio
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import httpx
+from loguru import logger
+
+from config.settings import settings
+from data_pipeline.pipeline_runner import DATA_TYPES, PipelineJob, PipelineRunner
+
+
+class JobRejected(Exception):
+    """The job cannot be queued (invalid or already queued)"""
+
+
+class QueueFullError(JobRejected):
+    """The queue is at capacity; the caller may retry later"""
+
+
+class UnsupportedDataType(JobRejected):
+    """The job's data type has no pipeline"""
+
+
+TOKEN_HEADER = "X-Ingestion-Token"
+
+
+class StatusReporter:
+    """PATCH data source status to the backend (best effort, never raises)"""
+
+    def __init__(
+        self,
+        url_template: str = None,
+        token: str = None,
+        transport: httpx.AsyncBaseTransport = None,
+        timeout: float = 5.0,
+    ):
+        config = settings.pipeline
+        url_template = config.status_url if url_template is None else url_template
+        token = config.status_token if token is None else token
+        if url_template and not token:
+            logger.warning(
+                "INGESTION_STATUS_TOKEN is not set; job status will not be reported"
+            )
+        self.url_template = url_template if token else ""
+        self.client = httpx.AsyncClient(
+            headers={TOKEN_HEADER: token} if token else {},
+            timeout=timeout,
+            transport=transport,
+        )
+        self.stats = {"sent": 0, "failed": 0}
+
+    @staticmethod
+    def _payload(job: PipelineJob) -> dict:
+        now = datetime.now(timezone.utc).isoformat()
+        if job.status == "processing":
+            return {"status": job.status, "processingStartedAt": now}
+        payload = {
+            "status": job.status,
+            "processingCompletedAt": now,
+            "documentsCount": job.documents_count,
+            "vectorsCount": job.vectors_count,
+        }
+        if job.error:
+            payload["errorMessage"] = job.error
+        return payload
+
+    async def report(self, job: PipelineJob):
+        if not self.url_template:
+            return
+        url = self.url_template.format(data_source_id=job.data_source_id)
+        try:
+            response = await self.client.patch(url, json=self._payload(job))
+            if response.status_code >= 400:
+                raise Exception(f"HTTP {response.status_code}")
+            self.stats["sent"] += 1
+        except Exception as e:
+            self.stats["failed"] += 1
+            logger.warning(
+                f"Failed to report status '{job.status}' for DataSource {job.data_source_id}: {e}"
+            )
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class IngestionWorker:
+    """Bounded job queue in front of a shared, warm PipelineRunner"""
+
+    def __init__(
+        self,
+        runner: PipelineRunner = None,
+        reporter: StatusReporter = None,
+        concurrency: int = None,
+        max_queue_size: int = None,
+        max_history: int = 500,
+    ):
+        self.runner = runner or PipelineRunner()
+        self.reporter = reporter
+        self.concurrency = max(1, concurrency or settings.pipeline.concurrency)
+        self.max_queue_size = max_queue_size or settings.pipeline.worker_queue_size
+        self.max_history = max_history
+        self.jobs: "OrderedDict[str, PipelineJob]" = OrderedDict()
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    async def start(self, warm: bool = True):
+        """Start the worker tasks; `warm` loads the models before accepting work"""
+        if self.running:
+            return
+        if self.reporter is None:
+            self.reporter = StatusReporter()
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._workers = [
+            asyncio.create_task(self._work()) for _ in range(self.concurrency)
+        ]
+        logger.info(
+            f"Ingestion worker started ({self.concurrency} workers, queue {self.max_queue_size})"
+        )
+        if warm:
+            await self.runner.ensure_loaded()
+
+    def submit(self, job: PipelineJob) -> PipelineJob:
+        """Queue a job; raises JobRejected instead of blocking"""
+        if not self.running:
+            raise QueueFullError("Ingestion worker is not running")
+        if job.data_type not in DATA_TYPES:
+            self.stats["rejected"] += 1
+            raise UnsupportedDataType(f"Unsupported data type: {job.data_type}")
+
+        current = self.jobs.get(job.data_source_id)
+        if current is not None and current.status in ("pending", "processing"):
+            self.stats["rejected"] += 1
+            raise JobRejected(f"DataSource {job.data_source_id} is already queued")
+
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.stats["rejected"] += 1
+            raise QueueFullError("Ingestion queue is full")
+
+        self.jobs[job.data_source_id] = job
+        self.jobs.move_to_end(job.data_source_id)
+        while len(self.jobs) > self.max_history:
+            self.jobs.popitem(last=False)
+        self.stats["submitted"] += 1
+        logger.info(
+            f"📥 Queued DataSource {job.data_source_id} ({job.data_type}), "
+            f"{self._queue.qsize()} waiting"
+        )
+        return job
+
+    async def _work(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                job.status = "processing"
+                await self.reporter.report(job)
+                await self.runner.run_job(job)
+                self.stats["completed" if job.status == "completed" else "failed"] += 1
+                await self.reporter.report(job)
+            except Exception as e:
+                logger.error(f"Ingestion worker error for {job.data_source_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def join(self):
+        """Wait until every queued job has finished"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self.reporter is not None:
+            await self.reporter.close()
+        logger.info("Ingestion worker stopped")
+
+    def get_job(self, data_source_id: str) -> Optional[PipelineJob]:
+        return self.jobs.get(data_source_id)
+
+    def get_status(self) -> Dict:
+        return {
+            "running": self.running,
+            "models_loaded": self.runner.embeddings_model is not None,
+            "concurrency": self.concurrency,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "processing": sum(1 for job in self.jobs.values() if job.status == "processing"),
+            "load_time": self.runner.timings.get("load_models"),
+            **self.stats,
+            "reporter": self.reporter.stats if self.reporter is not None else None,
+        }
+
+
+# Global instance
+ingestion_worker = IngestionWorker()
@@ -0,0 +1,231 @@
+"""
+In-process data pipeline runner.
+
+Runs extract (crawl / PDF / CSV / manual) and seed for many data sources
+inside one process: the embedding model and the vector store connection are
+loaded once and shared by every job, extracted texts are handed to the seed
+stage in memory instead of through CSV files, and jobs are pulled from an
+asyncio queue by a bounded number of workers. Each job records how long
+each stage took.
+"""
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional
+
+from loguru import logger
+
+from config.settings import settings
+
+DATA_PIPELINE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_TYPES = ("website", "pdf", "csv", "manual")
+
+
+@dataclass
+class PipelineJob:
+    """One data source to ingest, plus its outcome once run"""
+
+    data_source_id: str
+    data_type: str  # website, pdf, csv, manual
+    input_path: str  # URL, file path or manual JSON
+    force: bool = False
+    max_pages: Optional[int] = None
+    status: str = "pending"  # pending, processing, completed, failed
+    documents_count: int = 0
+    vectors_count: int = 0
+    error: Optional[str] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        return {
+            "data_source_id": self.data_source_id,
+            "data_type": self.data_type,
+            "status": self.status,
+            "documents_count": self.documents_count,
+            "vectors_count": self.vectors_count,
+            "error": self.error,
+            "timings": self.timings,
+        }
+
+
+class PipelineRunner:
+    """Process pipeline jobs concurrently with models loaded once"""
+
+    def __init__(
+        self,
+        concurrency: int = None,
+        embeddings_model=None,
+        seed_fn: Callable = None,
+        on_status: Callable[[PipelineJob], None] = None,
+    ):
+        self.concurrency = max(1, concurrency or settings.pipeline.concurrency)
+        self.embeddings_model = embeddings_model
+        # seed_fn(texts, data_source_id, source, force, embeddings_model) -> (docs, vectors)
+        self.seed_fn = seed_fn
+        self.on_status = on_status
+        self.timings: Dict[str, float] = {}
+        self._load_lock = asyncio.Lock()
+
+    def _load_models(self):
+        """Load the embedding model and connect the store (once per runner)"""
+        if self.seed_fn is None:
+            from infrastructure.store import store
+            from scripts.seed import seed_texts
+
+            store.initStore()
+            self.seed_fn = seed_texts
+        if self.embeddings_model is None:
+            from infrastructure.embeddings import embeddings
+            from shared.enum import ModelType
+
+            self.embeddings_model = embeddings.get_embeddings(ModelType.HUGGINGFACE)
+
+    async def ensure_loaded(self):
+        async with self._load_lock:
+            if self.seed_fn is None or self.embeddings_model is None:
+                start_time = time.perf_counter()
+                await asyncio.to_thread(self._load_models)
+                self.timings["load_models"] = time.perf_counter() - start_time
+                logger.info(
+                    f"🧠 Pipeline models loaded in {self.timings['load_models']:.2f}s"
+                )
+
+    def _set_status(self, job: PipelineJob, status: str):
+        job.status = status
+        if self.on_status is not None:
+            try:
+                self.on_status(job)
+            except Exception as e:
+                logger.warning(f"Pipeline status callback failed: {e}")
+
+    async def _extract_website(self, job: PipelineJob) -> List[str]:
+        from data_pipeline.crawlers.scraper import WebScraper, pages_to_texts
+
+        scraper = WebScraper(
+            job.input_path,
+            job.data_source_id,
+            cache_path=os.path.join(
+                DATA_PIPELINE_DIR, "raw_data", f"crawl_cache_{job.data_source_id}.json"
+            ),
+        )
+        pages = await scraper.scrape_site_async(
+            max_pages=job.max_pages or settings.pipeline.website_max_pages
+        )
+        if not pages:
+            raise Exception("No content scraped from the website")
+        return pages_to_texts(pages)
+
+    @staticmethod
+    def _extract_file(job: PipelineJob) -> List[str]:
+        from data_pipeline.processors.data_processing import (
+            extract_csv_texts,
+            extract_pdf_texts,
+        )
+
+        if not os.path.exists(job.input_path):
+            raise Exception(f"File not found: {job.input_path}")
+        if job.data_type == "pdf":
+            return extract_pdf_texts(job.input_path)
+        return extract_csv_texts(job.input_path)
+
+    @staticmethod
+    def _extract_manual(job: PipelineJob) -> List[str]:
+        from data_pipeline.processors.manual_processor import (
+            manual_input_to_texts,
+            parse_manual_input,
+        )
+
+        input_data = job.input_path
+        if isinstance(input_data, str):
+            input_data = parse_manual_input(input_data)
+        return manual_input_to_texts(input_data)
+
+    async def extract(self, job: PipelineJob) -> List[str]:
+        """Run the type-specific extract stage and return cleaned texts"""
+        if job.data_type == "website":
+            return await self._extract_website(job)
+        if job.data_type in ("pdf", "csv"):
+            return await asyncio.to_thread(self._extract_file, job)
+        if job.data_type == "manual":
+            return await asyncio.to_thread(self._extract_manual, job)
+        raise Exception(f"Unsupported data type: {job.data_type}")
+
+    @staticmethod
+    def _source_name(job: PipelineJob) -> str:
+        if job.data_type in ("pdf", "csv"):
+            return os.path.basename(job.input_path)
+        if job.data_type == "website":
+            return job.input_path
+        return f"manual_{job.data_source_id}"
+
+    async def run_job(self, job: PipelineJob) -> PipelineJob:
+        """Extract and seed one data source, recording per-stage timings"""
+        logger.info(
+            f"🎯 Running pipeline for DataSource: {job.data_source_id} ({job.data_type})"
+        )
+        self._set_status(job, "processing")
+        job_start = time.perf_counter()
+        try:
+            await self.ensure_loaded()
+
+            stage_start = time.perf_counter()
+            texts = await self.extract(job)
+            job.timings["extract"] = time.perf_counter() - stage_start
+            if not texts:
+                raise Exception("No data extracted")
+
+            stage_start = time.perf_counter()
+            job.documents_count, job.vectors_count = await asyncio.to_thread(
+                self.seed_fn,
+                texts,
+                job.data_source_id,
+                self._source_name(job),
+                job.force,
+                self.embeddings_model,
+            )
+            job.timings["seed"] = time.perf_counter() - stage_start
+            job.timings["total"] = time.perf_counter() - job_start
+            self._set_status(job, "completed")
+            logger.success(
+                f"🎊 Pipeline completed for DataSource {job.data_source_id}: "
+                f"{job.documents_count} documents, {job.vectors_count} vectors "
+                f"({', '.join(f'{k}={v:.2f}s' for k, v in job.timings.items())})"
+            )
+        except Exception as e:
+            job.timings["total"] = time.perf_counter() - job_start
+            job.error = str(e)
+            self._set_status(job, "failed")
+            logger.error(f"Pipeline failed for DataSource {job.data_source_id}: {e}")
+        return job
+
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            job = await queue.get()
+            try:
+                await self.run_job(job)
+            finally:
+                queue.task_done()
+
+    async def run(self, jobs: Iterable[PipelineJob]) -> List[PipelineJob]:
+        """Run jobs from a queue with at most `concurrency` in flight"""
+        jobs = list(jobs)
+        queue: asyncio.Queue = asyncio.Queue()
+        for job in jobs:
+            queue.put_nowait(job)
+
+        workers = [
+            asyncio.create_task(self._worker(queue))
+            for _ in range(min(self.concurrency, len(jobs)))
+        ]
+        try:
+            await queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        return jobs
+
+    def run_sync(self, jobs: Iterable[PipelineJob]) -> List[PipelineJob]:
+        return asyncio.run(self.run(jobs))
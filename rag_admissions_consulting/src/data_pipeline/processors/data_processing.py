@@ -34,47 +34,57 @@ def update_backend_status(data_source_id: str, status: str, error_message: str =
         logger.error(f"Failed to update backend status: {e}")
 
 
+def clean_text(text: str) -> str:
+    """Collapse whitespace and line breaks into single spaces"""
+    cleaned_text = re.sub(r"[\n\r\t]+", " ", text)
+    return re.sub(r"\s+", " ", cleaned_text.strip())
+
+
+def write_texts_csv(texts: list, output_path: str) -> str:
+    """Save texts in the single-column CSV format seed.py reads"""
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, "w", encoding="utf-8", newline="") as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(["Text"])
+        for text in texts:
+            writer.writerow([text])
+    return output_path
+
+
+def extract_pdf_texts(file_path: str) -> list:
+    """Extract cleaned text chunks from a PDF file"""
+    logger.info(f"📄 Processing PDF file: {file_path}")
+
+    # Extract text from PDF using helper - single file processing
+    documents = helper.load_pdf_file(file_path)
+
+    if not documents:
+        raise Exception("No text extracted from PDF file")
+
+    texts = []
+    for doc in documents:
+        # Extract text content from langchain document
+        text_content = doc.page_content if hasattr(doc, "page_content") else str(doc)
+
+        if text_content and len(text_content.strip()) > 10:
+            # Split long text into chunks
+            for chunk in helper.text_split([doc]):
+                chunk_text = (
+                    chunk.page_content if hasattr(chunk, "page_content") else str(chunk)
+                )
+                if chunk_text and len(chunk_text.strip()) > 10:
+                    texts.append(clean_text(chunk_text))
+    return texts
+
+
 def process_pdf_file(file_path: str, data_source_id: str) -> str:
     """Process PDF file and convert to CSV format"""
     try:
-        logger.info(f"📄 Processing PDF file: {file_path}")
-
-        # Extract text from PDF using helper - single file processing
-        documents = helper.load_pdf_file(file_path)
-
-        if not documents:
-            raise Exception("No text extracted from PDF file")
+        texts = extract_pdf_texts(file_path)
 
         # Create CSV output path
         output_path = f"data_pipeline/processed_data/pdf_{data_source_id}.csv"
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-
-        # Save to CSV format
-        with open(output_path, "w", encoding="utf-8", newline="") as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(["Text"])
-
-            for doc in documents:
-                # Extract text content from langchain document
-                text_content = (
-                    doc.page_content if hasattr(doc, "page_content") else str(doc)
-                )
-
-                if text_content and len(text_content.strip()) > 10:
-                    # Split long text into chunks
-                    text_chunks = helper.text_split([doc])
-
-                    for chunk in text_chunks:
-                        chunk_text = (
-                            chunk.page_content
-                            if hasattr(chunk, "page_content")
-                            else str(chunk)
-                        )
-                        if chunk_text and len(chunk_text.strip()) > 10:
-                            # Clean text
-                            cleaned_text = re.sub(r"[\n\r\t]+", " ", chunk_text)
-                            cleaned_text = re.sub(r"\s+", " ", cleaned_text.strip())
-                            writer.writerow([cleaned_text])
+        write_texts_csv(texts, output_path)
 
         logger.success(f"✅ PDF processed successfully: {output_path}")
         return output_path
@@ -84,75 +94,70 @@ def process_pdf_file(file_path: str, data_source_id: str) -> str:
         raise
 
 
-def process_csv_file(file_path: str, data_source_id: str) -> str:
-    """Process CSV file and standardize format"""
-    try:
-        logger.info(f"📊 Processing CSV file: {file_path}")
+def extract_csv_texts(file_path: str) -> list:
+    """Read an uploaded CSV and return one cleaned text per row"""
+    logger.info(f"📊 Processing CSV file: {file_path}")
 
-        # Read and process CSV
-        processed_data = []
+    # Read and process CSV
+    processed_data = []
 
-        with open(file_path, "r", encoding="utf-8") as csvfile:
-            # Try to detect if it has headers and delimiter
-            sample = csvfile.read(1024)
-            csvfile.seek(0)
+    with open(file_path, "r", encoding="utf-8") as csvfile:
+        # Try to detect if it has headers and delimiter
+        sample = csvfile.read(1024)
+        csvfile.seek(0)
 
-            sniffer = csv.Sniffer()
-            has_header = False
-            delimiter = ","  # Default delimiter
+        sniffer = csv.Sniffer()
+        has_header = False
+        delimiter = ","  # Default delimiter
 
-            try:
-                # Try to detect delimiter
-                delimiter = sniffer.sniff(sample).delimiter
-                has_header = sniffer.has_header(sample)
-                logger.info(
-                    f"Detected delimiter: '{delimiter}', has_header: {has_header}"
-                )
-            except csv.Error:
-                # Fallback: try common delimiters
-                logger.info("Could not auto-detect delimiter, trying common ones...")
-                for test_delimiter in [",", ";", "\t", "|"]:
-                    csvfile.seek(0)
-                    test_reader = csv.reader(csvfile, delimiter=test_delimiter)
-                    try:
-                        first_row = next(test_reader)
-                        if len(first_row) > 1:  # Found valid delimiter
-                            delimiter = test_delimiter
-                            logger.info(f"Using delimiter: '{delimiter}'")
-                            break
-                    except:
-                        continue
+        try:
+            # Try to detect delimiter
+            delimiter = sniffer.sniff(sample).delimiter
+            has_header = sniffer.has_header(sample)
+            logger.info(f"Detected delimiter: '{delimiter}', has_header: {has_header}")
+        except csv.Error:
+            # Fallback: try common delimiters
+            logger.info("Could not auto-detect delimiter, trying common ones...")
+            for test_delimiter in [",", ";", "\t", "|"]:
                 csvfile.seek(0)
+                test_reader = csv.reader(csvfile, delimiter=test_delimiter)
+                try:
+                    first_row = next(test_reader)
+                    if len(first_row) > 1:  # Found valid delimiter
+                        delimiter = test_delimiter
+                        logger.info(f"Using delimiter: '{delimiter}'")
+                        break
+                except:
+                    continue
+            csvfile.seek(0)
 
-            reader = csv.reader(csvfile, delimiter=delimiter)
+        reader = csv.reader(csvfile, delimiter=delimiter)
 
-            if has_header:
-                headers = next(reader)  # Skip header row
-                logger.info(f"CSV headers detected: {headers}")
+        if has_header:
+            headers = next(reader)  # Skip header row
+            logger.info(f"CSV headers detected: {headers}")
 
-            for row in reader:
-                if row:  # Skip empty rows
-                    # Combine all columns into single text
-                    text = " ".join(str(cell).strip() for cell in row if cell.strip())
-                    if text and len(text) > 10:
-                        # Clean text
-                        cleaned_text = re.sub(r"[\n\r\t]+", " ", text)
-                        cleaned_text = re.sub(r"\s+", " ", cleaned_text.strip())
-                        processed_data.append(cleaned_text)
+        for row in reader:
+            if row:  # Skip empty rows
+                # Combine all columns into single text
+                text = " ".join(str(cell).strip() for cell in row if cell.strip())
+                if text and len(text) > 10:
+                    processed_data.append(clean_text(text))
 
-        if not processed_data:
-            raise Exception("No valid data found in CSV file")
+    if not processed_data:
+        raise Exception("No valid data found in CSV file")
 
-        # Create standardized CSV output
-        output_path = f"data_pipeline/processed_data/csv_{data_source_id}.csv"
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    return processed_data
 
-        with open(output_path, "w", encoding="utf-8", newline="") as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(["Text"])
 
-            for text in processed_data:
-                writer.writerow([text])
+def process_csv_file(file_path: str, data_source_id: str) -> str:
+    """Process CSV file and standardize format"""
+    try:
+        processed_data = extract_csv_texts(file_path)
+
+        # Create standardized CSV output
+        output_path = f"data_pipeline/processed_data/csv_{data_source_id}.csv"
+        write_texts_csv(processed_data, output_path)
 
         logger.success(f"✅ CSV processed successfully: {output_path}")
         return output_path
@@ -49,26 +49,61 @@ def create_manual_input_file(input_data: dict, data_source_id: str) -> str:
         raise
 
 
-def process_manual_input(input_data: dict, data_source_id: str) -> str:
-    """Process manual Q&A input and save to CSV format"""
-    try:
-        logger.info(f"📝 Processing manual input for DataSource: {data_source_id}")
+def parse_manual_input(raw_input: str) -> dict:
+    """Parse manual input passed as base64 JSON (from NestJS) or raw JSON"""
+    input_data = None
+
+    # Check if input is base64 encoded (from NestJS)
+    if re.match(r"^[A-Za-z0-9+/]*={0,2}$", raw_input) and len(raw_input) > 20:
+        try:
+            decoded_json = base64.b64decode(raw_input).decode("utf-8")
+            input_data = json.loads(decoded_json)
+            logger.info(f"📝 Decoded base64 input from NestJS")
+        except (binascii.Error, json.JSONDecodeError, UnicodeDecodeError):
+            # Not base64, treat as raw JSON
+            logger.info(f"📝 Not base64, treating as raw JSON")
+
+    if input_data is None:
+        # If it looks like JSON but missing quotes, try to fix it
+        if raw_input.startswith("{") and not raw_input.startswith('{"'):
+            # Fix common command line quote stripping
+            fixed_json = re.sub(r"(\w+):", r'"\1":', raw_input)
+            fixed_json = re.sub(r":(\w+)", r':"\1"', fixed_json)
+            logger.info(f"📝 Fixed JSON: {fixed_json}")
+            input_data = json.loads(fixed_json)
+        else:
+            input_data = json.loads(raw_input)
+
+    return input_data
+
 
-        title = input_data.get("title", "").strip()
-        content = input_data.get("content", "").strip()
+def manual_input_to_texts(input_data: dict) -> list:
+    """Turn a manual Q&A entry into the cleaned text that gets seeded"""
+    title = input_data.get("title", "").strip()
+    content = input_data.get("content", "").strip()
 
-        if not title or not content:
-            raise Exception("Both title and content are required for manual input")
+    if not title or not content:
+        raise Exception("Both title and content are required for manual input")
 
-        # Create formatted text
-        formatted_text = f"{title} {content}"
+    # Create formatted text
+    formatted_text = f"{title} {content}"
 
-        # Clean text
-        cleaned_text = re.sub(r"[\n\r\t]+", " ", formatted_text)
-        cleaned_text = re.sub(r"\s+", " ", cleaned_text.strip())
+    # Clean text
+    cleaned_text = re.sub(r"[\n\r\t]+", " ", formatted_text)
+    cleaned_text = re.sub(r"\s+", " ", cleaned_text.strip())
+
+    if len(cleaned_text) < 10:
+        raise Exception("Input text is too short")
+
+    return [cleaned_text]
+
+
+def process_manual_input(input_data: dict, data_source_id: str) -> str:
+    """Process manual Q&A input and save to CSV format"""
+    try:
+        logger.info(f"📝 Processing manual input for DataSource: {data_source_id}")
 
-        if len(cleaned_text) < 10:
-            raise Exception("Input text is too short")
+        texts = manual_input_to_texts(input_data)
 
         # Create CSV output path
         output_path = f"data_pipeline/processed_data/manual_{data_source_id}.csv"
@@ -78,7 +113,8 @@ def process_manual_input(input_data: dict, data_source_id: str) -> str:
         with open(output_path, "w", encoding="utf-8", newline="") as csvfile:
             writer = csv.writer(csvfile)
             writer.writerow(["Text"])
-            writer.writerow([cleaned_text])
+            for text in texts:
+                writer.writerow([text])
 
         logger.success(f"✅ Manual input processed successfully: {output_path}")
         return output_path
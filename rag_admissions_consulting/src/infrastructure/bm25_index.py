@@ -0,0 +1,283 @@
+"""
+In-memory BM25 keyword index for hybrid retrieval.
+
+Dense e5 embeddings blur exact terms such as ngành codes, tuition figures
+or "điểm chuẩn 2025"; this index catches them. Text is NFC-normalised and
+lower-cased, split into syllables, and every pair of adjacent syllables is
+indexed as well, so Vietnamese compound words ("học_phí", "điểm_chuẩn")
+score above their parts.
+
+seed.py keeps it in step with vector upserts under the same chunk IDs and
+persists it as one JSON file per index; the API process reloads the file
+when it changes, checking at most once per second. Writers take an
+exclusive lock on a sidecar ".lock" file, reload the latest file and write
+through a unique temp file, so concurrent seed runs merge their changes
+instead of overwriting each other. Searches run against
+numpy postings arrays built on the first query after a change, so scoring
+a common term over thousands of chunks is one vectorised update.
+"""
+
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+import time
+import unicodedata
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from config.settings import settings
+from infrastructure.file_lock import file_lock, file_stamp
+from infrastructure.local_store import matches_filter
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+# Function words that carry no retrieval signal on their own
+STOPWORDS = frozenset(
+    [
+        "à",
+        "ạ",
+        "ai",
+        "các",
+        "cho",
+        "có",
+        "của",
+        "cũng",
+        "đã",
+        "đang",
+        "để",
+        "đó",
+        "được",
+        "em",
+        "gì",
+        "hay",
+        "hỏi",
+        "là",
+        "mà",
+        "một",
+        "này",
+        "nào",
+        "những",
+        "nhé",
+        "ơi",
+        "sẽ",
+        "thì",
+        "trong",
+        "và",
+        "vậy",
+        "với",
+        "về",
+    ]
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Syllables (minus stopwords) followed by adjacent-syllable bigrams"""
+    words = _WORD_PATTERN.findall(unicodedata.normalize("NFC", text).lower())
+    tokens = [word for word in words if word not in STOPWORDS]
+    tokens.extend(f"{first}_{second}" for first, second in zip(words, words[1:]))
+    return tokens
+
+
+class BM25Index:
+    """Okapi BM25 over chunk texts, keyed by the vector store's chunk IDs"""
+
+    def __init__(
+        self,
+        path: str = None,
+        k1: float = None,
+        b: float = None,
+    ):
+        config = settings.hybrid_search
+        self.path = path or os.path.join(
+            config.index_dir, f"{settings.vector_store.index_name}.json"
+        )
+        self.k1 = config.k1 if k1 is None else k1
+        self.b = config.b if b is None else b
+
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._total_length = 0
+        # Search arrays, rebuilt lazily after every change
+        self._arrays: Optional[Dict[str, Any]] = None
+        self._lock = threading.RLock()
+        self._file_stamp = None
+        self._checked_at = 0.0
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._check_reload()
+            return len(self._docs)
+
+    def __contains__(self, doc_id: str) -> bool:
+        with self._lock:
+            self._check_reload()
+            return doc_id in self._docs
+
+    def _check_reload(self, force: bool = False):
+        """Load the file again if another process rewrote it"""
+        now = time.time()
+        if not force and now - self._checked_at < 1.0:
+            return
+        self._checked_at = now
+        stamp = file_stamp(self.path)
+        if stamp is None or stamp == self._file_stamp:
+            return
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                docs = json.load(f)["docs"]
+        except Exception as e:
+            logger.warning(f"Failed to load BM25 index {self.path}: {e}")
+            return
+
+        self._file_stamp = stamp
+        self._docs, self._postings, self._total_length = {}, {}, 0
+        for doc_id, doc in docs.items():
+            self._add(doc_id, doc)
+        self._arrays = None
+        logger.info(f"Loaded BM25 index from {self.path}: {len(self._docs)} chunks")
+
+    def _add(self, doc_id: str, doc: Dict[str, Any]):
+        self._docs[doc_id] = doc
+        for term, count in doc["terms"].items():
+            self._postings.setdefault(term, {})[doc_id] = count
+        self._total_length += doc["length"]
+
+    def _remove(self, doc_id: str) -> bool:
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return False
+        for term in doc["terms"]:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+        self._total_length -= doc["length"]
+        return True
+
+    def _get_arrays(self) -> Dict[str, Any]:
+        """Per-term (rows, BM25 contributions) so a query only sums arrays"""
+        if self._arrays is None:
+            ids = list(self._docs)
+            rows = {doc_id: row for row, doc_id in enumerate(ids)}
+            lengths = np.array([self._docs[i]["length"] for i in ids], dtype=np.float32)
+            avgdl = float(lengths.mean()) if len(ids) else 1.0
+            norms = self.k1 * (1 - self.b + self.b * lengths / (avgdl or 1.0))
+            total = len(ids)
+            postings = {}
+            for term, counts in self._postings.items():
+                df = len(counts)
+                idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+                term_rows = np.fromiter((rows[i] for i in counts), dtype=np.int64, count=df)
+                tf = np.fromiter(counts.values(), dtype=np.float32, count=df)
+                postings[term] = (
+                    term_rows,
+                    idf * (self.k1 + 1) * tf / (tf + norms[term_rows]),
+                )
+            self._arrays = {"ids": ids, "postings": postings, "filter_masks": {}}
+        return self._arrays
+
+    def _filter_mask(self, arrays: Dict[str, Any], filter: Dict[str, Any]) -> np.ndarray:
+        key = json.dumps(filter, sort_keys=True, ensure_ascii=False)
+        mask = arrays["filter_masks"].get(key)
+        if mask is None:
+            mask = np.fromiter(
+                (matches_filter(self._docs[i]["metadata"], filter) for i in arrays["ids"]),
+                dtype=bool,
+                count=len(arrays["ids"]),
+            )
+            arrays["filter_masks"][key] = mask
+        return mask
+
+    def _save(self):
+        """Write the index; callers hold the file lock"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(
+            dir=directory, prefix=os.path.basename(self.path) + ".", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"docs": self._docs}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        self._file_stamp = file_stamp(self.path)
+
+    def upsert(
+        self,
+        ids: List[str],
+        texts: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+    ):
+        """Add or replace chunks and persist the index"""
+        metadatas = metadatas or [{} for _ in texts]
+        with self._lock, file_lock(self.path):
+            self._check_reload(force=True)
+            for doc_id, text, metadata in zip(ids, texts, metadatas):
+                self._remove(doc_id)
+                tokens = tokenize(text)
+                self._add(
+                    doc_id,
+                    {
+                        "text": text,
+                        "metadata": metadata,
+                        "terms": dict(Counter(tokens)),
+                        "length": len(tokens),
+                    },
+                )
+            self._arrays = None
+            self._save()
+
+    def delete(self, ids: Iterable[str]) -> int:
+        """Remove chunks by ID and persist the index"""
+        with self._lock, file_lock(self.path):
+            self._check_reload(force=True)
+            removed = sum(1 for doc_id in ids if self._remove(doc_id))
+            if removed:
+                self._arrays = None
+                self._save()
+            return removed
+
+    def get(self, doc_id: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        with self._lock:
+            doc = self._docs.get(doc_id)
+            return None if doc is None else (doc["text"], doc["metadata"])
+
+    def search(
+        self, query: str, k: int, filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[str, float]]:
+        """Top-k chunk IDs by BM25 score, optionally restricted by metadata"""
+        with self._lock:
+            self._check_reload()
+            if not self._docs:
+                return []
+
+            arrays = self._get_arrays()
+            scores = np.zeros(len(arrays["ids"]), dtype=np.float32)
+            for term in set(tokenize(query)):
+                posting = arrays["postings"].get(term)
+                if posting is not None:
+                    rows, contributions = posting
+                    scores[rows] += contributions
+
+            if filter:
+                scores[~self._filter_mask(arrays, filter)] = 0.0
+            rows = np.flatnonzero(scores > 0)
+            if len(rows) > k:
+                rows = rows[np.argpartition(-scores[rows], k - 1)[:k]]
+            rows = rows[np.argsort(-scores[rows], kind="stable")]
+            return [(arrays["ids"][row], float(scores[row])) for row in rows]
+
+
+# Global instance
+bm25_index = BM25Index()
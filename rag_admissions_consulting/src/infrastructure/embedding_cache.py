@@ -0,0 +1,166 @@
+"""
+Two-tier embedding cache.
+
+Vectors are keyed by model namespace + embedding kind + SHA-256 of the
+text, so the same chunk or the same student question is only ever pushed
+through the transformer once. A small in-memory LRU answers hot queries;
+a SQLite file keeps everything across restarts and re-seeding runs.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from loguru import logger
+
+SQLITE_BATCH_SIZE = 500
+
+
+class EmbeddingCacheStore:
+    """In-memory LRU tier in front of a persistent SQLite tier"""
+
+    def __init__(self, path: Optional[str], max_memory_items: int = 10000):
+        self.path = path
+        self.max_memory_items = max_memory_items
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            self._conn.commit()
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Look keys up in memory first, then on disk"""
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            missing = []
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is None:
+                    missing.append(key)
+                else:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+            self.stats["memory_hits"] += len(found)
+
+            if self._conn is not None and missing:
+                for start in range(0, len(missing), SQLITE_BATCH_SIZE):
+                    batch = missing[start : start + SQLITE_BATCH_SIZE]
+                    placeholders = ",".join("?" * len(batch))
+                    rows = self._conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                        batch,
+                    ).fetchall()
+                    for key, blob in rows:
+                        vector = np.frombuffer(blob, dtype=np.float32)
+                        found[key] = vector
+                        self._remember(key, vector)
+                        self.stats["disk_hits"] += 1
+
+            self.stats["misses"] += len(keys) - len(found)
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]):
+        """Store new vectors in both tiers"""
+        if not items:
+            return
+        with self._lock:
+            for key, vector in items.items():
+                self._remember(key, vector)
+            if self._conn is not None:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    [(key, vector.tobytes()) for key, vector in items.items()],
+                )
+                self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class CachedEmbeddings(Embeddings):
+    """Wrap any LangChain embeddings model with EmbeddingCacheStore"""
+
+    def __init__(self, underlying: Embeddings, namespace: str, cache: EmbeddingCacheStore):
+        self.underlying = underlying
+        self.namespace = namespace
+        self.cache = cache
+
+    def _key(self, kind: str, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.namespace}:{kind}:{digest}"
+
+    def embed_documents_array(
+        self,
+        texts: List[str],
+        embed_missing: Optional[Callable[[List[str]], np.ndarray]] = None,
+    ) -> np.ndarray:
+        """Embed texts as a float32 matrix; `embed_missing` overrides the model call"""
+        keys = [self._key("document", text) for text in texts]
+        cached = self.cache.get_many(keys)
+
+        # Embed each distinct missing text once
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        if missing:
+            if embed_missing is None:
+                vectors = self.underlying.embed_documents(list(missing.values()))
+            else:
+                vectors = embed_missing(list(missing.values()))
+            new_items = {
+                key: np.asarray(vector, dtype=np.float32)
+                for key, vector in zip(missing.keys(), vectors)
+            }
+            self.cache.put_many(new_items)
+            cached.update(new_items)
+            logger.debug(
+                f"Embedding cache: {len(texts) - len(missing)}/{len(texts)} documents served from cache"
+            )
+
+        if not keys:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([cached[key] for key in keys])
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents_array(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key("query", text)
+        cached = self.cache.get_many([key])
+        if key in cached:
+            return cached[key].tolist()
+
+        vector = np.asarray(self.underlying.embed_query(text), dtype=np.float32)
+        self.cache.put_many({key: vector})
+        return vector.tolist()
+
+    def __getattr__(self, name):
+        # Expose model attributes (e.g. model_name) of the wrapped embeddings
+        if name == "underlying":
+            raise AttributeError(name)
+        return getattr(self.underlying, name)
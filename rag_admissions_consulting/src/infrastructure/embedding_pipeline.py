@@ -0,0 +1,171 @@
+"""
+Bulk embedding stage for seeding.
+
+Texts are embedded in batches sorted by length so each transformer batch
+pads to a similar sequence length, then scattered back to input order.
+For sentence-transformers models (HuggingFaceEmbeddings) the encoder is
+called directly, with the same preprocessing and encode_kwargs as
+embed_documents, and returns float32 numpy arrays without the
+list-of-lists round trip. A multi-process pool can be enabled with
+EMBEDDING_PROCESS_WORKERS; dedicated ingestion processes call
+configure_torch_threads() for EMBEDDING_TORCH_THREADS. The embedding cache
+still answers chunks that were embedded before.
+"""
+
+import atexit
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from loguru import logger
+
+from config.settings import settings
+from infrastructure.embedding_cache import CachedEmbeddings
+
+
+def configure_torch_threads(threads: int = None):
+    """Set torch intra-op threads for the whole process (EMBEDDING_TORCH_THREADS)
+
+    Only for processes that do nothing but ingest (seed CLI, ingestion
+    worker); the chat server keeps the library default.
+    """
+    threads = settings.embedding.torch_threads if threads is None else threads
+    if not threads:
+        return
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(threads)
+    logger.info(f"Embedding with {threads} torch intra-op threads")
+
+
+class BatchEmbedder:
+    """Length-sorted batched embedding that returns float32 matrices"""
+
+    def __init__(self, model, batch_size: int = None, process_workers: int = None):
+        config = settings.embedding
+        self.model = model
+        self.process_workers = (
+            config.process_workers if process_workers is None else process_workers
+        )
+
+        underlying = model.underlying if isinstance(model, CachedEmbeddings) else model
+        self._underlying = underlying
+        # HuggingFaceEmbeddings keeps its SentenceTransformer in `_client`
+        encoder = getattr(underlying, "_client", None)
+        self.encoder = encoder if hasattr(encoder, "encode") else None
+        # Same options embed_documents would pass, so cached vectors match
+        encode_kwargs = dict(getattr(underlying, "encode_kwargs", None) or {})
+        self.batch_size = (
+            batch_size or encode_kwargs.pop("batch_size", None) or config.encode_batch_size
+        )
+        self.encode_kwargs = {
+            "show_progress_bar": False,
+            **encode_kwargs,
+            "convert_to_numpy": True,
+        }
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Embed texts (already length-sorted) with the fastest available path"""
+        if self.encoder is None:
+            return np.asarray(self._underlying.embed_documents(texts), dtype=np.float32)
+
+        # HuggingFaceEmbeddings.embed_documents replaces newlines before encoding
+        texts = [text.replace("\n", " ") for text in texts]
+        if self.process_workers > 1:
+            if self._pool is None:
+                self._pool = self.encoder.start_multi_process_pool(
+                    ["cpu"] * self.process_workers
+                )
+                atexit.register(self.close)
+                logger.info(f"Started embedding pool with {self.process_workers} processes")
+            vectors = self.encoder.encode_multi_process(
+                texts,
+                self._pool,
+                batch_size=self.batch_size,
+                normalize_embeddings=self.encode_kwargs.get(
+                    "normalize_embeddings", False
+                ),
+            )
+        else:
+            vectors = self.encoder.encode(
+                texts, batch_size=self.batch_size, **self.encode_kwargs
+            )
+        return np.asarray(vectors, dtype=np.float32)
+
+    def _encode_sorted(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        order = sorted(range(len(texts)), key=lambda index: len(texts[index]))
+        vectors = self._encode([texts[index] for index in order])
+        result = np.empty_like(vectors)
+        result[order] = vectors
+        return result
+
+    def embed_texts(self, texts: List[str]) -> np.ndarray:
+        """Embed texts in input order; shape (len(texts), dim), float32"""
+        with self._lock:
+            if isinstance(self.model, CachedEmbeddings):
+                return self.model.embed_documents_array(
+                    texts, embed_missing=self._encode_sorted
+                )
+            return self._encode_sorted(texts)
+
+    def iter_embed(
+        self, chunks: Iterable[Document], window_size: int = 2048
+    ) -> Iterator[Tuple[List[Document], np.ndarray]]:
+        """Stream (documents, vectors) windows without materialising all chunks"""
+        window: List[Document] = []
+        embedded = 0
+        start_time = time.time()
+        for chunk in chunks:
+            window.append(chunk)
+            if len(window) >= window_size:
+                yield window, self.embed_texts([doc.page_content for doc in window])
+                embedded += len(window)
+                self._log_throughput(embedded, start_time)
+                window = []
+        if window:
+            yield window, self.embed_texts([doc.page_content for doc in window])
+            embedded += len(window)
+            self._log_throughput(embedded, start_time)
+
+    @staticmethod
+    def _log_throughput(embedded: int, start_time: float):
+        elapsed = time.time() - start_time
+        logger.info(
+            f"🔢 Embedded {embedded} chunks ({embedded / elapsed if elapsed else 0:.1f} chunks/s)"
+        )
+
+    def close(self):
+        """Stop the process pool, if one was started"""
+        if self._pool is not None:
+            self.encoder.stop_multi_process_pool(self._pool)
+            self._pool = None
+            logger.info("Stopped embedding pool")
+
+
+_embedders: Dict[int, BatchEmbedder] = {}
+
+
+def get_batch_embedder(model) -> BatchEmbedder:
+    """Reuse one embedder (and its process pool) per embeddings model"""
+    embedder = _embedders.get(id(model))
+    if embedder is None or embedder.model is not model:
+        if embedder is not None:
+            embedder.close()
+        embedder = BatchEmbedder(model)
+        _embedders[id(model)] = embedder
+    return embedder
+
+
+def close_batch_embedders():
+    """Stop every embedder's process pool (call on shutdown)"""
+    for embedder in _embedders.values():
+        embedder.close()
+    _embedders.clear()
@@ -4,6 +4,7 @@ from langchain_openai import OpenAI, OpenAIEmbeddings
 from langchain_ollama import OllamaEmbeddings
 from shared.enum import ModelType
 from config.settings import settings
+from infrastructure.embedding_cache import CachedEmbeddings, EmbeddingCacheStore
 
 
 class Embeddings:
@@ -23,8 +24,37 @@ class Embeddings:
         ModelType.OLLAMA: lambda: OllamaEmbeddings(model="nomic-embed-text"),
     }
 
-    def get_embeddings(self, model_name: str):
-        return Embeddings.EMBEDDING_MODELS[model_name]()
+    # Cache namespaces: a vector is only reusable for the exact same model
+    EMBEDDING_NAMESPACES = {
+        ModelType.HUGGINGFACE: lambda: f"hf/{settings.embedding.model_name}",
+        ModelType.GEMINI: lambda: "gemini/models/embedding-001",
+        ModelType.OPENAI: lambda: "openai/text-embedding-3-small",
+        ModelType.OLLAMA: lambda: "ollama/nomic-embed-text",
+    }
+
+    def __init__(self):
+        self._cache_store = None
+
+    def get_cache_store(self) -> EmbeddingCacheStore:
+        """Shared cache store so every wrapped model hits the same tiers"""
+        if self._cache_store is None:
+            self._cache_store = EmbeddingCacheStore(
+                settings.embedding.vector_cache_path or None,
+                max_memory_items=settings.embedding.memory_cache_size,
+            )
+        return self._cache_store
+
+    def get_embeddings(self, model_name: str, use_cache: bool = None):
+        model = Embeddings.EMBEDDING_MODELS[model_name]()
+        if use_cache is None:
+            use_cache = settings.embedding.cache_enabled
+        if not use_cache:
+            return model
+        return CachedEmbeddings(
+            model,
+            namespace=Embeddings.EMBEDDING_NAMESPACES[model_name](),
+            cache=self.get_cache_store(),
+        )
 
 
 embeddings = Embeddings()
@@ -0,0 +1,63 @@
+"""
+Cross-process coordination for files shared by the API, seed.py and the
+ingestion worker.
+
+Writers hold an exclusive lock on a sidecar ".lock" file while they read,
+change and replace the data file, so concurrent processes merge their
+changes instead of overwriting each other. Readers compare a file stamp
+to notice rewrites: every replace creates a new inode, so the stamp
+changes even when two writes land within one mtime tick.
+"""
+
+import os
+from contextlib import contextmanager
+from typing import Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextmanager
+def file_lock(path: str, blocking: bool = True):
+    """Exclusive lock across processes, held while `path` is read and rewritten
+
+    With `blocking=False` it raises BlockingIOError instead of waiting for
+    another holder.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path + ".lock", "a+b") as lock_file:
+        if fcntl is not None:
+            flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+            fcntl.flock(lock_file.fileno(), flags)
+        else:
+            lock_file.seek(0)
+            # LK_LOCK gives up after ten seconds, so keep trying
+            while True:
+                try:
+                    msvcrt.locking(
+                        lock_file.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1
+                    )
+                    break
+                except OSError:
+                    if not blocking:
+                        raise BlockingIOError(f"{path} is locked by another process")
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def file_stamp(path: str) -> Optional[Tuple[int, int, int]]:
+    """(inode, mtime in ns, size) of `path`, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
@@ -0,0 +1,672 @@
+"""
+Local in-process vector index.
+
+Vectors live in an append-only float32 file that is memory-mapped for
+search; texts and metadata live in a JSONL sidecar next to it. Rows are
+L2-normalised on write so cosine similarity is a single matrix-vector
+product, which keeps top-k and MMR sub-millisecond for corpora of a few
+tens of thousands of chunks. Searches accept a Pinecone-style metadata
+filter (`{"field": value}`, `$eq`, `$in`); matching rows are cached per
+filter until the next write.
+
+The manifest is the commit point: it is replaced last and records the
+row count, so rows appended by a writer that crashed are ignored on load
+and cut off by the next writer. Compaction writes a new generation of
+both files and switches to it the same way. Writers in seed.py, the
+worker and the API serialise on a sidecar ".lock" file, and readers
+reload when the manifest changes, checking at most once per second.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from loguru import logger
+
+from config.settings import settings
+from infrastructure.embedding_pipeline import get_batch_embedder
+from infrastructure.file_lock import file_lock, file_stamp
+
+VECTORS_FILE = "vectors.f32"
+DOCUMENTS_FILE = "documents.jsonl"
+MANIFEST_FILE = "index.json"
+
+
+def _data_file(name: str, generation: int) -> str:
+    """File name of a data file in a compaction generation (0 keeps the plain name)"""
+    if not generation:
+        return name
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{generation}{ext}"
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalise rows so dot products are cosine similarities"""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _matches_condition(value: Any, condition: Any) -> bool:
+    """One field condition; list-valued metadata matches if any element does"""
+    values = value if isinstance(value, list) else [value]
+    if not isinstance(condition, dict):
+        return condition in values
+    for operator, operand in condition.items():
+        if operator == "$eq":
+            if operand not in values:
+                return False
+        elif operator == "$in":
+            if not any(v in operand for v in values):
+                return False
+        else:
+            raise ValueError(f"Unsupported metadata filter operator: {operator}")
+    return True
+
+
+def matches_filter(metadata: Dict[str, Any], filter: Dict[str, Any]) -> bool:
+    """True if the metadata satisfies every field condition of the filter"""
+    return all(
+        field in metadata and _matches_condition(metadata[field], condition)
+        for field, condition in filter.items()
+    )
+
+
+class LocalVectorIndex:
+    """Memory-mapped float32 matrix with JSONL metadata sidecar"""
+
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+        self._lock = threading.RLock()
+        self._manifest_stamp = None
+        self._checked_at = 0.0
+        self._reset()
+        os.makedirs(self.index_dir, exist_ok=True)
+        self._check_reload(force=True)
+
+    def _reset(self):
+        self.dim: Optional[int] = None
+        self.ids: List[Optional[str]] = []
+        self.texts: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self._id_to_row: Dict[str, int] = {}
+        self._alive = np.zeros(0, dtype=bool)
+        self._matrix: Optional[np.ndarray] = None
+        self._filter_masks: Dict[str, np.ndarray] = {}
+        self._generation = 0
+        # Bytes of the documents file that belong to committed rows
+        self._documents_bytes = 0
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.index_dir, _data_file(VECTORS_FILE, self._generation))
+
+    @property
+    def _documents_path(self) -> str:
+        return os.path.join(self.index_dir, _data_file(DOCUMENTS_FILE, self._generation))
+
+    @property
+    def _manifest_path(self) -> str:
+        return os.path.join(self.index_dir, MANIFEST_FILE)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._check_reload()
+            return len(self._id_to_row)
+
+    def _check_reload(self, force: bool = False):
+        """Load the index again if another process committed a write"""
+        now = time.time()
+        if not force and now - self._checked_at < 1.0:
+            return
+        self._checked_at = now
+        stamp = file_stamp(self._manifest_path)
+        if stamp is None or stamp == self._manifest_stamp:
+            return
+        try:
+            self._load()
+        except Exception as e:
+            # e.g. a compaction removed the files between manifest and read
+            logger.warning(f"Failed to load local vector index {self.index_dir}: {e}")
+            return
+        self._manifest_stamp = stamp
+
+    def _load(self):
+        """Read the rows the manifest commits to; vectors stay on disk until searched"""
+        with open(self._manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        generation = manifest.get("generation", 0)
+        rows = manifest.get("rows")
+        deleted = set(manifest.get("deleted_rows", []))
+
+        ids, texts, metadatas, id_to_row = [], [], [], {}
+        documents_bytes = 0
+        path = os.path.join(self.index_dir, _data_file(DOCUMENTS_FILE, generation))
+        with open(path, "rb") as f:
+            for row, line in enumerate(f):
+                # Anything past the manifest's row count is an append that never committed
+                if row == rows:
+                    break
+                record = json.loads(line)
+                alive = row not in deleted
+                ids.append(record["id"] if alive else None)
+                texts.append(record["text"])
+                metadatas.append(record.get("metadata") or {})
+                if alive:
+                    id_to_row[record["id"]] = row
+                documents_bytes += len(line)
+        if rows is not None and len(ids) < rows:
+            raise ValueError(f"{path} has {len(ids)} rows, the manifest expects {rows}")
+
+        self._reset()
+        self.dim = manifest.get("dim")
+        self._generation = generation
+        self.ids, self.texts, self.metadatas = ids, texts, metadatas
+        self._id_to_row = id_to_row
+        self._alive = np.array([i is not None for i in ids], dtype=bool)
+        self._documents_bytes = documents_bytes
+        logger.info(
+            f"Loaded local vector index from {self.index_dir}: {len(id_to_row)} vectors, dim={self.dim}"
+        )
+
+    def _write_manifest(self):
+        """Commit the current rows; readers and later writers trust only the manifest"""
+        deleted_rows = [row for row, row_id in enumerate(self.ids) if row_id is None]
+        tmp_path = self._manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "dim": self.dim,
+                    "rows": len(self.ids),
+                    "deleted_rows": deleted_rows,
+                    "generation": self._generation,
+                },
+                f,
+            )
+        os.replace(tmp_path, self._manifest_path)
+        self._manifest_stamp = file_stamp(self._manifest_path)
+
+    def _remove_stale_files(self):
+        """Delete data files of other generations (left by compaction)"""
+        current = {
+            _data_file(VECTORS_FILE, self._generation),
+            _data_file(DOCUMENTS_FILE, self._generation),
+        }
+        prefixes = tuple(os.path.splitext(name)[0] for name in (VECTORS_FILE, DOCUMENTS_FILE))
+        for name in os.listdir(self.index_dir):
+            if name.startswith(prefixes) and name not in current:
+                try:
+                    os.remove(os.path.join(self.index_dir, name))
+                except OSError as e:
+                    logger.warning(f"Could not remove stale index file {name}: {e}")
+
+    def _truncate_uncommitted(self):
+        """Cut rows a crashed writer appended without committing the manifest"""
+        committed = (
+            (self._vectors_path, len(self.ids) * (self.dim or 0) * 4),
+            (self._documents_path, self._documents_bytes),
+        )
+        for path, size in committed:
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                logger.warning(f"Dropping uncommitted rows from {path}")
+                self._matrix = None
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+
+    @contextmanager
+    def _writing(self):
+        """One writer at a time across processes, starting from the committed index
+
+        A failed write falls back to what the manifest last committed; the
+        files it left behind are cut off or removed by the next writer.
+        """
+        with self._lock, file_lock(self._manifest_path):
+            self._check_reload(force=True)
+            self._remove_stale_files()
+            self._truncate_uncommitted()
+            try:
+                yield
+            except BaseException:
+                self._reset()
+                self._manifest_stamp = None
+                self._check_reload(force=True)
+                self._remove_stale_files()
+                raise
+
+    def _get_matrix(self) -> np.ndarray:
+        """Memory-map the vector file, re-opening it after writes"""
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[0] != len(self.ids):
+                if not self.ids:
+                    return np.zeros((0, self.dim or 0), dtype=np.float32)
+                self._matrix = np.memmap(
+                    self._vectors_path,
+                    dtype=np.float32,
+                    mode="r",
+                    shape=(len(self.ids), self.dim),
+                )
+            return self._matrix
+
+    @staticmethod
+    def _encode_documents(
+        ids: List[str], texts: List[str], metadatas: List[Dict[str, Any]]
+    ) -> bytes:
+        return b"".join(
+            json.dumps(
+                {"id": row_id, "text": text, "metadata": metadata}, ensure_ascii=False
+            ).encode("utf-8")
+            + b"\n"
+            for row_id, text, metadata in zip(ids, texts, metadatas)
+        )
+
+    def upsert(
+        self,
+        ids: List[str],
+        vectors: np.ndarray,
+        texts: List[str],
+        metadatas: List[Dict[str, Any]],
+    ):
+        """Append rows; an existing id is tombstoned and re-appended"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[0] != len(ids):
+            raise ValueError("vectors must be a 2-D array with one row per id")
+
+        with self._writing():
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(
+                    f"Vector dimension {vectors.shape[1]} does not match index dimension {self.dim}"
+                )
+
+            self._tombstone([row_id for row_id in ids if row_id in self._id_to_row])
+
+            documents = self._encode_documents(ids, texts, metadatas)
+            with open(self._vectors_path, "ab") as f:
+                f.write(np.ascontiguousarray(_normalize(vectors)).tobytes())
+            with open(self._documents_path, "ab") as f:
+                f.write(documents)
+            self._documents_bytes += len(documents)
+
+            start = len(self.ids)
+            for offset, row_id in enumerate(ids):
+                self._id_to_row[row_id] = start + offset
+            self.ids.extend(ids)
+            self.texts.extend(texts)
+            self.metadatas.extend(metadatas)
+            self._alive = np.concatenate([self._alive, np.ones(len(ids), dtype=bool)])
+            self._matrix = None
+            self._filter_masks = {}
+            self._write_manifest()
+
+    def _tombstone(self, ids: Iterable[str]) -> int:
+        removed = 0
+        for row_id in ids:
+            row = self._id_to_row.pop(row_id, None)
+            if row is not None:
+                self.ids[row] = None
+                self._alive[row] = False
+                removed += 1
+        return removed
+
+    def delete(self, ids: Iterable[str]) -> int:
+        """Remove vectors by id; storage is reclaimed by `compact`"""
+        with self._writing():
+            removed = self._tombstone(ids)
+            if removed:
+                self._write_manifest()
+            return removed
+
+    def compact(self):
+        """Rewrite the files without tombstoned rows
+
+        The surviving rows go to the next generation's files; replacing the
+        manifest commits the switch, and only then are the old files removed.
+        """
+        with self._writing():
+            keep = np.flatnonzero(self._alive)
+            if len(keep) == len(self.ids):
+                return
+            vectors = np.ascontiguousarray(self._get_matrix()[keep])
+
+            self._generation += 1
+            self.ids = [self.ids[row] for row in keep]
+            self.texts = [self.texts[row] for row in keep]
+            self.metadatas = [self.metadatas[row] for row in keep]
+            self._id_to_row = {row_id: row for row, row_id in enumerate(self.ids)}
+            self._alive = np.ones(len(self.ids), dtype=bool)
+            documents = self._encode_documents(self.ids, self.texts, self.metadatas)
+            with open(self._vectors_path, "wb") as f:
+                f.write(vectors.tobytes())
+            with open(self._documents_path, "wb") as f:
+                f.write(documents)
+            self._documents_bytes = len(documents)
+            self._write_manifest()
+
+            # Release the old memory map before its file is deleted
+            self._matrix = None
+            self._filter_masks = {}
+            self._remove_stale_files()
+            logger.info(f"Compacted local vector index to {len(self.ids)} vectors")
+
+    def get(self, row_id: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        with self._lock:
+            self._check_reload()
+            row = self._id_to_row.get(row_id)
+            if row is None:
+                return None
+            return self.texts[row], self.metadatas[row]
+
+    def _filter_mask(self, filter: Dict[str, Any]) -> np.ndarray:
+        """Rows whose metadata matches the filter, cached until the next write"""
+        key = json.dumps(filter, sort_keys=True, ensure_ascii=False)
+        with self._lock:
+            mask = self._filter_masks.get(key)
+            if mask is None:
+                mask = np.fromiter(
+                    (matches_filter(metadata, filter) for metadata in self.metadatas),
+                    dtype=bool,
+                    count=len(self.metadatas),
+                )
+                self._filter_masks[key] = mask
+            return mask
+
+    def _candidate_scores(
+        self, query: np.ndarray, filter: Optional[Dict[str, Any]] = None
+    ) -> np.ndarray:
+        """Cosine similarity of every row to the query, -inf for dead or filtered rows"""
+        matrix = self._get_matrix()
+        alive = self._alive[: matrix.shape[0]]
+        query = _normalize(np.asarray(query, dtype=np.float32))
+        if not filter:
+            scores = np.asarray(matrix @ query)
+            scores[~alive] = -np.inf
+            return scores
+
+        # Only score the rows that pass the filter
+        rows = np.flatnonzero(alive & self._filter_mask(filter)[: matrix.shape[0]])
+        scores = np.full(matrix.shape[0], -np.inf, dtype=np.float32)
+        if len(rows):
+            scores[rows] = np.asarray(matrix[rows]) @ query
+        return scores
+
+    @staticmethod
+    def _top_rows(scores: np.ndarray, k: int) -> np.ndarray:
+        k = min(k, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64)
+        rows = np.argpartition(-scores, k - 1)[:k]
+        return rows[np.argsort(-scores[rows])]
+
+    def search(
+        self, query: np.ndarray, k: int, filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[int, float]]:
+        """Top-k rows by cosine similarity"""
+        with self._lock:
+            self._check_reload()
+            if not self._id_to_row:
+                return []
+            scores = self._candidate_scores(query, filter)
+            return [(int(row), float(scores[row])) for row in self._top_rows(scores, k)]
+
+    def mmr_search(
+        self,
+        query: np.ndarray,
+        k: int,
+        fetch_k: int,
+        lambda_mult: float,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[int, float]]:
+        """Maximal marginal relevance over the top `fetch_k` candidates"""
+        with self._lock:
+            self._check_reload()
+            if not self._id_to_row:
+                return []
+            scores = self._candidate_scores(query, filter)
+            candidates = self._top_rows(scores, max(k, fetch_k))
+            if not len(candidates):
+                return []
+            candidate_vectors = np.asarray(self._get_matrix()[candidates])
+
+        relevance = scores[candidates]
+        pairwise = candidate_vectors @ candidate_vectors.T
+
+        selected: List[int] = [0]
+        max_similarity = pairwise[0].copy()
+        remaining = np.ones(len(candidates), dtype=bool)
+        remaining[0] = False
+
+        while len(selected) < min(k, len(candidates)):
+            mmr = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+            mmr[~remaining] = -np.inf
+            best = int(np.argmax(mmr))
+            selected.append(best)
+            remaining[best] = False
+            max_similarity = np.maximum(max_similarity, pairwise[best])
+
+        return [(int(candidates[i]), float(relevance[i])) for i in selected]
+
+
+class LocalVectorStore(VectorStore):
+    """LangChain adapter so retrievers and chains can use LocalVectorIndex"""
+
+    def __init__(self, index: LocalVectorIndex, embedding: Embeddings):
+        self.index = index
+        self._embedding = embedding
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    def _to_documents(self, rows: List[Tuple[int, float]]) -> List[Tuple[Document, float]]:
+        return [
+            (
+                Document(
+                    page_content=self.index.texts[row],
+                    metadata=dict(self.index.metadatas[row]),
+                    id=self.index.ids[row],
+                ),
+                score,
+            )
+            for row, score in rows
+        ]
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        vectors = get_batch_embedder(self._embedding).embed_texts(texts)
+        self.index.upsert(ids, vectors, texts, metadatas)
+        return ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if not ids:
+            return False
+        return self.index.delete(ids) > 0
+
+    def similarity_search_with_score_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        # Rows are only meaningful until the index reloads another process's write
+        with self.index._lock:
+            return self._to_documents(self.index.search(np.asarray(embedding), k, filter))
+
+    def similarity_search_by_vector(
+        self, embedding: List[float], k: int = 4, **kwargs: Any
+    ) -> List[Document]:
+        return [
+            doc
+            for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, **kwargs)
+        ]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(
+            self._embedding.embed_query(query), k, **kwargs
+        )
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return self.similarity_search_by_vector(
+            self._embedding.embed_query(query), k, **kwargs
+        )
+
+    def _similarity_search_with_relevance_scores(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score(query, k, **kwargs)
+
+    def max_marginal_relevance_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        with self.index._lock:
+            rows = self.index.mmr_search(
+                np.asarray(embedding), k, fetch_k, lambda_mult, filter
+            )
+            return [doc for doc, _ in self._to_documents(rows)]
+
+    def max_marginal_relevance_search(
+        self,
+        query: str,
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        **kwargs: Any,
+    ) -> List[Document]:
+        return self.max_marginal_relevance_search_by_vector(
+            self._embedding.embed_query(query), k, fetch_k, lambda_mult, **kwargs
+        )
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        index_dir: Optional[str] = None,
+        **kwargs: Any,
+    ) -> "LocalVectorStore":
+        index = LocalVectorIndex(
+            index_dir
+            or os.path.join(
+                settings.vector_store.local_index_dir, settings.vector_store.index_name
+            )
+        )
+        vector_store = cls(index, embedding)
+        vector_store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return vector_store
+
+
+class LocalStore:
+    """Drop-in replacement for `Store` backed by LocalVectorIndex"""
+
+    def __init__(
+        self,
+        index_name: str = None,
+        search_kwargs: dict = None,
+        search_type: str = "mmr",
+        index_dir: str = None,
+    ):
+        self.index_name = index_name or settings.vector_store.index_name
+        self.index_dir = index_dir or os.path.join(
+            settings.vector_store.local_index_dir, self.index_name
+        )
+        self.search_kwargs = search_kwargs or {
+            "k": settings.vector_store.top_k,
+            "fetch_k": 20,
+            "lambda_mult": 0.5,
+        }
+        self.search_type = search_type
+        self.is_connected = False
+        self.index: Optional[LocalVectorIndex] = None
+        logger.info(
+            f"LocalStore initialized with index_dir={self.index_dir}, search_kwargs={self.search_kwargs}"
+        )
+
+    def initStore(self):
+        if self.index is None:
+            self.index = LocalVectorIndex(self.index_dir)
+        self.is_connected = True
+        logger.info(f"Local vector index '{self.index_name}' ready ({len(self.index)} vectors)")
+
+    def uploadToStore(
+        self,
+        text_chunks,
+        embeddings,
+        batch_size: int = None,
+        max_retries: int = 3,
+        ids: list = None,
+    ):
+        """Embed and append chunks one window at a time
+
+        Like `Store.uploadToStore`, `text_chunks` may be any iterable (pass
+        `ids` to size a generator). Each window of `batch_size` chunks
+        (default: the embedding batch size) is encoded to a float32 array
+        and appended to the index directly.
+        """
+        docsearch = self.getStore(embeddings)
+        window_size = batch_size or settings.vector_store.embed_batch_size
+        total_chunks = len(ids) if ids is not None else len(text_chunks)
+        row_ids = iter(ids) if ids is not None else None
+        logger.info(f"Uploading {total_chunks} chunks to local index in batches of {window_size}...")
+
+        uploaded = 0
+        for batch_chunks, vectors in get_batch_embedder(embeddings).iter_embed(
+            text_chunks, window_size=window_size
+        ):
+            self.index.upsert(
+                [next(row_ids) if row_ids else str(uuid.uuid4()) for _ in batch_chunks],
+                vectors,
+                [chunk.page_content for chunk in batch_chunks],
+                [dict(chunk.metadata) for chunk in batch_chunks],
+            )
+            uploaded += len(batch_chunks)
+            logger.info(f"✅ Uploaded {uploaded}/{total_chunks} chunks")
+
+        logger.success(f"✅ All {uploaded} chunks uploaded to local index!")
+        return docsearch
+
+    def deleteFromStore(self, ids: list, embeddings=None, batch_size: int = 1000):
+        if self.index is None:
+            self.initStore()
+        deleted = self.index.delete(ids)
+        logger.info(f"Deleted {deleted} vectors from local index")
+
+    def getStore(self, embeddings):
+        if self.index is None:
+            self.initStore()
+        return LocalVectorStore(self.index, embeddings)
+
+    def getRetriever(self, embeddings):
+        retriever = self.getStore(embeddings).as_retriever(
+            search_type=self.search_type, search_kwargs=self.search_kwargs
+        )
+        logger.info(f"Created local retriever with search_kwargs={self.search_kwargs}")
+        return retriever
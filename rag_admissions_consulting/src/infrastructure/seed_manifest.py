@@ -0,0 +1,77 @@
+"""
+Manifest of the chunks already indexed for each data source.
+
+Chunk IDs are deterministic (data_source_id + SHA-256 of the chunk text),
+so upserting the same chunk twice overwrites instead of duplicating. The
+manifest records which IDs a data source currently has in the index;
+seeding diffs it against the new chunks to embed only what is new and
+delete what disappeared. It also records the chunk metadata version, so a
+change to the metadata written at ingestion re-uploads existing chunks once.
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Iterable, List, Set, Tuple
+
+from loguru import logger
+
+from config.settings import settings
+
+
+def chunk_id(data_source_id: str, text: str) -> str:
+    """Stable vector ID for a chunk of a data source"""
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+    return f"{data_source_id}:{digest}"
+
+
+class SeedManifest:
+    """IDs indexed for one data source, persisted as JSON"""
+
+    def __init__(self, data_source_id: str, index_name: str = None, manifest_dir: str = None):
+        self.data_source_id = str(data_source_id)
+        index_name = index_name or settings.vector_store.index_name
+        manifest_dir = manifest_dir or settings.vector_store.seed_manifest_dir
+        self.path = os.path.join(manifest_dir, index_name, f"{self.data_source_id}.json")
+        self.ids: Set[str] = set()
+        self.metadata_version = 0
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.ids = set(data.get("ids", []))
+            self.metadata_version = int(data.get("metadata_version", 0))
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable seed manifest {self.path}: {e}")
+
+    def diff(self, current_ids: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """Return (ids to upsert, ids to delete) to reach `current_ids`"""
+        current_ids = list(dict.fromkeys(current_ids))
+        current = set(current_ids)
+        added = [row_id for row_id in current_ids if row_id not in self.ids]
+        removed = sorted(self.ids - current)
+        return added, removed
+
+    def save(self, current_ids: Iterable[str], metadata_version: int = None):
+        """Record `current_ids` as indexed (call only after the store is updated)"""
+        self.ids = set(current_ids)
+        if metadata_version is not None:
+            self.metadata_version = metadata_version
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "data_source_id": self.data_source_id,
+                    "updated_at": time.time(),
+                    "metadata_version": self.metadata_version,
+                    "ids": sorted(self.ids),
+                },
+                f,
+            )
+        os.replace(tmp_path, self.path)
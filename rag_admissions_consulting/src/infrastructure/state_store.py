@@ -0,0 +1,209 @@
+"""
+Shared key/value state for sessions and conversation context.
+
+SessionManager and ContextCache write through a StateStore so a follow-up
+message can land on any uvicorn worker (or pod) and still find its
+conversation. InMemoryStateStore keeps the single-process behaviour;
+RedisStateStore talks to Redis through an asyncio redis-py client, so the
+chat path never blocks the event loop on a network round trip.
+"""
+
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from config.settings import settings
+
+
+class StateStore(ABC):
+    """JSON values and capped JSON lists with per-key TTL"""
+
+    # True when other processes see the same data
+    shared = False
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def set(
+        self, key: str, value: Dict[str, Any], ttl_seconds: Optional[int] = None
+    ):
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    async def append(
+        self,
+        key: str,
+        value: Dict[str, Any],
+        max_len: int,
+        ttl_seconds: Optional[int] = None,
+    ):
+        """Append to a list, keeping only the newest `max_len` items"""
+
+    @abstractmethod
+    async def get_list(self, key: str) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def keys(self, prefix: str) -> List[str]:
+        ...
+
+
+class InMemoryStateStore(StateStore):
+    """Process-local store; expired keys are dropped lazily"""
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[Optional[float], Any]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _expires_at(ttl_seconds: Optional[int]) -> Optional[float]:
+        return time.monotonic() + ttl_seconds if ttl_seconds else None
+
+    def _live(self, key: str) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            value = self._live(key)
+            return dict(value) if isinstance(value, dict) else None
+
+    async def set(
+        self, key: str, value: Dict[str, Any], ttl_seconds: Optional[int] = None
+    ):
+        with self._lock:
+            self._data[key] = (self._expires_at(ttl_seconds), dict(value))
+
+    async def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    async def append(
+        self,
+        key: str,
+        value: Dict[str, Any],
+        max_len: int,
+        ttl_seconds: Optional[int] = None,
+    ):
+        with self._lock:
+            items = self._live(key)
+            items = list(items) if isinstance(items, list) else []
+            items.append(dict(value))
+            self._data[key] = (self._expires_at(ttl_seconds), items[-max_len:])
+
+    async def get_list(self, key: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = self._live(key)
+            return [dict(item) for item in items] if isinstance(items, list) else []
+
+    async def keys(self, prefix: str) -> List[str]:
+        with self._lock:
+            return [
+                key
+                for key in list(self._data)
+                if key.startswith(prefix) and self._live(key) is not None
+            ]
+
+
+class RedisStateStore(StateStore):
+    """Redis-backed store shared by every worker pointing at the same server"""
+
+    shared = True
+
+    def __init__(self, client, key_prefix: str = "rag"):
+        # `client` is a redis.asyncio client returning str (decode_responses=True)
+        self.client = client
+        self.key_prefix = key_prefix
+
+    @classmethod
+    def from_url(cls, url: str, key_prefix: str = "rag") -> "RedisStateStore":
+        """Connect to `url`; raises if the server does not answer a PING
+
+        The check uses a short-lived blocking client because the store is
+        created at import time, before any event loop is running.
+        """
+        import redis
+        import redis.asyncio
+
+        probe = redis.Redis.from_url(url, socket_connect_timeout=2)
+        try:
+            probe.ping()
+        finally:
+            probe.close()
+        return cls(redis.asyncio.Redis.from_url(url, decode_responses=True), key_prefix)
+
+    def _key(self, key: str) -> str:
+        return f"{self.key_prefix}:{key}"
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raw = await self.client.get(self._key(key))
+        return json.loads(raw) if raw else None
+
+    async def set(
+        self, key: str, value: Dict[str, Any], ttl_seconds: Optional[int] = None
+    ):
+        await self.client.set(
+            self._key(key), json.dumps(value, ensure_ascii=False), ex=ttl_seconds
+        )
+
+    async def delete(self, key: str):
+        await self.client.delete(self._key(key))
+
+    async def append(
+        self,
+        key: str,
+        value: Dict[str, Any],
+        max_len: int,
+        ttl_seconds: Optional[int] = None,
+    ):
+        full_key = self._key(key)
+        # One round trip for push + trim + expire
+        pipe = self.client.pipeline()
+        pipe.rpush(full_key, json.dumps(value, ensure_ascii=False))
+        pipe.ltrim(full_key, -max_len, -1)
+        if ttl_seconds:
+            pipe.expire(full_key, ttl_seconds)
+        await pipe.execute()
+
+    async def get_list(self, key: str) -> List[Dict[str, Any]]:
+        raw_items = await self.client.lrange(self._key(key), 0, -1)
+        return [json.loads(raw) for raw in raw_items]
+
+    async def keys(self, prefix: str) -> List[str]:
+        start = len(self.key_prefix) + 1
+        return [
+            key[start:]
+            async for key in self.client.scan_iter(match=f"{self._key(prefix)}*")
+        ]
+
+
+def create_state_store() -> StateStore:
+    """Create the backend selected by STATE_STORE_BACKEND"""
+    config = settings.state_store
+    if config.backend == "redis":
+        try:
+            state_store = RedisStateStore.from_url(config.redis_url, config.key_prefix)
+            logger.info(f"Using Redis state store at {config.redis_url}")
+            return state_store
+        except Exception as e:
+            logger.error(f"Failed to create Redis state store, using in-memory: {e}")
+    return InMemoryStateStore()
+
+
+state_store = create_state_store()
@@ -3,8 +3,49 @@ from pinecone import ServerlessSpec
 from langchain_pinecone import PineconeVectorStore
 from loguru import logger
 from config.settings import settings
+from infrastructure.embedding_pipeline import get_batch_embedder
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import threading
 import time
-import math
+import uuid
+
+
+def _is_rate_limited(error: Exception) -> bool:
+    """Pinecone signals throttling as HTTP 429 / gRPC RESOURCE_EXHAUSTED"""
+    status = getattr(error, "status", None) or getattr(error, "status_code", None)
+    message = str(error).lower()
+    return (
+        status == 429
+        or "429" in message
+        or "too many requests" in message
+        or "resource_exhausted" in message
+        or "rate limit" in message
+    )
+
+
+class AdaptiveThrottle:
+    """Shared delay between upserts that grows on rate limits and decays on success"""
+
+    def __init__(self, initial_delay: float = 0.5, max_delay: float = 30.0):
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.delay = 0.0
+        self.rate_limited = 0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if self.delay:
+            time.sleep(self.delay)
+
+    def on_rate_limited(self):
+        with self._lock:
+            self.rate_limited += 1
+            self.delay = min(max(self.delay * 2, self.initial_delay), self.max_delay)
+            logger.warning(f"Rate limited by Pinecone, backing off {self.delay:.1f}s")
+
+    def on_success(self):
+        with self._lock:
+            self.delay = self.delay / 2 if self.delay > 0.05 else 0.0
 
 
 class Store:
@@ -22,6 +63,7 @@ class Store:
         }
         self.search_type = search_type
         self.is_connected = False
+        self.index = None
         logger.info(
             f"Store initialized with index_name={self.index_name}, search_kwargs={self.search_kwargs}"
         )
@@ -30,7 +72,7 @@ class Store:
         try:
             logger.info("Connecting to Pinecone...")
             pc = Pinecone(api_key=settings.vector_store.pinecone_api_key)
-            pc.Index(self.index_name)
+            self.index = pc.Index(self.index_name)
             self.is_connected = True
             logger.info(f"Successfully connected to Pinecone index '{self.index_name}'")
         except Exception as e:
@@ -39,78 +81,142 @@ class Store:
             raise
 
     def uploadToStore(
-        self, text_chunks: str, embeddings, batch_size: int = 10, max_retries: int = 3
+        self,
+        text_chunks,
+        embeddings,
+        batch_size: int = None,
+        max_retries: int = 3,
+        ids: list = None,
     ):
+        """Pipelined bulk upload: embed large batches while earlier ones upsert
+
+        `text_chunks` may be any iterable (pass `ids` to size a generator);
+        it is embedded window by window on the caller's thread, in windows of
+        `embed_batch_size`, and upserts of `batch_size` vectors go to a small
+        thread pool, so only a few windows of vectors are held at once.
+        Backoff only kicks in when Pinecone reports rate limiting.
+        """
+        config = settings.vector_store
+        batch_size = batch_size or config.upsert_batch_size
+        embed_batch_size = max(config.embed_batch_size, batch_size)
+        total_chunks = len(ids) if ids is not None else len(text_chunks)
+        row_ids = iter(ids) if ids is not None else None
+
         try:
-            total_chunks = len(text_chunks)
+            if self.index is None:
+                self.initStore()
+
             logger.info(
-                f"Uploading {total_chunks} chunks to Pinecone in batches of {batch_size}..."
+                f"Uploading {total_chunks} chunks to Pinecone "
+                f"(embed batches of {embed_batch_size}, upsert batches of {batch_size}, "
+                f"{config.upsert_concurrency} concurrent upserts)..."
             )
 
-            # Process in batches to avoid rate limiting
-            total_batches = math.ceil(total_chunks / batch_size)
-            uploaded_count = 0
-
-            for batch_idx in range(total_batches):
-                start_idx = batch_idx * batch_size
-                end_idx = min(start_idx + batch_size, total_chunks)
-                batch_chunks = text_chunks[start_idx:end_idx]
+            embedder = get_batch_embedder(embeddings)
+            throttle = AdaptiveThrottle()
+            progress = {"embedded": 0, "uploaded": 0}
+            start_time = time.time()
+            max_pending = config.upsert_concurrency * 2  # bound memory held by vectors
+            pending = set()
 
+            def report(done):
+                for future in done:
+                    # Re-raise upsert failures in the caller
+                    progress["uploaded"] += future.result()
+                elapsed = time.time() - start_time
                 logger.info(
-                    f"Processing batch {batch_idx + 1}/{total_batches} ({len(batch_chunks)} chunks)"
+                    f"✅ {progress['uploaded']}/{total_chunks} uploaded, "
+                    f"{progress['embedded']} embedded "
+                    f"({progress['uploaded'] / elapsed if elapsed else 0:.1f} chunks/s)"
                 )
 
-                # Retry logic for each batch
-                for attempt in range(max_retries):
-                    try:
-                        if batch_idx == 0 and attempt == 0:
-                            # First batch - create new vector store
-                            docsearch = PineconeVectorStore.from_documents(
-                                documents=batch_chunks,
-                                index_name=self.index_name,
-                                embedding=embeddings,
-                            )
-                        else:
-                            # Subsequent batches - add to existing vector store
-                            docsearch = PineconeVectorStore.from_existing_index(
-                                index_name=self.index_name, embedding=embeddings
-                            )
-                            docsearch.add_documents(batch_chunks)
-
-                        uploaded_count += len(batch_chunks)
-                        logger.info(
-                            f"✅ Batch {batch_idx + 1} uploaded successfully ({uploaded_count}/{total_chunks} total)"
-                        )
-                        break
+            with ThreadPoolExecutor(
+                max_workers=config.upsert_concurrency, thread_name_prefix="pinecone-upsert"
+            ) as executor:
+                for batch_chunks, vectors in embedder.iter_embed(
+                    text_chunks, window_size=embed_batch_size
+                ):
+                    progress["embedded"] += len(batch_chunks)
 
-                    except Exception as batch_error:
-                        logger.warning(
-                            f"Batch {batch_idx + 1} attempt {attempt + 1} failed: {batch_error}"
+                    records = [
+                        (
+                            next(row_ids) if row_ids else str(uuid.uuid4()),
+                            vector.tolist(),
+                            {**chunk.metadata, "text": chunk.page_content},
                         )
-                        if attempt == max_retries - 1:
-                            raise Exception(
-                                f"Failed to upload batch {batch_idx + 1} after {max_retries} attempts: {batch_error}"
+                        for vector, chunk in zip(vectors, batch_chunks)
+                    ]
+                    for offset in range(0, len(records), batch_size):
+                        if len(pending) >= max_pending:
+                            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                            report(done)
+                        pending.add(
+                            executor.submit(
+                                self._upsert_with_retry,
+                                records[offset : offset + batch_size],
+                                throttle,
+                                max_retries,
                             )
+                        )
 
-                        # Wait before retry (exponential backoff)
-                        wait_time = 2**attempt
-                        logger.info(f"Waiting {wait_time}s before retry...")
-                        time.sleep(wait_time)
-
-                # Wait between batches to respect rate limits
-                if batch_idx < total_batches - 1:  # Don't wait after last batch
-                    logger.info("Waiting 2s between batches to respect rate limits...")
-                    time.sleep(2)
+                if pending:
+                    report(pending)
 
+            elapsed = time.time() - start_time
             logger.success(
-                f"✅ All {uploaded_count} chunks uploaded to Pinecone successfully!"
+                f"✅ All {progress['uploaded']} chunks uploaded to Pinecone in {elapsed:.1f}s "
+                f"({progress['uploaded'] / elapsed if elapsed else 0:.1f} chunks/s, "
+                f"{throttle.rate_limited} rate-limit backoffs)"
+            )
+            return PineconeVectorStore.from_existing_index(
+                index_name=self.index_name, embedding=embeddings, text_key="text"
             )
-            return docsearch
 
         except Exception as e:
             logger.error(f"Error uploading to Pinecone: {e}")
             raise
 
+    def _upsert_with_retry(
+        self, records: list, throttle: "AdaptiveThrottle", max_retries: int
+    ) -> int:
+        failures = 0
+        rate_limits = 0
+        while True:
+            throttle.wait()
+            try:
+                self.index.upsert(vectors=records)
+                throttle.on_success()
+                return len(records)
+            except Exception as e:
+                # Rate limits only slow us down; other errors use the retry budget
+                if _is_rate_limited(e) and rate_limits < max_retries * 10:
+                    rate_limits += 1
+                    throttle.on_rate_limited()
+                    continue
+
+                failures += 1
+                logger.warning(
+                    f"Upsert of {len(records)} vectors attempt {failures} failed: {e}"
+                )
+                if failures >= max_retries:
+                    raise Exception(
+                        f"Failed to upsert {len(records)} vectors after {max_retries} attempts: {e}"
+                    )
+                time.sleep(2 ** (failures - 1))
+
+    def deleteFromStore(self, ids: list, embeddings=None, batch_size: int = 1000):
+        """Delete vectors by ID (e.g. chunks removed from a data source)"""
+        try:
+            docsearch = PineconeVectorStore.from_existing_index(
+                index_name=self.index_name, embedding=embeddings
+            )
+            for start_idx in range(0, len(ids), batch_size):
+                docsearch.delete(ids=ids[start_idx : start_idx + batch_size])
+            logger.info(f"Deleted {len(ids)} vectors from Pinecone")
+        except Exception as e:
+            logger.error(f"Error deleting from Pinecone: {e}")
+            raise
+
     def getStore(self, embeddings):
         try:
             logger.info(f"Getting store from Pinecone index '{self.index_name}'...")
@@ -157,4 +263,13 @@ class Store:
             return EmptyRetriever()
 
 
-store = Store()
+def create_store():
+    """Create the vector store backend selected by VECTOR_STORE_BACKEND"""
+    if settings.vector_store.backend == "local":
+        from infrastructure.local_store import LocalStore
+
+        return LocalStore()
+    return Store()
+
+
+store = create_store()
@@ -1,5 +1,6 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from loguru import logger
 import sys
 import os
@@ -11,6 +12,9 @@ from api.routes import router
 
 from shared.database import setup_database
 from core.app_manager import app_manager
+from core.context_cache import context_cache
+from core.tracing import tracer
+from shared.chat_history_manager import history_writer
 
 # Configure logging
 logger.remove()
@@ -49,6 +53,9 @@ async def startup_event():
         logger.info("🔧 Initializing all application components...")
         await app_manager.initialize_all_components()
 
+        # Expire idle conversations in the background
+        context_cache.start_sweeper()
+
         logger.info("🎉 Application startup completed successfully!")
         logger.info(f"📊 Application status: {app_manager.get_status()}")
 
@@ -64,6 +71,9 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup on application shutdown"""
     logger.info("Shutting down RAG Admissions Consulting API...")
+    await context_cache.stop_sweeper()
+    # Flush chat history still waiting in the batch queue
+    await history_writer.close()
 
 
 @app.get("/")
@@ -92,16 +102,40 @@ async def health_check():
     }
 
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 503 until the RAG engine critical path is initialized"""
+    app_status = app_manager.get_status()
+    return JSONResponse(
+        status_code=200 if app_status["ready"] else 503,
+        content={
+            "ready": app_status["ready"],
+            "stage_timeline": app_status["stage_timeline"],
+            "failed_stages": app_status["failed_stages"],
+        },
+    )
+
+
+@app.get("/metrics")
+async def metrics():
+    """Latency histograms (per stage, TTFT, tokens/s, total) in Prometheus format"""
+    return PlainTextResponse(
+        tracer.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 @app.get("/status")
 async def detailed_status():
     """Get detailed application status"""
     from core.session_manager import session_manager
-    from core.context_cache import context_cache
+    from core.answer_cache import answer_cache
 
     return {
         "application_manager": app_manager.get_status(),
-        "session_manager": session_manager.get_all_sessions(),
+        "session_manager": await session_manager.get_all_sessions(),
         "context_cache": context_cache.get_cache_stats(),
+        "answer_cache": answer_cache.get_stats(),
+        "history_writer": history_writer.get_stats(),
         "version": "2.0.0",
         "environment": "development",
     }
@@ -112,7 +146,7 @@ async def clear_user_session(user_email: str):
     """Clear session for a specific user"""
     from core.session_manager import session_manager
 
-    session_manager.clear_session(user_email)
+    await session_manager.clear_session(user_email)
     return {"message": f"Session cleared for user: {user_email}"}
 
 
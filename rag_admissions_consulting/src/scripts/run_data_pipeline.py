@@ -3,188 +3,95 @@
 Data Pipeline Runner for RAG Admissions Consulting
 Runs the complete pipeline: processing -> vector store upload
 Integrated with backend system
+
+Every stage runs in this process (see data_pipeline/pipeline_runner.py):
+the embedding model is loaded once and extracted texts go straight to
+seeding without intermediate CSV files.
 """
 
-import subprocess
 import sys
 import time
 import os
-import base64
 from datetime import datetime
 from pathlib import Path
 from loguru import logger
 import json
-import tempfile
-
-# Global variable to store the last success output for final reporting
-last_success_output = ""
-
 
-def run_command(command, description):
-    """Run a command and log results"""
-    logger.info(f"🚀 {description}")
-    logger.info(f"📝 Command: {command}")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-    try:
-        # Fix: Use parent directory (src) as working directory instead of scripts
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        parent_dir = os.path.dirname(script_dir)  # Go up one level to src/
+from data_pipeline.pipeline_runner import DATA_TYPES, PipelineJob, PipelineRunner
+from infrastructure.embedding_pipeline import configure_torch_threads
 
-        result = subprocess.run(
-            command,
-            shell=True,
-            capture_output=True,
-            text=True,
-            cwd=parent_dir,
-        )
-
-        if result.returncode == 0:
-            logger.success(f"✅ {description} - COMPLETED")
-            if result.stdout:
-                logger.info(f"Output: {result.stdout.strip()}")
-
-            # Store the last successful output for final reporting
-            if result.stdout and "SUCCESS:" in result.stdout:
-                global last_success_output
-                last_success_output = result.stdout.strip()
-        else:
-            logger.error(f"❌ {description} - FAILED")
-            logger.error(f"Error: {result.stderr}")
-            return False
+# Global variable to store the last success output for final reporting
+last_success_output = ""
 
-    except Exception as e:
-        logger.error(f"❌ {description} - ERROR: {e}")
-        return False
 
-    return True
+def log_job_summary(jobs: list):
+    """Log per-stage timings of finished jobs"""
+    for job in jobs:
+        timings = ", ".join(f"{stage}={seconds:.2f}s" for stage, seconds in job.timings.items())
+        icon = "✅" if job.status == "completed" else "❌"
+        logger.info(f"{icon} {job.data_source_id} [{job.data_type}] {job.status}: {timings}")
 
 
 def run_individual_pipeline(data_source_id: str, data_type: str, input_path: str):
     """Run pipeline for a specific data source"""
+    global last_success_output
+
     logger.info(f"🎯 Running pipeline for DataSource: {data_source_id}")
     logger.info(f"📊 Data type: {data_type}")
     logger.info(f"📄 Input: {input_path}")
 
-    try:
-        # Step 1: Process data based on type
-        if data_type == "website":
-            # For website crawling
-            command = f'python data_pipeline/crawlers/scraper.py "{input_path}" "{data_source_id}"'
-            description = f"Web Crawling - {input_path}"
-
-            if not run_command(command, description):
-                return False
-
-            # CSV file should be created by scraper
-            csv_file = f"data_pipeline/processed_data/scraped_{data_source_id}.csv"
-
-        elif data_type in ["pdf", "csv"]:
-            # For file uploads
-            command = f'python data_pipeline/processors/data_processing.py "{input_path}" "{data_source_id}"'
-            description = f"File Processing - {os.path.basename(input_path)}"
-
-            if not run_command(command, description):
-                return False
-
-            # CSV file should be created by processor
-            if data_type == "pdf":
-                csv_file = f"data_pipeline/processed_data/pdf_{data_source_id}.csv"
-            else:
-                csv_file = f"data_pipeline/processed_data/csv_{data_source_id}.csv"
-
-        elif data_type == "manual":
-            # For manual input - create temporary file to avoid command line length limits
-            logger.info(f"📝 Original input_path: {input_path}")
-            logger.info(f"📝 Input type: {type(input_path)}")
-
-            try:
-                # Parse input data
-                input_data = None
-
-                # Check if input is base64 encoded (from NestJS)
-                import re
-
-                if (
-                    re.match(r"^[A-Za-z0-9+/]*={0,2}$", input_path)
-                    and len(input_path) > 20
-                ):
-                    try:
-                        # Decode base64
-                        decoded_json = base64.b64decode(input_path).decode("utf-8")
-                        input_data = json.loads(decoded_json)
-                        logger.info(f"📝 Decoded base64 input from NestJS")
-                        logger.info(f"📝 Parsed data: {input_data}")
-                    except (
-                        base64.binascii.Error,
-                        json.JSONDecodeError,
-                        UnicodeDecodeError,
-                    ):
-                        # Not base64, treat as raw JSON
-                        logger.info(f"📝 Not base64, treating as raw JSON")
-                        input_data = None
-
-                if input_data is None:
-                    # Handle raw JSON input
-                    if isinstance(input_path, str):
-                        # If it looks like JSON but missing quotes, try to fix it
-                        if input_path.startswith("{") and not input_path.startswith(
-                            '{"'
-                        ):
-                            # Fix common command line quote stripping
-                            fixed_json = re.sub(r"(\w+):", r'"\1":', input_path)
-                            fixed_json = re.sub(r":(\w+)", r':"\1"', fixed_json)
-                            logger.info(f"📝 Fixed JSON: {fixed_json}")
-                            input_data = json.loads(fixed_json)
-                        else:
-                            input_data = json.loads(input_path)
-                    else:
-                        # Create JSON object
-                        input_data = {"content": str(input_path)}
-
-                # Create temporary file with input data
-                temp_dir = "data_pipeline/temp"
-                os.makedirs(temp_dir, exist_ok=True)
-                temp_file_path = f"{temp_dir}/manual_input_{data_source_id}.json"
-
-                with open(temp_file_path, "w", encoding="utf-8") as f:
-                    json.dump(input_data, f, ensure_ascii=False, indent=2)
-
-                logger.info(f"📄 Created temporary input file: {temp_file_path}")
-
-                # Call processor with file method
-                command = f'python data_pipeline/processors/manual_processor.py --file "{temp_file_path}" "{data_source_id}"'
-                description = f"Manual Input Processing - DataSource {data_source_id}"
-
-                if not run_command(command, description):
-                    return False
-
-            except Exception as e:
-                logger.error(f"📝 Error processing manual input: {e}")
-                return False
-
-            # CSV file should be created by manual processor
-            csv_file = f"data_pipeline/processed_data/manual_{data_source_id}.csv"
+    if data_type not in DATA_TYPES:
+        logger.error(f"Unsupported data type: {data_type}")
+        return False
 
-        else:
-            logger.error(f"Unsupported data type: {data_type}")
-            return False
+    job = PipelineJob(data_source_id, data_type, input_path)
+    PipelineRunner(concurrency=1).run_sync([job])
+    log_job_summary([job])
 
-        # Step 2: Upload to vector store
-        command = f'python scripts/seed.py "{csv_file}" "{data_source_id}"'
-        description = f"Vector Store Upload - {os.path.basename(csv_file)}"
+    if job.status != "completed":
+        logger.error(f"❌ Pipeline failed for DataSource {data_source_id}: {job.error}")
+        return False
 
-        if not run_command(command, description):
-            return False
+    last_success_output = (
+        f"SUCCESS: Uploaded {job.documents_count} documents and "
+        f"{job.vectors_count} vectors to Pinecone"
+    )
+    return True
 
-        logger.success(
-            f"🎊 Pipeline completed successfully for DataSource: {data_source_id}"
-        )
-        return True
 
-    except Exception as e:
-        logger.error(f"Pipeline failed for DataSource {data_source_id}: {e}")
+def run_jobs_file(jobs_path: str) -> bool:
+    """Run every data source listed in a JSON file through one shared runner
+
+    The file holds a list of {"data_source_id", "data_type", "input_path"}
+    objects (optional "force", "max_pages").
+    """
+    with open(jobs_path, "r", encoding="utf-8") as f:
+        jobs = [PipelineJob(**entry) for entry in json.load(f)]
+
+    invalid = [job.data_source_id for job in jobs if job.data_type not in DATA_TYPES]
+    if invalid:
+        logger.error(f"Invalid data type for DataSources: {invalid}")
         return False
 
+    logger.info(f"📦 Running {len(jobs)} data sources from {jobs_path}")
+    start_time = time.perf_counter()
+    PipelineRunner().run_sync(jobs)
+    log_job_summary(jobs)
+
+    for job in jobs:
+        if job.status == "completed":
+            print(
+                f"SUCCESS: {job.data_source_id} Uploaded {job.documents_count} "
+                f"documents and {job.vectors_count} vectors"
+            )
+        else:
+            print(f"ERROR: {job.data_source_id} {job.error}")
+
+    logger.info(f"⏱️ Duration: {time.perf_counter() - start_time:.2f}s")
+    return all(job.status == "completed" for job in jobs)
+
 
 def run_full_pipeline():
     """Run complete pipeline for all data sources (legacy mode)"""
@@ -194,14 +101,23 @@ def run_full_pipeline():
     logger.info(f"⏰ Started at: {start_time}")
     logger.info("=" * 60)
 
-    # Pipeline steps for full pipeline
+    # Sample university website, then the legacy CSV seed
+    job = PipelineJob("example_id", "website", "https://donga.edu.vn/tuyensinh")
+    runner = PipelineRunner(concurrency=1)
+
+    def seed_legacy():
+        from scripts.seed import seed_data
+
+        seed_data()
+        return True
+
     steps = [
         {
-            "command": "python data_pipeline/crawlers/scraper.py https://donga.edu.vn/tuyensinh example_id",
+            "run": lambda: runner.run_sync([job])[0].status == "completed",
             "description": "Web Crawling - Sample university website",
         },
         {
-            "command": "python scripts/seed.py",
+            "run": seed_legacy,
             "description": "Vector Store Seeding - Legacy mode",
         },
     ]
@@ -211,16 +127,20 @@ def run_full_pipeline():
 
     for i, step in enumerate(steps, 1):
         logger.info(f"\n📊 Step {i}/{total_steps}")
+        logger.info(f"🚀 {step['description']}")
 
-        if run_command(step["command"], step["description"]):
+        try:
+            succeeded = step["run"]()
+        except Exception as e:
+            logger.error(f"❌ {step['description']} - ERROR: {e}")
+            succeeded = False
+
+        if succeeded:
+            logger.success(f"✅ {step['description']} - COMPLETED")
             success_count += 1
         else:
             logger.warning(f"⚠️ Step {i} failed, continuing with next step...")
 
-        # Wait between steps
-        if i < total_steps:
-            time.sleep(2)
-
     # Summary
     end_time = datetime.now()
     duration = end_time - start_time
@@ -248,6 +168,7 @@ def main():
     """Main pipeline runner"""
     global last_success_output
     last_success_output = ""
+    configure_torch_threads()
 
     if len(sys.argv) == 1:
         # Full pipeline mode (legacy)
@@ -255,9 +176,15 @@ def main():
         success = run_full_pipeline()
         sys.exit(0 if success else 1)
 
+    if len(sys.argv) == 3 and sys.argv[1] == "--jobs":
+        # Many data sources, processed concurrently with shared models
+        success = run_jobs_file(sys.argv[2])
+        sys.exit(0 if success else 1)
+
     if len(sys.argv) != 4:
         print("Usage:")
         print("  python run_data_pipeline.py <data_source_id> <data_type> <input_path>")
+        print("  python run_data_pipeline.py --jobs <jobs.json>")
         print("  python run_data_pipeline.py (for full pipeline)")
         print("")
         print("Data types: website, pdf, csv, manual")
@@ -297,10 +224,13 @@ def main():
 if __name__ == "__main__":
     # Configure logging
     logger.remove()
+    # Stages now log in this process; keep their detail in the log file so the
+    # backend (which scans stderr for "error"/"failed") only sees our summary
     logger.add(
         sys.stderr,
         level="INFO",
         format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}",
+        filter=lambda record: record["name"] == "__main__",
     )
 
     # Ensure logs directory exists
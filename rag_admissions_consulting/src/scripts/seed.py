@@ -7,16 +7,26 @@ Uploads processed data to Pinecone vector store
 import sys
 import os
 import csv
+import uuid
 from pathlib import Path
 from loguru import logger
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from infrastructure.store import store
+from infrastructure.bm25_index import bm25_index
+from infrastructure.embedding_pipeline import close_batch_embedders, configure_torch_threads
+from infrastructure.seed_manifest import SeedManifest, chunk_id
+from core.answer_cache import invalidate_data_source
+from core.query_analyzer import CATEGORY_FIELD, QueryAnalyzer
 from shared.helper import helper
 from infrastructure.embeddings import embeddings
 from shared.enum import ModelType, FileDataType
 
+# Bump when the metadata written on chunks changes so indexed chunks are re-uploaded
+# 1: category tags
+CHUNK_METADATA_VERSION = 1
+
 
 def update_backend_status(
     data_source_id: str,
@@ -57,7 +67,127 @@ def load_processed_csv_data(csv_path: str) -> list:
         raise
 
 
-def seed_data_from_csv(csv_path: str, data_source_id: str):
+def tag_categories(chunks: list):
+    """Tag chunks with the categories retrieval filters on (program, fees, ...)"""
+    analyzer = QueryAnalyzer()
+    for chunk in chunks:
+        categories = analyzer.categorize_text(chunk.page_content)
+        if categories:
+            chunk.metadata[CATEGORY_FIELD] = categories
+
+
+def seed_texts(
+    texts: list,
+    data_source_id: str,
+    source: str,
+    force: bool = False,
+    embeddings_model=None,
+):
+    """Seed already-processed texts of a data source to the vector store
+
+    Only chunks that are not yet in the data source's manifest are embedded
+    and upserted; chunks that disappeared are deleted. `force` re-uploads
+    everything (safe: chunk IDs are deterministic). Pass `embeddings_model`
+    to reuse a model that is already loaded.
+    """
+    if not texts:
+        raise Exception("No data found to seed")
+
+    from langchain.schema import Document
+
+    # Convert text strings to Document objects first
+    documents = []
+    for i, text in enumerate(texts):
+        doc = Document(
+            page_content=text,
+            metadata={
+                "source": source,
+                "data_source_id": data_source_id,
+                "original_chunk_index": i,
+            },
+        )
+        documents.append(doc)
+
+    logger.info(f"Created {len(documents)} initial documents")
+
+    # Use helper to split text into optimal chunks
+    text_chunks = helper.text_split(documents)
+
+    # Update metadata for split chunks
+    for i, chunk in enumerate(text_chunks):
+        chunk.metadata.update(
+            {
+                "chunk_index": i,
+            }
+        )
+    tag_categories(text_chunks)
+
+    logger.info(
+        f"Created {len(text_chunks)} document chunks from {len(texts)} original text(s)"
+    )
+
+    # Deterministic IDs: same text in the same data source -> same vector
+    chunks_by_id = {}
+    for chunk in text_chunks:
+        chunks_by_id.setdefault(chunk_id(data_source_id, chunk.page_content), chunk)
+
+    manifest = SeedManifest(data_source_id, store.index_name)
+    added_ids, removed_ids = manifest.diff(chunks_by_id)
+    if manifest.ids and manifest.metadata_version < CHUNK_METADATA_VERSION:
+        logger.info("🏷️ Chunk metadata changed since last seed, re-uploading all chunks")
+        force = True
+    if force:
+        added_ids = list(chunks_by_id)
+    logger.info(
+        f"🔍 Manifest diff: {len(added_ids)} new/changed, "
+        f"{len(removed_ids)} removed, "
+        f"{len(chunks_by_id) - len(added_ids)} unchanged chunks"
+    )
+
+    # Get embeddings model
+    if embeddings_model is None:
+        embeddings_model = embeddings.get_embeddings(ModelType.HUGGINGFACE)
+
+    # Upload only new or changed chunks; vectors are produced and upserted
+    # one embedding window at a time
+    if added_ids:
+        logger.info(f"📤 Uploading {len(added_ids)} chunks to vector store...")
+        store.uploadToStore(
+            (chunks_by_id[row_id] for row_id in added_ids),
+            embeddings_model,
+            ids=added_ids,
+        )
+
+    # Delete chunks that are no longer in the data source
+    if removed_ids:
+        logger.info(f"🗑️ Deleting {len(removed_ids)} stale chunks...")
+        store.deleteFromStore(removed_ids, embeddings_model)
+
+    # Mirror the vector store in the keyword index; chunks seeded before it
+    # existed are backfilled without re-embedding
+    keyword_ids = set(added_ids).union(
+        row_id for row_id in chunks_by_id if row_id not in bm25_index
+    )
+    if keyword_ids:
+        keyword_ids = sorted(keyword_ids)
+        bm25_index.upsert(
+            keyword_ids,
+            [chunks_by_id[row_id].page_content for row_id in keyword_ids],
+            [chunks_by_id[row_id].metadata for row_id in keyword_ids],
+        )
+    if removed_ids:
+        bm25_index.delete(removed_ids)
+
+    manifest.save(chunks_by_id, CHUNK_METADATA_VERSION)
+
+    # Cached chat answers built from this data source are now stale
+    if added_ids or removed_ids:
+        invalidate_data_source(data_source_id)
+
+    return len(texts), len(chunks_by_id)
+
+
+def seed_data_from_csv(csv_path: str, data_source_id: str, force: bool = False):
     """Seed data to vector store from processed CSV"""
     try:
         logger.info(f"🚀 Starting vector store upload for DataSource: {data_source_id}")
@@ -72,49 +202,10 @@ def seed_data_from_csv(csv_path: str, data_source_id: str):
         if not extracted_data:
             raise Exception("No data found in CSV file")
 
-        # Use existing helper for text chunking
-        from langchain.schema import Document
-
-        # Convert text strings to Document objects first
-        documents = []
-        for i, text in enumerate(extracted_data):
-            doc = Document(
-                page_content=text,
-                metadata={
-                    "source": os.path.basename(csv_path),
-                    "data_source_id": data_source_id,
-                    "original_chunk_index": i,
-                },
-            )
-            documents.append(doc)
-
-        logger.info(f"Created {len(documents)} initial documents")
-
-        # Use helper to split text into optimal chunks
-        text_chunks = helper.text_split(documents)
-
-        # Update metadata for split chunks
-        for i, chunk in enumerate(text_chunks):
-            chunk.metadata.update(
-                {
-                    "chunk_index": i,
-                }
-            )
-
-        logger.info(
-            f"Created {len(text_chunks)} document chunks from {len(extracted_data)} original text(s)"
+        documents_count, vectors_count = seed_texts(
+            extracted_data, data_source_id, os.path.basename(csv_path), force
         )
 
-        # Get embeddings model
-        embeddings_model = embeddings.get_embeddings(ModelType.HUGGINGFACE)
-
-        # Upload to Pinecone
-        logger.info(f"📤 Uploading {len(text_chunks)} chunks to vector store...")
-        store.uploadToStore(text_chunks, embeddings_model)
-
-        documents_count = len(extracted_data)
-        vectors_count = len(text_chunks)
-
         logger.success(f"✅ Successfully uploaded to vector store!")
         logger.info(f"📊 Documents processed: {documents_count}")
         logger.info(f"🔢 Vectors created: {vectors_count}")
@@ -147,31 +238,40 @@ def seed_data(type: FileDataType = FileDataType.CSV):
         raise Exception("Invalid file type")
 
     text_chunks = helper.text_split(extracted_data)
+    tag_categories(text_chunks)
 
     # embeddings
     embeddings_model = embeddings.get_embeddings(ModelType.HUGGINGFACE)
 
     # upload to pinecone
-    store.uploadToStore(text_chunks, embeddings_model)
+    ids = [str(uuid.uuid4()) for _ in text_chunks]
+    store.uploadToStore(text_chunks, embeddings_model, ids=ids)
+    bm25_index.upsert(
+        ids,
+        [chunk.page_content for chunk in text_chunks],
+        [chunk.metadata for chunk in text_chunks],
+    )
 
     logger.info("Uploaded to pinecone")
 
 
 def main():
     """Main seeding function"""
+    configure_torch_threads()
     if len(sys.argv) == 1:
         # Legacy mode - for backward compatibility
         logger.info("Running in legacy mode")
         seed_data(FileDataType.CSV)
         return
 
-    if len(sys.argv) != 3:
-        print("Usage: python seed.py <csv_file_path> <data_source_id>")
+    if len(sys.argv) not in (3, 4) or (len(sys.argv) == 4 and sys.argv[3] != "--force"):
+        print("Usage: python seed.py <csv_file_path> <data_source_id> [--force]")
         print("   or: python seed.py (for legacy mode)")
         sys.exit(1)
 
     csv_path = sys.argv[1]
     data_source_id = sys.argv[2]
+    force = len(sys.argv) == 4
 
     logger.info(f"🌱 Starting vector store seeding")
     logger.info(f"📄 CSV file: {csv_path}")
@@ -187,7 +287,9 @@ def main():
             raise Exception(f"File must be a CSV file: {csv_path}")
 
         # Seed data to vector store
-        documents_count, vectors_count = seed_data_from_csv(csv_path, data_source_id)
+        documents_count, vectors_count = seed_data_from_csv(
+            csv_path, data_source_id, force
+        )
 
         # Output results for backend to capture
         print(
@@ -200,6 +302,9 @@ def main():
         print(f"ERROR: {error_msg}")
         sys.exit(1)
 
+    finally:
+        close_batch_embedders()
+
 
 if __name__ == "__main__":
     main()
@@ -1,10 +1,11 @@
 import uuid
-from typing import List, Dict, Any, AsyncGenerator, Tuple
+from typing import Dict, Any, AsyncGenerator, Tuple
 from loguru import logger
 import asyncio
 
 from core.app_manager import app_manager
 from core.context_cache import context_cache
+from core.tracing import tracer
 from shared.enum import RoleType
 
 
@@ -56,36 +57,46 @@ class ChatService:
         self, message: str
     ) -> AsyncGenerator[Dict[str, Any], None]:
         """Process user message and stream response with context awareness"""
+        trace = tracer.start_request()
+        full_response = ""
+        # Stays "cancelled" if the client disconnects mid-stream
+        status = "cancelled"
         try:
-            # Add user message to context
-            await self.context_manager.add_message(RoleType.USER, message)
+            with tracer.span("context_load"):
+                # Another worker may have answered since we last saw this conversation
+                await self.context_manager.sync_from_shared_store()
 
-            # Get conversation context for better understanding
-            context_messages = await self.context_manager.get_context_messages()
+                # Add user message to context
+                await self.context_manager.add_message(RoleType.USER, message)
 
-            # Analyze message intent and context
-            enhanced_query = await self._enhance_query_with_context(
-                message, context_messages
-            )
-
-            logger.info(f"Processing enhanced query: {enhanced_query[:100]}...")
+                # Get conversation context for better understanding
+                context_messages = await self.context_manager.get_context_messages()
 
-            # Generate streaming response
-            full_response = ""
+            # Generate streaming response; the engine rewrites follow-up
+            # questions into standalone search queries
             async for token in self.rag_engine.generate_response_stream(
-                query=enhanced_query,
+                query=message,
                 original_query=message,
                 context_messages=context_messages,
+                conversation_summary=self.context_manager.summary,
             ):
+                trace.token()
                 full_response += token
                 yield {"delta": token, "conversation_id": self.conversation_id}
 
             # Add assistant response to context
             await self.context_manager.add_message(RoleType.ASSISTANT, full_response)
+            status = "ok"
+
+            # Fold older turns into the rolling summary after the reply is out
+            self.context_manager.schedule_summary(
+                self.rag_engine.conversation_summarizer
+            )
 
             logger.info(f"Response completed for conversation: {self.conversation_id}")
 
         except Exception as e:
+            status = "error"
             logger.error(f"Error in process_message_stream: {e}")
             error_message = (
                 "Xin lỗi, tôi đang gặp sự cố kỹ thuật. Vui lòng thử lại sau."
@@ -96,36 +107,8 @@ class ChatService:
 
             yield {"delta": error_message, "conversation_id": self.conversation_id}
 
-    async def _enhance_query_with_context(
-        self, current_message: str, context_messages: List[Dict]
-    ) -> str:
-        """Enhance current query with conversation context for better understanding"""
-        if not context_messages:
-            return current_message
-
-        # Get recent context (last 3 exchanges)
-        recent_context = (
-            context_messages[-6:] if len(context_messages) > 6 else context_messages
-        )
-
-        # Build context-aware query
-        context_summary = []
-        for msg in recent_context:
-            role = "Người dùng" if msg["role"] == RoleType.USER else "Tư vấn viên"
-            context_summary.append(f"{role}: {msg['content'][:100]}...")
-
-        if context_summary:
-            enhanced_query = f"""
-Ngữ cảnh cuộc trò chuyện gần đây:
-{chr(10).join(context_summary)}
-
-Câu hỏi hiện tại: {current_message}
-
-Hãy trả lời câu hỏi hiện tại với sự hiểu biết về ngữ cảnh cuộc trò chuyện trước đó.
-"""
-            return enhanced_query
-
-        return current_message
+        finally:
+            trace.finish(full_response, self.rag_engine.context_assembler.counter, status)
 
     async def get_conversation_summary(self) -> str:
         """Get a summary of the current conversation"""
@@ -1,15 +1,318 @@
 from loguru import logger
 import httpx
 import asyncio
+import json
 import uuid
 import os
 import re
 from typing import List, Dict, Any, Optional
+from infrastructure.file_lock import file_lock
 from .enum import RoleType
 
 # Cấu hình URL API
 API_BASE_URL = os.environ.get("API_BASE_URL", "http://localhost:5000/api/v1")
 CHAT_API_URL = f"{API_BASE_URL}/chatbots/history"
+CHAT_BATCH_API_URL = f"{CHAT_API_URL}/batch"
+
+# Cấu hình ghi lịch sử theo lô
+HISTORY_BATCH_SIZE = int(os.environ.get("HISTORY_BATCH_SIZE", "20"))
+HISTORY_FLUSH_INTERVAL = float(os.environ.get("HISTORY_FLUSH_INTERVAL_SECONDS", "0.5"))
+HISTORY_QUEUE_SIZE = int(os.environ.get("HISTORY_QUEUE_SIZE", "5000"))
+HISTORY_MAX_RETRIES = int(os.environ.get("HISTORY_MAX_RETRIES", "3"))
+HISTORY_SPILL_PATH = os.environ.get(
+    "HISTORY_SPILL_PATH", "./data/history_spill.jsonl"
+)
+
+
+class HistorySaveError(Exception):
+    """The history API failed part-way through a batch; the rest can be retried"""
+
+
+def _is_rejected(status_code: int) -> bool:
+    """4xx other than timeout / rate limit: resending the same message cannot succeed"""
+    return 400 <= status_code < 500 and status_code not in (408, 429)
+
+
+class HistoryWriter:
+    """Process-wide writer: one pooled HTTP client, batched saves to the history API
+
+    Messages go through a bounded asyncio.Queue and are flushed when a batch
+    is full or the flush interval passes. Failed batches are retried with
+    exponential backoff, resending only what the API has not saved yet, then
+    spilled to this process's own JSONL file next to `spill_path`. Spill files
+    of any worker are replayed the next time a writer starts. Messages the
+    API rejects as invalid are logged and dropped instead of retried.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = HISTORY_BATCH_SIZE,
+        flush_interval: float = HISTORY_FLUSH_INTERVAL,
+        queue_size: int = HISTORY_QUEUE_SIZE,
+        max_retries: int = HISTORY_MAX_RETRIES,
+        spill_path: str = HISTORY_SPILL_PATH,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue_size = queue_size
+        self.max_retries = max_retries
+        self.spill_path = spill_path
+        self._transport = transport
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._batch_supported = True
+        self.stats = {"saved": 0, "requests": 0, "retries": 0, "spilled": 0, "dropped": 0}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared keep-alive client (recreated if the event loop changed)"""
+        self._bind_loop()
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=5.0,
+                limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+                transport=self._transport,
+            )
+        return self._client
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Queue, worker and client are tied to the loop that created them
+            self._loop = loop
+            self._client = None
+            self._queue = None
+            self._worker = None
+
+    def _ensure_started(self):
+        self._bind_loop()
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    def enqueue(self, message_data: Dict[str, Any]):
+        """Queue a message without blocking; spills to disk when full or no loop"""
+        try:
+            self._ensure_started()
+            self._queue.put_nowait(message_data)
+        except RuntimeError:
+            # No running event loop
+            self._spill([message_data])
+        except asyncio.QueueFull:
+            logger.warning("History queue full, spilling message to disk")
+            self._spill([message_data])
+
+    async def _run(self):
+        await self._replay_spill()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Counted before sending: every get() needs exactly one task_done()
+            dequeued = len(batch)
+            try:
+                await self._send_with_retry(batch)
+            finally:
+                for _ in range(dequeued):
+                    self._queue.task_done()
+
+    async def _send_with_retry(
+        self, batch: List[Dict[str, Any]], spill: bool = True
+    ) -> List[Dict[str, Any]]:
+        """Save `batch`; returns (and by default spills) what could not be saved"""
+        # Own copy: _send drops messages from it as they are saved
+        pending = list(batch)
+        for attempt in range(self.max_retries + 1):
+            try:
+                await self._send(pending)
+                logger.debug(f"Saved {len(batch)} messages to history API")
+                return []
+            except Exception as e:
+                if attempt == self.max_retries:
+                    logger.warning(f"Error saving {len(pending)} history messages: {e}")
+                    if spill:
+                        self._spill(pending)
+                    return pending
+                self.stats["retries"] += 1
+                await asyncio.sleep(min(0.5 * 2**attempt, 10.0))
+        return pending
+
+    def _drop(self, message_data: Dict[str, Any], status_code: int, reason: str):
+        self.stats["dropped"] += 1
+        logger.error(
+            f"History API rejected a message ({status_code}: {reason}), dropping it: "
+            f"{message_data}"
+        )
+
+    async def _send(self, pending: List[Dict[str, Any]]):
+        """Save `pending`, removing each message from it once the API has it"""
+        while pending and self._batch_supported:
+            self.stats["requests"] += 1
+            response = await self.client.post(
+                CHAT_BATCH_API_URL, json={"messages": pending}
+            )
+            if response.status_code in (404, 405):
+                # Older backend without the batch endpoint
+                logger.info("History batch endpoint unavailable, saving one by one")
+                self._batch_supported = False
+                break
+            if _is_rejected(response.status_code):
+                # Validation covers the whole batch; find the bad message one by one
+                break
+            response.raise_for_status()
+
+            result = response.json()
+            if isinstance(result, list):
+                # Older backend: a success response means the whole batch was saved
+                result = {"saved": pending}
+            saved = len(result.get("saved", []))
+            self.stats["saved"] += saved
+            del pending[:saved]
+            failed = result.get("failed")
+            if not failed:
+                pending.clear()
+                return
+            if not _is_rejected(failed.get("status", 500)):
+                raise HistorySaveError(
+                    f"history batch stopped after {saved} messages: {failed.get('message')}"
+                )
+            self._drop(pending.pop(0), failed["status"], failed.get("message"))
+
+        while pending:
+            self.stats["requests"] += 1
+            response = await self.client.post(CHAT_API_URL, json=pending[0])
+            if _is_rejected(response.status_code):
+                self._drop(pending[0], response.status_code, response.text)
+            else:
+                response.raise_for_status()
+                self.stats["saved"] += 1
+            # A retry resends only what has not been saved yet
+            del pending[0]
+
+    @property
+    def worker_spill_path(self) -> str:
+        """This process's spill file: workers never append to each other's"""
+        stem, ext = os.path.splitext(self.spill_path)
+        return f"{stem}.{os.getpid()}{ext}"
+
+    def _spill(self, messages: List[Dict[str, Any]]):
+        path = self.worker_spill_path
+        try:
+            # Held only while appending; a replaying writer takes it to claim the file
+            with file_lock(path):
+                with open(path, "a", encoding="utf-8") as f:
+                    for message_data in messages:
+                        f.write(json.dumps(message_data, ensure_ascii=False) + "\n")
+            self.stats["spilled"] += len(messages)
+        except Exception as e:
+            logger.error(f"Failed to spill {len(messages)} history messages: {e}")
+
+    @staticmethod
+    def _write_spill(path: str, messages: List[Dict[str, Any]]):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for message_data in messages:
+                f.write(json.dumps(message_data, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, path)
+
+    def _spill_files(self, claimed: bool) -> List[str]:
+        """Spill files of every worker (`claimed`: those taken over for replay)"""
+        directory = os.path.dirname(os.path.abspath(self.spill_path))
+        stem, ext = os.path.splitext(os.path.basename(self.spill_path))
+        try:
+            names = sorted(os.listdir(directory))
+        except OSError:
+            return []
+        paths = []
+        for name in names:
+            if not name.endswith(ext) or not (
+                name == stem + ext or name.startswith(stem + ".")
+            ):
+                continue
+            if name.startswith(stem + ".replay-") == claimed:
+                paths.append(os.path.join(directory, name))
+        return paths
+
+    async def _replay_spill(self):
+        """Send messages left over from a previous failure or shutdown"""
+        stem, ext = os.path.splitext(self.spill_path)
+        # Take over spill files under their lock so no worker is mid-append
+        for path in self._spill_files(claimed=False):
+            try:
+                with file_lock(path):
+                    os.replace(path, f"{stem}.replay-{uuid.uuid4().hex}{ext}")
+            except OSError as e:
+                logger.warning(f"Failed to claim history spill file {path}: {e}")
+
+        # Also picks up replays that a crashed worker left half done
+        for path in self._spill_files(claimed=True):
+            try:
+                with file_lock(path, blocking=False):
+                    await self._replay_file(path)
+            except BlockingIOError:
+                continue  # another worker is replaying it
+            except Exception as e:
+                logger.warning(f"Failed to replay history spill file {path}: {e}")
+
+    async def _replay_file(self, path: str):
+        if not os.path.exists(path):
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            messages = [json.loads(line) for line in f if line.strip()]
+
+        logger.info(f"Replaying {len(messages)} spilled history messages")
+        while messages:
+            unsent = await self._send_with_retry(messages[: self.batch_size], spill=False)
+            messages = unsent + messages[self.batch_size :]
+            if unsent:
+                # API still down: keep the rest for the next start
+                self._write_spill(path, messages)
+                return
+            # Rewritten as it goes, so a crash resends at most one batch
+            self._write_spill(path, messages)
+        os.remove(path)
+        try:
+            os.remove(path + ".lock")
+        except OSError:
+            pass
+
+    async def close(self):
+        """Flush queued messages and release the client (call on shutdown)"""
+        if self._queue is not None and self._worker is not None:
+            if not self._worker.done():
+                await self._queue.join()
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+        self._queue = None
+        self._worker = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            **self.stats,
+        }
+
+
+# Global instance
+history_writer = HistoryWriter()
 
 
 class ChatHistoryManager:
@@ -35,10 +338,6 @@ class ChatHistoryManager:
         # Cache cho tin nhắn trong phiên hiện tại
         self._current_session_messages = []
 
-        # Queue for background message saving
-        self._save_queue: List[Dict[str, Any]] = []
-        self._processing_queue = False
-
     def _is_guest_user(self, email: str) -> bool:
         """Kiểm tra xem có phải guest user không"""
         return email.startswith("guest-")
@@ -81,49 +380,12 @@ class ChatHistoryManager:
                 f"🔧 DEBUG: Sending REGISTERED user message: userId={self.user_id}, no guestId"
             )
 
-        # Add to save queue for background processing
-        self._save_queue.append(message_data)
+        # Batched background save through the shared writer
+        history_writer.enqueue(message_data)
         logger.info(f"🔧 DEBUG: Message data queued: {message_data}")
 
-        # Process queue in background (fire-and-forget)
-        asyncio.create_task(self._process_save_queue())
-
         logger.debug(f"Message added to cache and queued for saving: {role}")
 
-    async def _process_save_queue(self):
-        """Background task to save messages to backend"""
-        if self._processing_queue or not self._save_queue:
-            return
-
-        self._processing_queue = True
-
-        try:
-            # Process all queued messages
-            while self._save_queue:
-                message_data = self._save_queue.pop(0)
-
-                try:
-                    # Use async HTTP client
-                    async with httpx.AsyncClient(timeout=5.0) as client:
-                        response = await client.post(CHAT_API_URL, json=message_data)
-
-                        if 200 <= response.status_code < 300:
-                            result = response.json()
-                            logger.debug(
-                                f"Message saved: {result.get('id', 'unknown')}"
-                            )
-                        else:
-                            logger.warning(
-                                f"Failed to save message: HTTP {response.status_code}"
-                            )
-
-                except Exception as e:
-                    logger.warning(f"Error saving message (will retry): {str(e)}")
-                    # Could implement retry logic here
-
-        finally:
-            self._processing_queue = False
-
     async def get_conversation_context_async(
         self, limit: int = 10
     ) -> List[Dict[str, Any]]:
@@ -148,18 +410,19 @@ class ChatHistoryManager:
                 "orderDirection": "ASC",
             }
 
-            async with httpx.AsyncClient(timeout=3.0) as client:  # Fast timeout
-                response = await client.get(CHAT_API_URL, params=params)
-
-                if 200 <= response.status_code < 300:
-                    result = response.json()
-                    if "data" in result and result["data"]:
-                        messages = [
-                            {"role": msg["role"], "content": msg["content"]}
-                            for msg in result["data"]
-                        ]
-                        logger.info(f"Retrieved {len(messages)} messages from API")
-                        return messages
+            response = await history_writer.client.get(
+                CHAT_API_URL, params=params, timeout=3.0  # Fast timeout
+            )
+
+            if 200 <= response.status_code < 300:
+                result = response.json()
+                if "data" in result and result["data"]:
+                    messages = [
+                        {"role": msg["role"], "content": msg["content"]}
+                        for msg in result["data"]
+                    ]
+                    logger.info(f"Retrieved {len(messages)} messages from API")
+                    return messages
 
         except Exception as e:
             logger.debug(f"API unavailable, using cache: {str(e)}")
@@ -0,0 +1,94 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import multiprocessing
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from config.settings import settings
+from core.answer_cache import SemanticAnswerCache, invalidate_data_source
+
+
+def make_cache(invalidation_path):
+    return SemanticAnswerCache(
+        similarity_threshold=0.95,
+        max_entries=10,
+        ttl_seconds=3600,
+        invalidation_path=invalidation_path,
+    )
+
+
+def test_near_duplicate_questions_hit():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = make_cache(os.path.join(tmp, "invalidations.json"))
+        cache.store("học phí bao nhiêu", [1.0, 0.0, 0.1], "Học phí là 12 triệu.", {"ds1"})
+
+        assert cache.lookup([0.99, 0.01, 0.1]) == "Học phí là 12 triệu."
+        assert cache.lookup([0.0, 1.0, 0.0]) is None
+        assert cache.get_stats()["hits"] == 1
+        assert "".join(cache.replay_tokens("Học phí là 12 triệu.")) == "Học phí là 12 triệu."
+
+
+def test_reseeding_invalidates_cited_sources_only():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "invalidations.json")
+        cache = make_cache(path)
+        cache.store("học phí", [1.0, 0.0], "A", {"ds1"})
+        cache.store("ký túc xá", [0.0, 1.0], "B", {"ds2"})
+
+        time.sleep(0.01)
+        invalidate_data_source("ds1", path)
+
+        assert cache.lookup([1.0, 0.0]) is None
+        assert cache.lookup([0.0, 1.0]) == "B"
+        assert cache.get_stats()["invalidated"] == 1
+
+
+def invalidate_many(path, ids):
+    for data_source_id in ids:
+        invalidate_data_source(data_source_id, path)
+
+
+def test_concurrent_invalidations_are_all_recorded():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "invalidations.json")
+        ids = [f"ds{i}" for i in range(40)]
+        # Seeds run concurrently in the pipeline runner's threads...
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(lambda ds: invalidate_data_source(ds, path), ids))
+        # ...and in separate processes (seed.py CLI, ingestion worker)
+        process_ids = [[f"p{worker}-{i}" for i in range(25)] for worker in range(3)]
+        with ProcessPoolExecutor(
+            max_workers=3, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            list(pool.map(invalidate_many, [path] * 3, process_ids))
+
+        with open(path, "r", encoding="utf-8") as f:
+            assert sorted(json.load(f)) == sorted(ids + sum(process_ids, []))
+        assert sorted(os.listdir(tmp)) == ["invalidations.json", "invalidations.json.lock"]
+
+
+def test_personality_change_bypasses_old_answers():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = make_cache(os.path.join(tmp, "invalidations.json"))
+        previous = settings.personality.personality
+        cache.store("học phí", [1.0, 0.0], "A", set())
+        try:
+            settings.personality.personality = "Humorous" if previous != "Humorous" else "Formal"
+            assert cache.lookup([1.0, 0.0]) is None
+        finally:
+            settings.personality.personality = previous
+        assert cache.lookup([1.0, 0.0]) == "A"
+
+
+if __name__ == "__main__":
+    test_near_duplicate_questions_hit()
+    test_reseeding_invalidates_cited_sources_only()
+    test_concurrent_invalidations_are_all_recorded()
+    test_personality_change_bypasses_old_answers()
+    print("✅ Answer cache tests passed")
@@ -0,0 +1,110 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempfile
+import threading
+import timeit
+
+from infrastructure.bm25_index import BM25Index, tokenize
+
+CHUNKS = {
+    "a": (
+        "Điểm chuẩn 2025 ngành Công nghệ thông tin (mã 7480201) là 18 điểm",
+        {"categories": ["program", "process"]},
+    ),
+    "b": ("Điểm chuẩn 2024 ngành Điều dưỡng là 19 điểm", {"categories": ["program", "process"]}),
+    "c": ("Học phí năm 2025 là 12.500.000 đồng mỗi học kỳ", {"categories": ["fees"]}),
+    "d": (
+        "Ký túc xá có 500 chỗ, chi phí 400.000 đồng mỗi tháng",
+        {"categories": ["campus", "fees"]},
+    ),
+}
+
+
+def build(path):
+    index = BM25Index(path)
+    ids = list(CHUNKS)
+    index.upsert(ids, [CHUNKS[i][0] for i in ids], [CHUNKS[i][1] for i in ids])
+    return index
+
+
+def test_tokenizer_keeps_compounds_and_numbers():
+    tokens = tokenize("Điểm chuẩn của ngành 7480201 năm 2025")
+    assert "điểm_chuẩn" in tokens and "7480201" in tokens and "2025" in tokens
+    assert "của" not in tokens
+    # Decomposed input (e.g. from PDFs) tokenizes like precomposed text
+    assert tokenize("Học phí") == tokenize("Học phí")
+
+
+def test_exact_terms_rank_first():
+    with tempfile.TemporaryDirectory() as tmp:
+        index = build(os.path.join(tmp, "index.json"))
+        assert index.search("điểm chuẩn 2025", k=1)[0][0] == "a"
+        assert index.search("mã ngành 7480201", k=1)[0][0] == "a"
+        assert index.search("học phí 2025", k=1)[0][0] == "c"
+        assert index.search("xin chào", k=3) == []
+
+
+def test_filter_delete_and_reload():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.json")
+        index = build(path)
+        hits = index.search("đồng mỗi", k=5, filter={"categories": {"$in": ["campus"]}})
+        assert [doc_id for doc_id, _ in hits] == ["d"]
+
+        index.delete(["a"])
+        assert "a" not in index and len(index) == 3
+        # Another process (the API) sees the same index
+        reopened = BM25Index(path)
+        assert [doc_id for doc_id, _ in reopened.search("điểm chuẩn", k=5)] == ["b"]
+        assert reopened.get("c")[1] == {"categories": ["fees"]}
+
+
+def test_concurrent_writers_merge_their_chunks():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.json")
+        build(path)
+
+        def seed(writer):
+            # Separate instances stand in for separate seed processes
+            index = BM25Index(path)
+            for batch in range(10):
+                ids = [f"{writer}-{batch}-{i}" for i in range(5)]
+                index.upsert(ids, [f"Ngành {doc_id} học phí 2025" for doc_id in ids])
+            index.delete(["a"] if writer == 0 else [])
+
+        threads = [threading.Thread(target=seed, args=(writer,)) for writer in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        merged = BM25Index(path)
+        assert len(merged) == 3 + 4 * 10 * 5
+        assert "a" not in merged and "3-9-4" in merged
+        assert [name for name in os.listdir(tmp) if name.endswith(".tmp")] == []
+
+
+def benchmark(chunks: int = 5000, number: int = 200):
+    """Query latency of the in-memory index over a synthetic corpus"""
+    with tempfile.TemporaryDirectory() as tmp:
+        index = BM25Index(os.path.join(tmp, "index.json"))
+        texts = [
+            f"{CHUNKS['abcd'[i % 4]][0]} đợt {i} ngành mã {7480000 + i}" for i in range(chunks)
+        ]
+        index.upsert([str(i) for i in range(chunks)], texts)
+        index.search("mã ngành", k=10)  # build the search arrays
+        elapsed = timeit.timeit(lambda: index.search("mã ngành 7480201", k=10), number=number)
+        print(f"BM25 search over {chunks} chunks: {elapsed / number * 1e6:.0f} µs/query")
+
+
+if __name__ == "__main__":
+    test_tokenizer_keeps_compounds_and_numbers()
+    test_exact_terms_rank_first()
+    test_filter_delete_and_reload()
+    test_concurrent_writers_merge_their_chunks()
+    print("✅ BM25 index tests passed")
+    benchmark()
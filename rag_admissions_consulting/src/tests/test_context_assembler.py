@@ -0,0 +1,67 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.documents import Document
+
+from core.context_assembler import (
+    DOCUMENT_OVERHEAD_TOKENS,
+    ContextAssembler,
+    TokenCounter,
+)
+
+QUERY = "còn ngành luật thì sao?"
+DOCS = [
+    Document(page_content="Học phí ngành Luật là 11 triệu mỗi kỳ", metadata={"source": "a"}),
+    Document(page_content=" ".join(["Ngành Luật kinh tế"] * 100), metadata={"source": "b"}),
+    Document(page_content="Ký túc xá có 500 chỗ", metadata={"source": "c"}),
+]
+HISTORY = [
+    {"role": "USER", "content": "học phí ngành CNTT bao nhiêu?"},
+    {"role": "ASSISTANT", "content": "12 triệu mỗi kỳ"},
+    {"role": "USER", "content": "học phí ngành CNTT bao nhiêu?"},
+    {"role": "ASSISTANT", "content": "12 triệu mỗi kỳ"},
+    {"role": "USER", "content": QUERY},
+]
+
+
+def test_counter_estimates_and_truncates():
+    counter = TokenCounter()
+    assert counter.count("Học phí: 12 triệu.") == 6
+    assert counter.truncate("Học phí: 12 triệu.", 3) == "Học phí:"
+    assert counter.truncate("Học phí", 10) == "Học phí"
+
+
+def test_documents_fill_budget_in_rank_order():
+    counter = TokenCounter()
+    first = counter.count(DOCS[0].page_content) + DOCUMENT_OVERHEAD_TOKENS
+    assembler = ContextAssembler(counter, budget=first + 100, min_partial_tokens=20)
+    result = assembler.assemble(QUERY, DOCS, None, reserved_tokens=0)
+
+    # The long second document is cut to what is left; the third never fits
+    assert result.documents[0] is DOCS[0]
+    assert len(result.documents) == 2 and result.dropped_documents == 1
+    assert result.documents[1].metadata == {"source": "b"}
+    assert result.tokens["total"] <= assembler.budget
+
+
+def test_history_skips_current_question_and_repeats():
+    assembler = ContextAssembler(TokenCounter(), budget=1000, max_history_messages=6)
+    result = assembler.assemble(QUERY, [], HISTORY, reserved_tokens=500)
+    assert [m["content"] for m in result.messages] == [
+        "học phí ngành CNTT bao nhiêu?",
+        "12 triệu mỗi kỳ",
+    ]
+
+    # Whatever the documents leave over bounds the history
+    tight = ContextAssembler(TokenCounter(), budget=60, min_partial_tokens=64)
+    assert tight.assemble(QUERY, DOCS[:1], HISTORY, reserved_tokens=20).messages == []
+
+
+if __name__ == "__main__":
+    test_counter_estimates_and_truncates()
+    test_documents_fill_budget_in_rank_order()
+    test_history_skips_current_question_and_repeats()
+    print("✅ Context assembler tests passed")
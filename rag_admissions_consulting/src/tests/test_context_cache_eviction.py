@@ -0,0 +1,66 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import time
+
+from core.context_cache import context_cache
+
+
+def reset_cache(max_entries=1000, max_total_bytes=10**6, ttl_minutes=60):
+    context_cache.clear_all_contexts()
+    context_cache.max_entries = max_entries
+    context_cache.max_total_bytes = max_total_bytes
+    context_cache.cache_timeout_minutes = ttl_minutes
+
+
+def get(conversation_id):
+    return context_cache.get_or_create_context_manager(
+        user_id=1, conversation_id=conversation_id, user_email="test@example.com"
+    )
+
+
+def test_least_recently_used_is_evicted():
+    reset_cache(max_entries=2)
+    get("a")
+    get("b")
+    get("a")  # "b" is now the least recently used
+    get("c")
+
+    assert list(context_cache.context_managers) == ["a", "c"]
+    assert context_cache.stats["evictions"] == 1
+
+
+def test_byte_budget_evicts_old_conversations():
+    reset_cache(max_total_bytes=100)
+    old = get("old")
+    asyncio.run(old.add_message("user", "x" * 60))
+    new = get("new")
+    asyncio.run(new.add_message("user", "y" * 60))
+
+    assert list(context_cache.context_managers) == ["new"]
+    assert context_cache.total_bytes == 60
+
+    # Evicted manager no longer affects the cache accounting
+    asyncio.run(old.add_message("user", "z" * 10))
+    assert context_cache.total_bytes == 60
+
+
+def test_expired_conversations_are_swept():
+    reset_cache(ttl_minutes=1)
+    get("idle")
+    get("active")
+    context_cache.last_access["idle"] = time.monotonic() - 120
+
+    context_cache.cleanup_expired_contexts()
+    assert list(context_cache.context_managers) == ["active"]
+
+
+if __name__ == "__main__":
+    test_least_recently_used_is_evicted()
+    test_byte_budget_evicts_old_conversations()
+    test_expired_conversations_are_swept()
+    print("✅ Context cache eviction tests passed")
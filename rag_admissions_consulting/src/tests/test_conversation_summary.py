@@ -0,0 +1,95 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+
+from core.context_manager import ContextManager
+from infrastructure.state_store import InMemoryStateStore
+from shared.enum import RoleType
+
+
+class RecordingSummarizer:
+    def __init__(self):
+        self.calls = []
+
+    async def summarize(self, summary, messages):
+        self.calls.append((summary, [msg["content"] for msg in messages]))
+        return f"{summary}+{len(messages)}"
+
+
+class FailingSummarizer:
+    async def summarize(self, summary, messages):
+        raise RuntimeError("LLM unavailable")
+
+
+def new_context(shared_store=None):
+    context = ContextManager(1, "summary-test", "test@example.com", shared_store=shared_store)
+    context.history_manager = None
+    context.summary_trigger_messages = 4
+    context.summary_keep_recent_messages = 2
+    return context
+
+
+async def chat(context, summarizer, turns, start=0):
+    for i in range(start, start + turns):
+        await context.add_message(RoleType.USER, f"q{i}")
+        await context.add_message(RoleType.ASSISTANT, f"a{i}")
+        task = context.schedule_summary(summarizer)
+        if task:
+            await task
+
+
+def test_older_turns_are_folded_incrementally():
+    async def run():
+        context = new_context()
+        summarizer = RecordingSummarizer()
+        await chat(context, summarizer, 2)
+        assert summarizer.calls == [] and context.summary == ""
+
+        await chat(context, summarizer, 1, start=2)
+        assert summarizer.calls == [("", ["q0", "a0", "q1", "a1"])]
+        assert [m["content"] for m in await context.get_context_messages()] == ["q2", "a2"]
+
+        # Later folds only read the previous summary and the new turns
+        await chat(context, summarizer, 2, start=3)
+        assert summarizer.calls[1] == ("+4", ["q2", "a2", "q3", "a3"])
+        assert context.summary == "+4+4"
+        assert len(await context.get_context_messages()) == 2
+
+    asyncio.run(run())
+
+
+def test_failed_summary_keeps_raw_turns():
+    async def run():
+        context = new_context()
+        await chat(context, FailingSummarizer(), 3)
+        assert context.summary == "" and len(await context.get_context_messages()) == 6
+
+    asyncio.run(run())
+
+
+def test_summary_is_shared_and_cleared():
+    async def run():
+        store = InMemoryStateStore()
+        context = new_context(store)
+        await chat(context, RecordingSummarizer(), 3)
+
+        other_worker = new_context(store)
+        await other_worker.sync_from_shared_store()
+        assert other_worker.summary == "+4"
+        assert [m["content"] for m in await other_worker.get_context_messages()] == ["q2", "a2"]
+
+        await context.clear_context()
+        assert context.summary == "" and await store.get("summary:summary-test") is None
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_older_turns_are_folded_incrementally()
+    test_failed_summary_keeps_raw_turns()
+    test_summary_is_shared_and_cleared()
+    print("✅ Conversation summary tests passed")
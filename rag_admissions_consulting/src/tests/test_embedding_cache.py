@@ -0,0 +1,69 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempfile
+
+from langchain_core.embeddings import Embeddings
+
+from infrastructure.embedding_cache import CachedEmbeddings, EmbeddingCacheStore
+
+
+class CountingEmbeddings(Embeddings):
+    """Fake model that records how many texts it had to embed"""
+
+    def __init__(self):
+        self.embedded = 0
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        self.embedded += 1
+        return [float(len(text)), 2.0]
+
+
+def test_documents_are_embedded_once_across_restarts():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        path = os.path.join(cache_dir, "cache.sqlite")
+        model = CountingEmbeddings()
+        cached = CachedEmbeddings(model, "fake", EmbeddingCacheStore(path))
+
+        first = cached.embed_documents(["học phí", "điểm chuẩn", "học phí"])
+        assert model.embedded == 2  # duplicate text embedded once
+        assert first[0] == first[2]
+
+        # New process: empty memory tier, same SQLite file
+        model = CountingEmbeddings()
+        cached = CachedEmbeddings(model, "fake", EmbeddingCacheStore(path))
+        second = cached.embed_documents(["điểm chuẩn", "học phí", "ký túc xá"])
+        assert model.embedded == 1
+        assert second[1] == first[0]
+        assert cached.cache.stats["disk_hits"] == 2
+
+
+def test_query_cache_uses_memory_tier_and_namespaces():
+    store = EmbeddingCacheStore(None, max_memory_items=2)
+    model = CountingEmbeddings()
+    cached = CachedEmbeddings(model, "model-a", store)
+
+    assert cached.embed_query("học phí bao nhiêu") == cached.embed_query("học phí bao nhiêu")
+    assert model.embedded == 1
+    assert store.stats["memory_hits"] == 1
+
+    # Query and document vectors, and other models, never collide
+    cached.embed_documents(["học phí bao nhiêu"])
+    CachedEmbeddings(model, "model-b", store).embed_query("học phí bao nhiêu")
+    assert model.embedded == 3
+
+    # LRU keeps at most max_memory_items vectors
+    assert len(store._memory) == 2
+
+
+if __name__ == "__main__":
+    test_documents_are_embedded_once_across_restarts()
+    test_query_cache_uses_memory_tier_and_namespaces()
+    print("✅ Embedding cache tests passed")
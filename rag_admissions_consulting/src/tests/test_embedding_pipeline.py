@@ -0,0 +1,109 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from infrastructure.embedding_cache import CachedEmbeddings, EmbeddingCacheStore
+from infrastructure import embedding_pipeline
+from infrastructure.embedding_pipeline import BatchEmbedder, close_batch_embedders
+
+
+class FakeSentenceTransformer:
+    """Records the texts of every encode call like SentenceTransformer.encode"""
+
+    def __init__(self):
+        self.calls = []
+        self.kwargs = []
+        self.pools = {"started": 0, "stopped": 0}
+
+    def encode(self, texts, batch_size, **kwargs):
+        self.calls.append(list(texts))
+        self.kwargs.append(kwargs)
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float64)
+
+    def start_multi_process_pool(self, devices):
+        self.pools["started"] += 1
+        return object()
+
+    def encode_multi_process(self, texts, pool, batch_size, **kwargs):
+        return self.encode(texts, batch_size)
+
+    def stop_multi_process_pool(self, pool):
+        self.pools["stopped"] += 1
+
+
+class FakeHuggingFaceEmbeddings(Embeddings):
+    def __init__(self, encode_kwargs=None):
+        self._client = FakeSentenceTransformer()
+        self.encode_kwargs = encode_kwargs or {}
+
+    def embed_documents(self, texts):
+        raise AssertionError("bulk path should call the encoder directly")
+
+    def embed_query(self, text):
+        return [float(len(text)), 1.0]
+
+
+TEXTS = ["ngành công nghệ thông tin", "học phí", "điểm chuẩn năm 2024 ngành y", "ktx"]
+
+
+def test_batches_are_length_sorted_and_order_restored():
+    model = FakeHuggingFaceEmbeddings()
+    vectors = BatchEmbedder(model, batch_size=2).embed_texts(TEXTS)
+
+    assert model._client.calls == [sorted(TEXTS, key=len)]
+    assert vectors.dtype == np.float32
+    assert vectors[:, 0].tolist() == [float(len(text)) for text in TEXTS]
+
+
+def test_cache_is_used_and_windows_stream():
+    model = FakeHuggingFaceEmbeddings()
+    cached = CachedEmbeddings(model, "fake", EmbeddingCacheStore(None))
+    embedder = BatchEmbedder(cached)
+
+    embedder.embed_texts(TEXTS[:2])
+    windows = list(
+        embedder.iter_embed((Document(page_content=text) for text in TEXTS), window_size=3)
+    )
+
+    assert [len(docs) for docs, _ in windows] == [3, 1]
+    # Only texts that were not cached reached the encoder
+    assert model._client.calls[1] == ["điểm chuẩn năm 2024 ngành y"]
+    assert model._client.calls[2] == ["ktx"]
+
+
+def test_encodes_like_embed_documents():
+    model = FakeHuggingFaceEmbeddings({"normalize_embeddings": True, "batch_size": 8})
+    embedder = BatchEmbedder(model)
+    embedder.embed_texts(["Học phí\nngành CNTT"])
+
+    # Same newline handling and options as HuggingFaceEmbeddings.embed_documents
+    assert model._client.calls == [["Học phí ngành CNTT"]]
+    assert model._client.kwargs[0]["normalize_embeddings"] is True
+    assert embedder.batch_size == 8
+
+
+def test_process_pool_is_stopped_on_close():
+    model = FakeHuggingFaceEmbeddings()
+    embedder = embedding_pipeline.get_batch_embedder(model)
+    embedder.process_workers = 2
+    embedder.embed_texts(TEXTS)
+    embedder.embed_texts(TEXTS[:1])
+    assert model._client.pools == {"started": 1, "stopped": 0}
+
+    close_batch_embedders()
+    assert model._client.pools == {"started": 1, "stopped": 1}
+    assert embedding_pipeline._embedders == {}
+
+
+if __name__ == "__main__":
+    test_batches_are_length_sorted_and_order_restored()
+    test_cache_is_used_and_windows_stream()
+    test_encodes_like_embed_documents()
+    test_process_pool_is_stopped_on_close()
+    print("✅ Embedding pipeline tests passed")
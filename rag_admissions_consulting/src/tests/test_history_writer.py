@@ -0,0 +1,253 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import glob
+import json
+import tempfile
+
+import httpx
+
+from shared.chat_history_manager import HistoryWriter
+
+
+def make_writer(handler, spill_path):
+    return HistoryWriter(
+        batch_size=10,
+        flush_interval=0.05,
+        max_retries=2,
+        spill_path=spill_path,
+        transport=httpx.MockTransport(handler),
+    )
+
+
+def message(index):
+    return {"role": "user", "content": f"câu hỏi {index}", "conversationId": "c1"}
+
+
+def spill_files(tmp):
+    return sorted(glob.glob(os.path.join(tmp, "spill*.jsonl")))
+
+
+def test_burst_is_sent_in_batches():
+    requests = []
+
+    def handler(request):
+        requests.append(json.loads(request.content))
+        return httpx.Response(201, json=[])
+
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            writer = make_writer(handler, os.path.join(tmp, "spill.jsonl"))
+            for index in range(25):
+                writer.enqueue(message(index))
+            await writer.close()
+            return writer
+
+    writer = asyncio.run(run())
+    assert len(requests) == 3
+    sent = [msg["content"] for body in requests for msg in body["messages"]]
+    assert sent == [f"câu hỏi {index}" for index in range(25)]
+    assert writer.stats["saved"] == 25
+
+
+def test_falls_back_to_single_endpoint():
+    paths = []
+
+    def handler(request):
+        paths.append(request.url.path)
+        if request.url.path.endswith("/batch"):
+            return httpx.Response(404)
+        return httpx.Response(201, json={"id": "1"})
+
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            writer = make_writer(handler, os.path.join(tmp, "spill.jsonl"))
+            for index in range(3):
+                writer.enqueue(message(index))
+            await writer.close()
+
+    asyncio.run(run())
+    assert paths.count("/api/v1/chatbots/history") == 3
+
+
+def test_single_post_failure_retries_only_unsaved():
+    saved = []
+    failures = {"remaining": 1}
+
+    def handler(request):
+        if request.url.path.endswith("/batch"):
+            return httpx.Response(404)
+        body = json.loads(request.content)
+        if body["content"] == "câu hỏi 1" and failures["remaining"]:
+            failures["remaining"] -= 1
+            return httpx.Response(500)
+        saved.append(body["content"])
+        return httpx.Response(201, json={"id": "1"})
+
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            writer = make_writer(handler, os.path.join(tmp, "spill.jsonl"))
+
+            for index in range(3):
+                writer.enqueue(message(index))
+            # Must return: every dequeued message is marked done exactly once
+            await asyncio.wait_for(writer.close(), timeout=10)
+            return writer
+
+    writer = asyncio.run(run())
+    assert saved == ["câu hỏi 0", "câu hỏi 1", "câu hỏi 2"]
+    assert writer.stats["saved"] == 3 and writer.stats["spilled"] == 0
+
+
+def test_failed_batches_spill_and_replay():
+    attempts = {"count": 0}
+    saved = []
+
+    def failing(request):
+        attempts["count"] += 1
+        return httpx.Response(503)
+
+    def working(request):
+        saved.extend(json.loads(request.content)["messages"])
+        return httpx.Response(201, json=[])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        spill_path = os.path.join(tmp, "spill.jsonl")
+
+        async def fail():
+            writer = make_writer(failing, spill_path)
+            writer.enqueue(message(1))
+            await writer.close()
+            return writer
+
+        writer = asyncio.run(fail())
+        assert attempts["count"] == 3  # first try + 2 retries
+        assert writer.stats["spilled"] == 1
+        # Each worker spills to its own file
+        assert spill_files(tmp) == [writer.worker_spill_path]
+        assert writer.worker_spill_path != spill_path
+
+        async def still_down():
+            await make_writer(failing, spill_path).close()
+
+        # Replay while the API is still down keeps the messages on disk
+        asyncio.run(still_down())
+        assert len(spill_files(tmp)) == 1
+
+        async def replay():
+            writer = make_writer(working, spill_path)
+            writer.enqueue(message(2))
+            await writer.close()
+
+        asyncio.run(replay())
+        assert [msg["content"] for msg in saved] == ["câu hỏi 1", "câu hỏi 2"]
+        assert spill_files(tmp) == []
+
+
+def test_batch_failure_resends_only_unsaved():
+    stored = []
+    failures = {"remaining": 1}
+
+    def handler(request):
+        # Server saves in order and stops at the first failing message
+        messages = json.loads(request.content)["messages"]
+        saved = []
+        for index, msg in enumerate(messages):
+            if msg["content"] == "câu hỏi 2" and failures["remaining"]:
+                failures["remaining"] -= 1
+                failed = {"index": index, "status": 500, "message": "db"}
+                return httpx.Response(201, json={"saved": saved, "failed": failed})
+            stored.append(msg["content"])
+            saved.append({"id": str(len(stored))})
+        return httpx.Response(201, json={"saved": saved})
+
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            writer = make_writer(handler, os.path.join(tmp, "spill.jsonl"))
+            for index in range(4):
+                writer.enqueue(message(index))
+            await writer.close()
+            return writer
+
+    writer = asyncio.run(run())
+    assert stored == [f"câu hỏi {index}" for index in range(4)]
+    assert writer.stats["saved"] == 4 and writer.stats["retries"] == 1
+
+
+def test_rejected_message_is_dropped():
+    stored = []
+    requests = []
+
+    def handler(request):
+        requests.append(request.url.path)
+        messages = json.loads(request.content)["messages"]
+        saved = []
+        for index, msg in enumerate(messages):
+            if msg["content"] == "câu hỏi 1":
+                failed = {"index": index, "status": 400, "message": "bad"}
+                return httpx.Response(201, json={"saved": saved, "failed": failed})
+            stored.append(msg["content"])
+            saved.append({"id": str(len(stored))})
+        return httpx.Response(201, json={"saved": saved})
+
+    with tempfile.TemporaryDirectory() as tmp:
+
+        async def run():
+            writer = make_writer(handler, os.path.join(tmp, "spill.jsonl"))
+            for index in range(3):
+                writer.enqueue(message(index))
+            await writer.close()
+            return writer
+
+        writer = asyncio.run(run())
+        assert stored == ["câu hỏi 0", "câu hỏi 2"]
+        assert len(requests) == 2
+        assert writer.stats["dropped"] == 1 and writer.stats["retries"] == 0
+        assert spill_files(tmp) == []
+
+
+def test_invalid_batch_falls_back_to_drop_the_bad_message():
+    stored = []
+
+    def handler(request):
+        body = json.loads(request.content)
+        if request.url.path.endswith("/batch"):
+            # Validation rejects the whole batch
+            if any(not msg["content"] for msg in body["messages"]):
+                return httpx.Response(422)
+            stored.extend(msg["content"] for msg in body["messages"])
+            return httpx.Response(201, json={"saved": body["messages"]})
+        if not body["content"]:
+            return httpx.Response(422)
+        stored.append(body["content"])
+        return httpx.Response(201, json={"id": "1"})
+
+    with tempfile.TemporaryDirectory() as tmp:
+
+        async def run():
+            writer = make_writer(handler, os.path.join(tmp, "spill.jsonl"))
+            writer.enqueue(message(0))
+            writer.enqueue({**message(1), "content": ""})
+            writer.enqueue(message(2))
+            await writer.close()
+            return writer
+
+        writer = asyncio.run(run())
+        assert stored == ["câu hỏi 0", "câu hỏi 2"]
+        assert writer.stats["dropped"] == 1 and writer.stats["retries"] == 0
+        assert spill_files(tmp) == []
+
+
+if __name__ == "__main__":
+    test_burst_is_sent_in_batches()
+    test_falls_back_to_single_endpoint()
+    test_single_post_failure_retries_only_unsaved()
+    test_failed_batches_spill_and_replay()
+    test_batch_failure_resends_only_unsaved()
+    test_rejected_message_is_dropped()
+    test_invalid_batch_falls_back_to_drop_the_bad_message()
+    print("✅ History writer tests passed")
@@ -0,0 +1,171 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from data_pipeline.ingestion_worker import (
+    IngestionWorker,
+    JobRejected,
+    StatusReporter,
+    UnsupportedDataType,
+)
+from data_pipeline.pipeline_runner import PipelineJob, PipelineRunner
+
+
+class BackendStub:
+    """Local HTTP server standing in for PATCH /data-sources/:id/ingestion-status"""
+
+    def __init__(self):
+        self.updates = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_PATCH(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                stub.updates.append(
+                    (self.path, self.headers.get("X-Ingestion-Token"), json.loads(body))
+                )
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(b"{}")
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def statuses(self, data_source_id):
+        return [
+            body["status"]
+            for path, _, body in self.updates
+            if path == f"/data-sources/{data_source_id}/ingestion-status"
+        ]
+
+    def close(self):
+        self.server.shutdown()
+
+
+def manual_job(data_source_id, content="Ký túc xá có 500 chỗ ở cho sinh viên"):
+    return PipelineJob(
+        data_source_id,
+        "manual",
+        json.dumps({"title": "Ký túc xá", "content": content}, ensure_ascii=False),
+    )
+
+
+def make_worker(backend, seed_fn, **kwargs):
+    runner = PipelineRunner(embeddings_model=object(), seed_fn=seed_fn)
+    reporter = StatusReporter(
+        url_template=backend.url + "/data-sources/{data_source_id}/ingestion-status",
+        token="secret",
+    )
+    return IngestionWorker(runner=runner, reporter=reporter, **kwargs)
+
+
+def test_jobs_report_status_to_backend():
+    backend = BackendStub()
+    seen_models = set()
+
+    def seed(texts, data_source_id, source, force, embeddings_model):
+        seen_models.add(id(embeddings_model))
+        return len(texts), 3
+
+    async def run():
+        worker = make_worker(backend, seed, concurrency=2)
+        await worker.start()
+        worker.submit(manual_job("ds1"))
+        worker.submit(manual_job("ds2"))
+        worker.submit(manual_job("bad", content=""))
+        await worker.join()
+        status = worker.get_status()
+        await worker.stop()
+        return status
+
+    try:
+        status = asyncio.run(run())
+        assert backend.statuses("ds1") == ["processing", "completed"]
+        assert backend.statuses("bad") == ["processing", "failed"]
+        completed = [body for path, _, body in backend.updates if body["status"] == "completed"]
+        assert completed[0]["vectorsCount"] == 3
+        assert all(token == "secret" for _, token, _ in backend.updates)
+        assert len(seen_models) == 1
+        assert status["completed"] == 2 and status["failed"] == 1
+    finally:
+        backend.close()
+
+
+def test_rejects_duplicates_and_full_queue():
+    backend = BackendStub()
+    release = threading.Event()
+
+    def seed(texts, data_source_id, source, force, embeddings_model):
+        release.wait(5)
+        return 1, 1
+
+    async def run():
+        worker = make_worker(backend, seed, concurrency=1, max_queue_size=1)
+        await worker.start()
+        worker.submit(manual_job("ds1"))
+        await asyncio.sleep(0.1)  # ds1 is now processing, the queue is empty
+        worker.submit(manual_job("ds2"))
+        rejected = []
+        for job in (manual_job("ds1"), manual_job("ds3")):
+            try:
+                worker.submit(job)
+            except JobRejected as e:
+                rejected.append(str(e))
+        release.set()
+        await worker.join()
+        await worker.stop()
+        return rejected
+
+    try:
+        rejected = asyncio.run(run())
+        assert rejected == ["DataSource ds1 is already queued", "Ingestion queue is full"]
+        assert backend.statuses("ds2") == ["processing", "completed"]
+    finally:
+        backend.close()
+
+
+def test_unsupported_type_and_missing_token():
+    backend = BackendStub()
+
+    async def run():
+        worker = make_worker(backend, lambda *args: (1, 1))
+        worker.reporter = StatusReporter(
+            url_template=backend.url + "/data-sources/{data_source_id}/ingestion-status",
+            token="",
+        )
+        await worker.start()
+        try:
+            worker.submit(PipelineJob("ds4", "docx", "file.docx"))
+            raise AssertionError("docx should be rejected")
+        except UnsupportedDataType:
+            pass
+        worker.submit(manual_job("ds5"))
+        await worker.join()
+        await worker.stop()
+        return worker.get_job("ds5").status
+
+    try:
+        # Without a token the backend would answer 401, so nothing is sent
+        assert asyncio.run(run()) == "completed"
+        assert backend.updates == []
+    finally:
+        backend.close()
+
+
+if __name__ == "__main__":
+    test_jobs_report_status_to_backend()
+    test_rejects_duplicates_and_full_queue()
+    test_unsupported_type_and_missing_token()
+    print("✅ Ingestion worker tests passed")
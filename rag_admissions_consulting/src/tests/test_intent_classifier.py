@@ -0,0 +1,68 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.intent_classifier import INTENT_EXAMPLES, IntentClassifier
+from core.query_analyzer import QueryAnalyzer
+
+# One axis per topic word; stands in for multilingual-e5
+AXES = ["tiền", "học phí", "ký túc xá", "ngành", "hồ sơ", "việc làm", "trường"]
+
+
+class TopicEmbeddings:
+    def __init__(self):
+        self.calls = 0
+
+    def embed_query(self, text):
+        text = text.lower()
+        return [1.0 if axis in text else 0.0 for axis in AXES] + [0.1]
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        return [self.embed_query(text) for text in texts]
+
+
+EXAMPLES = {
+    "fees_scholarships": ["học phí một năm", "bao nhiêu tiền một kỳ"],
+    "facilities_campus": ["ký túc xá ở đâu", "ký túc xá có rộng không"],
+    "specific_program": ["ngành công nghệ thông tin", "các ngành đào tạo"],
+}
+
+
+def test_paraphrase_routes_to_same_category():
+    model = TopicEmbeddings()
+    classifier = IntentClassifier(model, EXAMPLES, min_similarity=0.5, min_margin=0.05).build()
+
+    # The keyword analyzer sees no category keyword in this paraphrase
+    query = "một kỳ phải đóng mấy tiền"
+    assert QueryAnalyzer().analyze(query)["type"] == "general"
+
+    result = classifier.classify(model.embed_query(query))
+    assert result["type"] == "fees_scholarships"
+    assert set(result["scores"]) == set(EXAMPLES)
+    # Centroids are computed once, classification never re-embeds examples
+    classifier.classify(model.embed_query("ký túc xá"))
+    assert model.calls == 1
+
+
+def test_weak_or_ambiguous_matches_fall_back():
+    model = TopicEmbeddings()
+    classifier = IntentClassifier(model, EXAMPLES, min_similarity=0.5, min_margin=0.05).build()
+
+    assert classifier.classify(model.embed_query("xin chào")) is None
+    # Equally close to two centroids: leave the keyword analysis in charge
+    assert classifier.classify(model.embed_query("ngành có ký túc xá")) is None
+
+
+def test_default_examples_cover_every_query_type():
+    assert set(INTENT_EXAMPLES) == set(QueryAnalyzer().query_patterns)
+    assert IntentClassifier(TopicEmbeddings()).classify([1.0] * 8) is None  # not built
+
+
+if __name__ == "__main__":
+    test_paraphrase_routes_to_same_category()
+    test_weak_or_ambiguous_matches_fall_back()
+    test_default_examples_cover_every_query_type()
+    print("✅ Intent classifier tests passed")
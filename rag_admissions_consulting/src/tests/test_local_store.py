@@ -0,0 +1,251 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempfile
+import threading
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from infrastructure import local_store as local_store_module
+from infrastructure.local_store import LocalStore, LocalVectorIndex
+
+
+class KeywordEmbeddings(Embeddings):
+    """Deterministic embeddings: one dimension per known keyword"""
+
+    vocabulary = ["học phí", "điểm chuẩn", "ký túc xá", "học bổng"]
+
+    def _embed(self, text: str):
+        text = text.lower()
+        vector = [1.0 if word in text else 0.0 for word in self.vocabulary]
+        vector.append(0.1)  # avoid zero vectors
+        return vector
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+DOCUMENTS = [
+    Document(page_content="Học phí ngành CNTT là 12 triệu mỗi kỳ", metadata={"i": 0}),
+    Document(page_content="Điểm chuẩn năm 2024 ngành Điều dưỡng", metadata={"i": 1}),
+    Document(page_content="Ký túc xá có 500 chỗ ở", metadata={"i": 2}),
+    Document(page_content="Học bổng và học phí cho tân sinh viên", metadata={"i": 3}),
+]
+
+
+def test_search_and_persistence():
+    with tempfile.TemporaryDirectory() as index_dir:
+        local_store = LocalStore(index_dir=index_dir, search_kwargs={"k": 2})
+        local_store.initStore()
+        local_store.uploadToStore(DOCUMENTS, KeywordEmbeddings())
+
+        retriever = local_store.getRetriever(KeywordEmbeddings())
+        docs = retriever.invoke("học phí bao nhiêu")
+        assert docs[0].metadata["i"] in (0, 3)
+        assert len(docs) == 2
+
+        # Re-open from disk and get the same answer
+        reopened = LocalStore(index_dir=index_dir, search_type="similarity")
+        reopened.initStore()
+        assert len(reopened.index) == len(DOCUMENTS)
+        docs = reopened.getStore(KeywordEmbeddings()).similarity_search("ký túc xá", k=1)
+        assert docs[0].metadata["i"] == 2
+
+
+def test_upsert_delete_and_compact():
+    with tempfile.TemporaryDirectory() as index_dir:
+        index = LocalVectorIndex(index_dir)
+        vectors = np.eye(3, dtype=np.float32)
+        index.upsert(["a", "b", "c"], vectors, ["A", "B", "C"], [{}, {}, {}])
+        index.upsert(["a"], np.array([[0, 1, 0]], dtype=np.float32), ["A2"], [{}])
+        assert len(index) == 3
+        assert index.get("a")[0] == "A2"
+
+        index.delete(["b"])
+        rows = index.search(np.array([0, 1, 0], dtype=np.float32), k=3)
+        assert [index.ids[row] for row, _ in rows][0] == "a"
+        assert "b" not in [index.ids[row] for row, _ in rows]
+
+        index.compact()
+        assert index.get("a")[0] == "A2" and index.get("b") is None
+        reopened = LocalVectorIndex(index_dir)
+        assert reopened.ids == ["c", "a"]
+        rows = reopened.search(np.array([0, 1, 0], dtype=np.float32), k=1)
+        assert reopened.ids[rows[0][0]] == "a"
+        assert sorted(os.listdir(index_dir)) == [
+            "documents.1.jsonl",
+            "index.json",
+            "index.json.lock",
+            "vectors.1.f32",
+        ]
+
+        # Appends after compaction go to the new generation's files
+        reopened.upsert(["d"], np.array([[0, 0, 1]], dtype=np.float32), ["D"], [{}])
+        assert LocalVectorIndex(index_dir).ids == ["c", "a", "d"]
+
+
+def test_failed_compact_keeps_previous_index():
+    with tempfile.TemporaryDirectory() as index_dir:
+        index = LocalVectorIndex(index_dir)
+        index.upsert(["a", "b", "c"], np.eye(3, dtype=np.float32), ["A", "B", "C"], [{}] * 3)
+        index.delete(["b"])
+        before = sorted(os.listdir(index_dir))
+
+        original_replace = local_store_module.os.replace
+
+        def failing_replace(src, dst):
+            raise OSError("disk full")
+
+        # The new files are written but the manifest never switches to them
+        local_store_module.os.replace = failing_replace
+        try:
+            index.compact()
+            raise AssertionError("compact should fail")
+        except OSError:
+            pass
+        finally:
+            local_store_module.os.replace = original_replace
+
+        assert sorted(name for name in os.listdir(index_dir) if name != "index.json.tmp") == (
+            before
+        )
+        for current in (index, LocalVectorIndex(index_dir)):
+            assert current.ids == ["a", None, "c"]
+            rows = current.search(np.array([0, 0, 1], dtype=np.float32), k=3)
+            assert [current.ids[row] for row, _ in rows][0] == "c"
+
+
+def test_uncommitted_append_is_discarded():
+    with tempfile.TemporaryDirectory() as index_dir:
+        index = LocalVectorIndex(index_dir)
+        index.upsert(["a", "b"], np.eye(3, dtype=np.float32)[:2], ["A", "B"], [{}, {}])
+
+        # A writer died after appending a vector and half a document line
+        with open(os.path.join(index_dir, "vectors.f32"), "ab") as f:
+            f.write(np.ones(3, dtype=np.float32).tobytes())
+        with open(os.path.join(index_dir, "documents.jsonl"), "ab") as f:
+            f.write(b'{"id": "orphan", "te')
+
+        reopened = LocalVectorIndex(index_dir)
+        assert reopened.ids == ["a", "b"]
+        reopened.upsert(["c"], np.array([[0, 0, 1]], dtype=np.float32), ["C"], [{}])
+        for current in (reopened, LocalVectorIndex(index_dir)):
+            row, score = current.search(np.array([0, 0, 1], dtype=np.float32), k=1)[0]
+            assert current.ids[row] == "c" and score > 0.99
+            assert current.ids == ["a", "b", "c"]
+
+
+def test_writers_and_readers_share_the_index():
+    with tempfile.TemporaryDirectory() as index_dir:
+        reader = LocalVectorIndex(index_dir)
+        assert len(reader) == 0
+
+        def write(writer):
+            # Separate instances stand in for seed.py and the ingestion worker
+            index = LocalVectorIndex(index_dir)
+            for batch in range(5):
+                ids = [f"{writer}-{batch}-{i}" for i in range(4)]
+                vectors = np.random.default_rng(writer * 10 + batch).random((4, 3))
+                index.upsert(ids, vectors, ids, [{"writer": writer}] * 4)
+
+        threads = [threading.Thread(target=write, args=(writer,)) for writer in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        reader._checked_at = 0.0  # skip the once-per-second reload throttle
+        assert len(reader) == 3 * 5 * 4
+        assert reader.get("2-4-3") == ("2-4-3", {"writer": 2})
+        for row_id in ("0-0-0", "1-3-2"):
+            row = reader._id_to_row[row_id]
+            vector = np.asarray(reader._get_matrix()[row])
+            assert reader.ids[reader.search(vector, k=1)[0][0]] == row_id
+
+
+def test_seed_texts_into_local_store():
+    from scripts import seed
+    from infrastructure.bm25_index import BM25Index
+    from infrastructure.seed_manifest import SeedManifest
+
+    with tempfile.TemporaryDirectory() as tmp:
+        local_store = LocalStore(index_name="seed-test", index_dir=os.path.join(tmp, "index"))
+        invalidated = []
+        patches = {
+            "store": local_store,
+            "bm25_index": BM25Index(os.path.join(tmp, "bm25.json")),
+            "SeedManifest": lambda ds, index: SeedManifest(ds, index, os.path.join(tmp, "m")),
+            "invalidate_data_source": invalidated.append,
+        }
+        previous = {name: getattr(seed, name) for name in patches}
+        for name, value in patches.items():
+            setattr(seed, name, value)
+        try:
+            texts = [doc.page_content for doc in DOCUMENTS]
+            assert seed.seed_texts(texts, "ds1", "test.csv", embeddings_model=KeywordEmbeddings())
+            assert len(local_store.index) == len(DOCUMENTS)
+
+            # Re-seeding with one changed text uploads only that chunk
+            texts[2] = "Ký túc xá mới có 800 chỗ ở"
+            seed.seed_texts(texts, "ds1", "test.csv", embeddings_model=KeywordEmbeddings())
+        finally:
+            for name, value in previous.items():
+                setattr(seed, name, value)
+
+        assert len(local_store.index) == len(DOCUMENTS)
+        assert invalidated == ["ds1", "ds1"]
+        query = KeywordEmbeddings().embed_query("ký túc xá")
+        docs = local_store.getStore(KeywordEmbeddings()).similarity_search_by_vector(query, k=1)
+        assert docs[0].page_content == "Ký túc xá mới có 800 chỗ ở"
+        assert docs[0].metadata["data_source_id"] == "ds1"
+
+
+def test_mmr_prefers_diverse_results():
+    with tempfile.TemporaryDirectory() as index_dir:
+        index = LocalVectorIndex(index_dir)
+        vectors = np.array([[1, 0.0], [1, 0.01], [0.7, 0.7]], dtype=np.float32)
+        index.upsert(["x", "x-dup", "y"], vectors, ["x", "x", "y"], [{}, {}, {}])
+        rows = index.mmr_search(np.array([1, 0.2]), k=2, fetch_k=3, lambda_mult=0.5)
+        assert [index.ids[row] for row, _ in rows] == ["x-dup", "y"]
+
+
+def test_metadata_filter_restricts_candidates():
+    with tempfile.TemporaryDirectory() as index_dir:
+        local_store = LocalStore(index_dir=index_dir, search_type="similarity")
+        local_store.initStore()
+        tagged = [
+            Document(page_content=doc.page_content, metadata={**doc.metadata, "categories": tags})
+            for doc, tags in zip(DOCUMENTS, [["fees"], ["process"], ["campus"], ["fees"]])
+        ]
+        vector_store = local_store.uploadToStore(tagged, KeywordEmbeddings())
+        query = KeywordEmbeddings().embed_query("ký túc xá và học phí")
+
+        docs = vector_store.similarity_search_by_vector(
+            query, k=4, filter={"categories": {"$in": ["fees"]}}
+        )
+        assert sorted(doc.metadata["i"] for doc in docs) == [0, 3]
+        docs = vector_store.max_marginal_relevance_search_by_vector(
+            query, k=2, filter={"categories": "campus"}
+        )
+        assert [doc.metadata["i"] for doc in docs] == [2]
+        assert vector_store.similarity_search_by_vector(query, k=4, filter={"i": 9}) == []
+
+
+if __name__ == "__main__":
+    test_search_and_persistence()
+    test_upsert_delete_and_compact()
+    test_failed_compact_keeps_previous_index()
+    test_uncommitted_append_is_discarded()
+    test_writers_and_readers_share_the_index()
+    test_seed_texts_into_local_store()
+    test_mmr_prefers_diverse_results()
+    test_metadata_filter_restricts_candidates()
+    print("✅ Local store tests passed")
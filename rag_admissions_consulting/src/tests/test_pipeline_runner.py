@@ -0,0 +1,77 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import base64
+import json
+import threading
+import time
+
+from data_pipeline.pipeline_runner import PipelineJob, PipelineRunner
+
+
+class RecordingSeed:
+    """Stands in for scripts.seed.seed_texts and records how it was called"""
+
+    def __init__(self):
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, texts, data_source_id, source, force, embeddings_model):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.05)
+        with self._lock:
+            self.in_flight -= 1
+            self.calls.append((list(texts), data_source_id, embeddings_model))
+        return len(texts), len(texts)
+
+
+def manual_job(data_source_id, title="Học phí", content="Học phí năm 2025 là 12 triệu"):
+    payload = json.dumps({"title": title, "content": content}, ensure_ascii=False)
+    encoded = base64.b64encode(payload.encode("utf-8")).decode("ascii")
+    return PipelineJob(data_source_id, "manual", encoded)
+
+
+def test_jobs_share_one_model_and_run_concurrently():
+    seed = RecordingSeed()
+    model = object()
+    runner = PipelineRunner(concurrency=2, embeddings_model=model, seed_fn=seed)
+
+    jobs = runner.run_sync([manual_job(f"ds{i}") for i in range(4)])
+
+    assert [job.status for job in jobs] == ["completed"] * 4
+    assert all(call[2] is model for call in seed.calls)
+    assert 1 < seed.max_in_flight <= 2
+    assert jobs[0].vectors_count == 1
+    assert seed.calls[0][0] == ["Học phí Học phí năm 2025 là 12 triệu"]
+    assert {"extract", "seed", "total"} <= set(jobs[0].timings)
+
+
+def test_failed_job_does_not_stop_the_queue():
+    seed = RecordingSeed()
+    statuses = []
+    runner = PipelineRunner(
+        concurrency=2,
+        embeddings_model=object(),
+        seed_fn=seed,
+        on_status=lambda job: statuses.append((job.data_source_id, job.status)),
+    )
+
+    bad, good = runner.run_sync([manual_job("bad", content=""), manual_job("good")])
+
+    assert bad.status == "failed" and "required" in bad.error
+    assert good.status == "completed"
+    assert ("bad", "failed") in statuses and ("good", "completed") in statuses
+    assert [call[1] for call in seed.calls] == ["good"]
+
+
+if __name__ == "__main__":
+    test_jobs_share_one_model_and_run_concurrently()
+    test_failed_job_does_not_stop_the_queue()
+    print("✅ Pipeline runner tests passed")
@@ -0,0 +1,61 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import settings
+from core.prompt_engine import PromptEngine
+
+CONTEXT_MESSAGES = [
+    {"role": "USER", "content": "học phí ngành CNTT {bao nhiêu}?"},
+    {"role": "ASSISTANT", "content": "12 triệu mỗi kỳ"},
+]
+ANALYSIS = {"type": "fees_scholarships", "context_type": "follow_up"}
+
+
+def format_turn(engine, context_messages=CONTEXT_MESSAGES, analysis=ANALYSIS):
+    return engine.format_context_aware_messages(
+        "còn ngành luật?", "DOCS", context_messages, analysis
+    )
+
+
+def test_templates_are_compiled_once_per_combination():
+    engine = PromptEngine()
+    format_turn(engine)
+    format_turn(engine, context_messages=None)
+    format_turn(engine, analysis={"type": "general", "context_type": None})
+    assert len(engine._compiled) == 2
+    assert engine._select_template(ANALYSIS) is engine._select_template(dict(ANALYSIS))
+
+
+def test_turn_text_fills_variables():
+    system, documents, human = format_turn(PromptEngine())
+    # Braces typed by the user are plain text, not template variables
+    assert "học phí ngành CNTT {bao nhiêu}?" in system.content
+    assert "Hướng dẫn đặc biệt cho loại câu hỏi này" in system.content
+    assert settings.contact_info["hotline"] in system.content
+    assert documents.content.endswith("DOCS")
+    assert human.content == "còn ngành luật?"
+
+
+def test_refresh_recompiles_only_on_change():
+    engine = PromptEngine()
+    format_turn(engine)
+    assert engine.refresh() is False and engine._compiled
+
+    previous = settings.contact_info["hotline"]
+    settings.contact_info["hotline"] = "1900 {0000}"
+    try:
+        assert engine.refresh() is True and not engine._compiled
+        assert "1900 {0000}" in format_turn(engine)[0].content
+    finally:
+        settings.contact_info["hotline"] = previous
+        engine.refresh()
+
+
+if __name__ == "__main__":
+    test_templates_are_compiled_once_per_combination()
+    test_turn_text_fills_variables()
+    test_refresh_recompiles_only_on_change()
+    print("✅ Prompt engine tests passed")
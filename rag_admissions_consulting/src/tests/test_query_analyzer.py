@@ -0,0 +1,155 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import re
+import timeit
+
+from core.query_analyzer import QueryAnalyzer
+
+QUERIES = [
+    "Học phí ngành công nghệ thông tin bao nhiêu tiền một kỳ?",
+    "cho em hỏi thủ tục nộp hồ sơ xét tuyển như thế nào",
+    "trường có ký túc xá không",
+    "ra trường làm gì",
+    "còn học bổng nào khác nữa không",
+    "so với năm ngoái điểm chuẩn ngành luật cao hơn hay thấp hơn",
+    "giới thiệu về trường đại học đông á và lịch sử thành lập",
+    "địa chỉ cơ sở vật chất thư viện phòng lab",
+    "nó có nghĩa là gì",
+    "Em muốn đăng ký chuyên ngành marketing thì cần điều kiện gì và deadline khi nào, "
+    "có hỗ trợ tài chính hoặc vay vốn không",
+    "cơ hội việc làm của ngành du lịch, mức lương ra trường",
+    "xin chào",
+]
+
+
+def naive_analysis(analyzer: QueryAnalyzer, query: str, context_messages=None) -> dict:
+    """The previous implementation: `in` scans and uncompiled re.search"""
+    query = query.lower()
+
+    def extract_keywords():
+        return {
+            keyword
+            for patterns in analyzer.query_patterns.values()
+            for keyword in patterns["keywords"]
+            if keyword in query
+        }
+
+    best_type, max_confidence = "general", 0
+    for query_type, patterns in analyzer.query_patterns.items():
+        keyword_matches = sum(1 for k in patterns["keywords"] if k in query)
+        pattern_matches = sum(1 for p in patterns["patterns"] if re.search(p, query))
+        confidence = (
+            keyword_matches / len(patterns["keywords"]) * 0.7
+            + pattern_matches / len(patterns["patterns"]) * 0.3
+        )
+        if confidence > max_confidence:
+            best_type, max_confidence = query_type, confidence
+
+    context = analyzer.context_keywords
+    words = analyzer.intent_words
+    if any(w in query for w in words["question"]):
+        intent = "information_seeking"
+    elif any(w in query for w in words["action"]):
+        intent = "action_seeking"
+    elif any(w in query for w in words["comparison"]):
+        intent = "comparison"
+    elif context_messages and any(w in query for w in context["follow_up"]):
+        intent = "follow_up"
+    else:
+        intent = "information_seeking"
+
+    context_type = next(
+        (
+            name
+            for name in ("follow_up", "clarification", "comparison")
+            if any(w in query for w in context[name])
+        ),
+        None,
+    )
+    requires_context = (
+        len(query.split()) <= 3
+        or any(p in query for p in analyzer.pronouns)
+        or any(w in query for w in context["follow_up"])
+        or any(w in query for w in context["clarification"])
+    )
+
+    word_count = len(query.split())
+    if "và" in query or "hoặc" in query or "?" in query or word_count > 15:
+        complexity = "complex"
+    elif word_count > 8 and len(extract_keywords()) > 2:
+        complexity = "medium"
+    else:
+        complexity = "simple"
+
+    return {
+        "type": best_type,
+        "confidence": max_confidence,
+        "keywords": extract_keywords(),
+        "intent": intent,
+        "context_type": context_type,
+        "requires_context": requires_context,
+        "complexity": complexity,
+    }
+
+
+def test_single_pass_matches_naive_scan():
+    analyzer = QueryAnalyzer()
+    context = [{"role": "user", "content": "học phí"}]
+    for query in QUERIES:
+        for context_messages in (None, context):
+            analysis = analyzer.analyze(query, context_messages)
+            analysis["keywords"] = set(analysis["keywords"])
+            assert analysis == naive_analysis(analyzer, query, context_messages), query
+
+
+def test_overlapping_terms_are_all_found():
+    analyzer = QueryAnalyzer()
+    matched = analyzer._match_terms("nộp hồ sơ học phí")
+    assert {"nộp hồ sơ", "hồ sơ", "nộp", "học phí", "phí"} <= matched
+
+
+def test_async_api_unchanged():
+    analysis = asyncio.run(QueryAnalyzer().analyze_query("Học phí ngành luật?"))
+    assert analysis["type"] == "fees_scholarships"
+    assert analysis["complexity"] == "complex"
+
+
+def test_categorize_text_tags_chunks():
+    analyzer = QueryAnalyzer()
+    text = "Học phí ngành Công nghệ thông tin năm 2024, sinh viên được ở ký túc xá"
+    assert analyzer.categorize_text(text) == ["program", "fees", "campus"]
+    assert analyzer.categorize_text("Đại học Đông Á thành lập năm 1999") == []
+
+
+def benchmark(number: int = 2000):
+    """Micro-benchmark: compiled single pass vs. the naive per-keyword scan"""
+    analyzer = QueryAnalyzer()
+
+    def run_compiled():
+        for query in QUERIES:
+            analyzer.analyze(query)
+
+    def run_naive():
+        for query in QUERIES:
+            naive_analysis(analyzer, query)
+
+    compiled = min(timeit.repeat(run_compiled, number=number, repeat=3))
+    naive = min(timeit.repeat(run_naive, number=number, repeat=3))
+    per_query = len(QUERIES) * number
+    print(f"naive:    {naive / per_query * 1e6:.1f} µs/query")
+    print(f"compiled: {compiled / per_query * 1e6:.1f} µs/query")
+    print(f"speedup:  {naive / compiled:.1f}x")
+
+
+if __name__ == "__main__":
+    test_single_pass_matches_naive_scan()
+    test_overlapping_terms_are_all_found()
+    test_async_api_unchanged()
+    test_categorize_text_tags_chunks()
+    print("✅ Query analyzer tests passed")
+    benchmark()
@@ -0,0 +1,50 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.query_rewriter import QueryRewriter
+
+HISTORY = [
+    {"role": "user", "content": "Học phí ngành CNTT năm 2025 bao nhiêu?"},
+    {"role": "assistant", "content": "Học phí ngành CNTT năm 2025 là 12 triệu mỗi kỳ."},
+]
+
+
+def rewrite(rewriter, query, history=HISTORY, summary=None):
+    # The chat service adds the current question before reading the context
+    return rewriter.rewrite(query, history + [{"role": "user", "content": query}], summary)
+
+
+def test_follow_ups_become_standalone():
+    rewriter = QueryRewriter()
+    assert rewrite(rewriter, "còn ngành luật thì sao?") == "học phí ngành luật 2025"
+    assert rewrite(rewriter, "điểm chuẩn ngành đó?") == "điểm chuẩn ngành cntt 2025"
+    assert rewrite(rewriter, "ngành Điều dưỡng thì sao") == "học phí ngành Điều dưỡng 2025"
+    # Nothing to add when the question already names everything
+    assert rewrite(rewriter, "học phí ngành luật 2024") == "học phí ngành luật 2024"
+
+
+def test_summary_supplies_folded_entities():
+    rewriter = QueryRewriter()
+    summary = "Người dùng quan tâm ngành Du lịch, đã hỏi về ký túc xá."
+    assert rewrite(rewriter, "có học bổng không?", history=[], summary=summary) == (
+        "có học bổng không ngành du lịch"
+    )
+    assert rewriter.rewrite("còn gì nữa", []) == "còn gì nữa"
+
+
+def test_entities_are_extracted_once_per_message():
+    rewriter = QueryRewriter()
+    rewrite(rewriter, "còn ngành luật thì sao?")
+    misses = rewriter.extract_entities.cache_info().misses
+    rewrite(rewriter, "còn ngành luật thì sao?")
+    assert rewriter.extract_entities.cache_info().misses == misses
+
+
+if __name__ == "__main__":
+    test_follow_ups_become_standalone()
+    test_summary_supplies_folded_entities()
+    test_entities_are_extracted_once_per_message()
+    print("✅ Query rewriter tests passed")
@@ -0,0 +1,85 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import time
+
+from langchain_core.documents import Document
+
+from core.reranker import LexicalOverlapScorer, Reranker
+
+DOCS = [
+    Document(page_content="Trường có ký túc xá 500 chỗ"),
+    Document(page_content="Điểm chuẩn 2024 ngành Điều dưỡng là 19 điểm"),
+    Document(page_content="Điểm chuẩn 2025 ngành Công nghệ thông tin là 18 điểm"),
+]
+
+
+class CountingScorer(LexicalOverlapScorer):
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.batches = []
+
+    def score(self, pairs, segments=None):
+        self.batches.append(len(pairs))
+        time.sleep(self.delay)
+        return super().score(pairs, segments)
+
+
+def test_lexical_scorer_prefers_exact_terms():
+    scores = LexicalOverlapScorer().score(
+        [("điểm chuẩn 2025", doc.page_content) for doc in DOCS]
+    )
+    assert scores.argmax() == 2
+    assert scores[0] == 0.0
+
+
+def test_batched_requests_weight_terms_independently():
+    scorer = LexicalOverlapScorer()
+    alone = scorer.score([("điểm chuẩn 2025", doc.page_content) for doc in DOCS])
+    # Another request whose candidates all mention "2025" shares the batch
+    other = [("học phí 2025", f"Học phí năm 2025 đợt {i}") for i in range(6)]
+    pairs = [("điểm chuẩn 2025", doc.page_content) for doc in DOCS] + other
+    batched = scorer.score(pairs, segments=[len(DOCS), len(other)])
+    assert batched[: len(DOCS)].tolist() == alone.tolist()
+    assert scorer.score(pairs)[: len(DOCS)].tolist() != alone.tolist()
+
+
+def test_concurrent_requests_share_a_batch():
+    scorer = CountingScorer()
+    reranker = Reranker(scorer, budget_ms=1000, batch_window_ms=20)
+
+    async def run():
+        return await asyncio.gather(
+            *(reranker.rerank(query, DOCS) for query in ["điểm chuẩn 2025", "ký túc xá"] * 3)
+        )
+
+    results = asyncio.run(run())
+    assert results[0][0] is DOCS[2] and results[1][0] is DOCS[0]
+    assert scorer.batches == [6 * len(DOCS)]
+
+
+def test_budget_exceeded_keeps_retrieval_order():
+    scorer = CountingScorer(delay=0.2)
+    reranker = Reranker(scorer, budget_ms=50, batch_window_ms=1)
+
+    async def run():
+        started = time.perf_counter()
+        docs = await reranker.rerank("điểm chuẩn 2025", DOCS)
+        return docs, time.perf_counter() - started
+
+    docs, elapsed = asyncio.run(run())
+    assert docs == DOCS
+    assert elapsed < 0.15
+    assert reranker.stats["timeouts"] == 1
+
+
+if __name__ == "__main__":
+    test_lexical_scorer_prefers_exact_terms()
+    test_batched_requests_weight_terms_independently()
+    test_concurrent_requests_share_a_batch()
+    test_budget_exceeded_keeps_retrieval_order()
+    print("✅ Reranker tests passed")
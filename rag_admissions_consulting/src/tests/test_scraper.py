@@ -0,0 +1,131 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+from collections import Counter
+
+import httpx
+
+from data_pipeline.crawlers.scraper import WebScraper
+
+BASE = "https://tuyensinh.example.edu.vn"
+
+
+def page(title, *links):
+    anchors = "".join(f'<a href="{href}">link</a>' for href in links)
+    return (
+        f"<html><head><title>{title}</title></head>"
+        f"<body><p>Thông tin tuyển sinh về {title} năm 2025</p>{anchors}</body></html>"
+    )
+
+
+class FakeSite:
+    """MockTransport handler serving `pages` (path -> html or (status, headers))"""
+
+    def __init__(self, pages, robots=None):
+        self.pages = pages
+        self.robots = robots
+        self.requests = Counter()
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        self.requests[path] += 1
+        if path == "/robots.txt":
+            if self.robots is None:
+                return httpx.Response(404)
+            return httpx.Response(200, text=self.robots)
+        body = self.pages.get(path)
+        if body is None:
+            return httpx.Response(404, html=page("Không tìm thấy", "/from-404"))
+        if isinstance(body, tuple):
+            status, headers = body
+            return httpx.Response(status, headers=headers, html=page("Lỗi", "/from-error"))
+        return httpx.Response(200, html=body)
+
+
+def crawl(site, max_pages=50, max_depth=None):
+    scraper = WebScraper(BASE + "/", "ds-test", requests_per_second=0)
+    results = asyncio.run(
+        scraper.scrape_site_async(
+            max_pages=max_pages,
+            transport=httpx.MockTransport(site),
+            max_depth=max_depth,
+        )
+    )
+    return scraper, [result["url"] for result in results]
+
+
+def test_links_are_fetched_once_and_robots_is_honoured():
+    site = FakeSite(
+        {
+            "/": page(
+                "Trang chủ",
+                "/nganh",
+                "/nganh#hoc-phi",
+                BASE + "/nganh",
+                "/private/ho-so",
+                "https://other.example.com/ngoai",
+                "/khong-co",
+                "/loi",
+            ),
+            "/nganh": page("Ngành đào tạo", "/", "/nganh", "/private/diem"),
+            "/loi": (500, {}),
+        },
+        robots="User-agent: *\nDisallow: /private\n",
+    )
+    scraper, urls = crawl(site)
+
+    assert urls == [BASE + "/", BASE + "/nganh"]
+    # Fragments and absolute/relative spellings are one URL; each is fetched once
+    assert all(count == 1 for count in site.requests.values())
+    assert site.requests["/robots.txt"] == 1
+    assert not any(path.startswith("/private") for path in site.requests)
+    assert scraper.stats["robots_blocked"] == 2
+    # Error pages count as failures and their links are not followed
+    assert site.requests["/khong-co"] == 1 and site.requests["/loi"] == 1
+    assert scraper.stats["failed"] == 2
+    assert "/from-404" not in site.requests and "/from-error" not in site.requests
+
+
+def test_max_depth_stops_following_links():
+    site = FakeSite(
+        {
+            "/": page("Trang chủ", "/cap-1"),
+            "/cap-1": page("Cấp 1", "/cap-2"),
+            "/cap-2": page("Cấp 2", "/cap-3"),
+            "/cap-3": page("Cấp 3"),
+        }
+    )
+    _, urls = crawl(site, max_depth=1)
+    assert urls == [BASE + "/", BASE + "/cap-1"]
+    assert "/cap-2" not in site.requests
+
+    _, urls = crawl(FakeSite(site.pages), max_depth=0)
+    assert urls == [BASE + "/"]
+
+
+def test_relative_links_resolve_against_redirect_target():
+    site = FakeSite(
+        {
+            "/": page("Trang chủ", "/tin-cu", "/tuyen-sinh/"),
+            "/tin-cu": (301, {"Location": BASE + "/tuyen-sinh/"}),
+            "/tuyen-sinh/": page("Tuyển sinh", "hoc-bong"),
+            "/tuyen-sinh/hoc-bong": page("Học bổng"),
+        }
+    )
+    _, urls = crawl(site)
+
+    assert BASE + "/tuyen-sinh/hoc-bong" in urls
+    assert "/hoc-bong" not in site.requests
+    assert site.requests["/robots.txt"] == 1  # missing robots.txt allows everything
+    assert site.requests["/tuyen-sinh/hoc-bong"] == 1
+
+
+if __name__ == "__main__":
+    test_links_are_fetched_once_and_robots_is_honoured()
+    test_max_depth_stops_following_links()
+    test_relative_links_resolve_against_redirect_target()
+    print("✅ Scraper tests passed")
@@ -0,0 +1,40 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempfile
+
+from infrastructure.seed_manifest import SeedManifest, chunk_id
+
+
+def test_chunk_ids_are_deterministic():
+    assert chunk_id("ds1", "Học phí ngành CNTT") == chunk_id("ds1", "Học phí ngành CNTT")
+    assert chunk_id("ds1", "Học phí ngành CNTT") != chunk_id("ds2", "Học phí ngành CNTT")
+    assert chunk_id("ds1", "Học phí ngành CNTT") != chunk_id("ds1", "Học phí ngành Luật")
+
+
+def test_reseeding_only_touches_changes():
+    with tempfile.TemporaryDirectory() as tmp:
+        first = [chunk_id("ds1", text) for text in ["a", "b", "c"]]
+        manifest = SeedManifest("ds1", "index", tmp)
+        assert manifest.diff(first) == (first, [])
+        manifest.save(first)
+
+        # Next run: "b" changed into "d", "a" and "c" unchanged
+        second = [chunk_id("ds1", text) for text in ["a", "d", "c"]]
+        manifest = SeedManifest("ds1", "index", tmp)
+        added, removed = manifest.diff(second)
+        assert added == [chunk_id("ds1", "d")]
+        assert removed == [chunk_id("ds1", "b")]
+
+        # Unchanged data source: nothing to embed or delete
+        manifest.save(second)
+        assert SeedManifest("ds1", "index", tmp).diff(second) == ([], [])
+
+
+if __name__ == "__main__":
+    test_chunk_ids_are_deterministic()
+    test_reseeding_only_touches_changes()
+    print("✅ Seed manifest tests passed")
@@ -0,0 +1,168 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import fnmatch
+import sys
+import types
+
+from config.settings import settings
+from core.context_manager import ContextManager
+from core.session_manager import session_manager
+from infrastructure.state_store import (
+    InMemoryStateStore,
+    RedisStateStore,
+    StateStore,
+    create_state_store,
+)
+from shared.enum import RoleType
+
+
+class FakeRedis:
+    """Minimal in-process stand-in for a redis.asyncio client (decode_responses=True)"""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+        self.ttls[key] = ex
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+    def rpush(self, key, value):
+        self.data.setdefault(key, []).append(value)
+
+    def ltrim(self, key, start, end):
+        items = self.data.get(key, [])
+        self.data[key] = items[start:] if end == -1 else items[start : end + 1]
+
+    def expire(self, key, seconds):
+        self.ttls[key] = seconds
+
+    async def lrange(self, key, start, end):
+        items = self.data.get(key, [])
+        return items[start:] if end == -1 else items[start : end + 1]
+
+    async def scan_iter(self, match):
+        for key in list(self.data):
+            if fnmatch.fnmatch(key, match):
+                yield key
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.commands.append((name, args, kwargs))
+
+    async def execute(self):
+        return [
+            getattr(self.client, name)(*args, **kwargs)
+            for name, args, kwargs in self.commands
+        ]
+
+
+def test_session_is_visible_from_another_worker():
+    redis = FakeRedis()
+    previous_store = session_manager.store
+
+    async def run():
+        # Worker A creates the session
+        session_manager.store = RedisStateStore(redis)
+        conversation_id = await session_manager.get_or_create_conversation_id(
+            "a@example.com"
+        )
+
+        # Worker B has its own client but talks to the same server
+        session_manager.store = RedisStateStore(redis)
+        assert (
+            await session_manager.get_or_create_conversation_id("a@example.com")
+            == conversation_id
+        )
+        assert (await session_manager.get_all_sessions())["total_sessions"] == 1
+
+    try:
+        asyncio.run(run())
+        assert redis.ttls["rag:session:a@example.com"] == 3600
+    finally:
+        session_manager.store = previous_store
+
+
+def test_message_window_is_shared_between_workers():
+    shared_store = RedisStateStore(FakeRedis())
+    worker_a = ContextManager(1, "conv-1", "a@example.com", shared_store=shared_store)
+    worker_b = ContextManager(1, "conv-1", "a@example.com", shared_store=shared_store)
+    worker_a.history_manager = None
+    worker_b.history_manager = None
+
+    async def run():
+        await worker_a.add_message(RoleType.USER, "Học phí ngành CNTT?")
+        await worker_a.add_message(RoleType.ASSISTANT, "Khoảng 12 triệu/kỳ.")
+        await worker_b.sync_from_shared_store()
+        return await worker_b.get_context_messages()
+
+    messages = asyncio.run(run())
+    assert [msg["content"] for msg in messages] == [
+        "Học phí ngành CNTT?",
+        "Khoảng 12 triệu/kỳ.",
+    ]
+    assert messages[0]["role"] == RoleType.USER
+
+
+def test_unreachable_redis_falls_back_to_memory():
+    class UnreachableRedis:
+        @classmethod
+        def from_url(cls, url, **kwargs):
+            return cls()
+
+        def ping(self):
+            raise ConnectionError("Connection refused")
+
+        def close(self):
+            pass
+
+    fake_redis = types.ModuleType("redis")
+    fake_redis.Redis = UnreachableRedis
+    fake_redis.asyncio = types.ModuleType("redis.asyncio")
+    fake_redis.asyncio.Redis = UnreachableRedis
+    saved = {name: sys.modules.get(name) for name in ("redis", "redis.asyncio")}
+    previous_backend = settings.state_store.backend
+    sys.modules.update({"redis": fake_redis, "redis.asyncio": fake_redis.asyncio})
+    settings.state_store.backend = "redis"
+    try:
+        # from_url() never connects, so only the PING reveals a dead server
+        assert isinstance(create_state_store(), InMemoryStateStore)
+    finally:
+        settings.state_store.backend = previous_backend
+        for name, module in saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+
+    try:
+        StateStore()
+        raise AssertionError("StateStore is abstract")
+    except TypeError:
+        pass
+
+
+if __name__ == "__main__":
+    test_session_is_visible_from_another_worker()
+    test_message_window_is_shared_between_workers()
+    test_unreachable_redis_falls_back_to_memory()
+    print("✅ Shared state tests passed")
@@ -0,0 +1,212 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+import time
+import types
+from collections import Counter
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from config.settings import settings
+from infrastructure import store as store_module
+from infrastructure.store import AdaptiveThrottle, Store
+
+
+class RateLimited(Exception):
+    status = 429
+
+
+class FakeIndex:
+    """Pinecone index whose upserts fail according to `plan(batch, attempt)`"""
+
+    def __init__(self, plan=None):
+        self.plan = plan or (lambda ids, attempt: None)
+        self.attempts = Counter()
+        self.upserted = Counter()
+        self._lock = threading.Lock()
+
+    def upsert(self, vectors):
+        ids = tuple(row_id for row_id, _, _ in vectors)
+        with self._lock:
+            self.attempts[ids] += 1
+            attempt = self.attempts[ids]
+        error = self.plan(ids, attempt)
+        if error is not None:
+            raise error
+        with self._lock:
+            self.upserted.update(ids)
+
+
+class FakeEmbeddings(Embeddings):
+    def embed_documents(self, texts):
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        return [float(len(text)), 1.0]
+
+
+class FakePineconeVectorStore:
+    @classmethod
+    def from_existing_index(cls, **kwargs):
+        return cls()
+
+
+class RecordedSleeps:
+    """Swap the store module's clock so backoff is recorded instead of slept"""
+
+    def __init__(self):
+        self.sleeps = []
+        self._lock = threading.Lock()
+
+    def sleep(self, seconds):
+        with self._lock:
+            self.sleeps.append(seconds)
+
+    def __enter__(self):
+        self._previous = (store_module.time, store_module.PineconeVectorStore)
+        store_module.time = types.SimpleNamespace(sleep=self.sleep, time=time.time)
+        store_module.PineconeVectorStore = FakePineconeVectorStore
+        return self
+
+    def __exit__(self, *exc_info):
+        store_module.time, store_module.PineconeVectorStore = self._previous
+        return False
+
+
+def new_store(index):
+    store = Store(index_name="test-index")
+    store.index = index
+    return store
+
+
+def test_throttle_backs_off_and_recovers():
+    throttle = AdaptiveThrottle(initial_delay=0.5, max_delay=4.0)
+    delays = []
+    for _ in range(5):
+        throttle.on_rate_limited()
+        delays.append(throttle.delay)
+    assert delays == [0.5, 1.0, 2.0, 4.0, 4.0]
+    assert throttle.rate_limited == 5
+
+    for _ in range(6):
+        throttle.on_success()
+    assert throttle.delay == 0.0625
+    # Halves until the delay is negligible, then stops waiting altogether
+    throttle.on_success()
+    throttle.on_success()
+    assert throttle.delay == 0.0
+
+
+def test_rate_limits_back_off_then_succeed():
+    index = FakeIndex(
+        lambda ids, attempt: RateLimited("Too Many Requests") if attempt <= 3 else None
+    )
+    throttle = AdaptiveThrottle(initial_delay=0.5)
+    records = [("a", [1.0], {}), ("b", [2.0], {})]
+
+    with RecordedSleeps() as clock:
+        assert new_store(index)._upsert_with_retry(records, throttle, max_retries=3) == 2
+
+    # Waits grow with each 429 and the success halves the shared delay
+    assert clock.sleeps == [0.5, 1.0, 2.0]
+    assert throttle.rate_limited == 3 and throttle.delay == 1.0
+    assert index.upserted == Counter({"a": 1, "b": 1})
+
+
+def test_transient_errors_exhaust_retry_budget():
+    index = FakeIndex(lambda ids, attempt: ConnectionError("503 Service Unavailable"))
+    throttle = AdaptiveThrottle()
+
+    with RecordedSleeps() as clock:
+        try:
+            new_store(index)._upsert_with_retry([("a", [1.0], {})], throttle, max_retries=3)
+            raise AssertionError("upsert should give up")
+        except Exception as e:
+            assert "after 3 attempts" in str(e)
+
+    assert index.attempts[("a",)] == 3
+    assert clock.sleeps == [1, 2]  # exponential backoff between attempts
+    assert throttle.rate_limited == 0 and not index.upserted
+
+
+def test_endless_rate_limits_fall_back_to_retry_budget():
+    index = FakeIndex(lambda ids, attempt: RateLimited("RESOURCE_EXHAUSTED"))
+    throttle = AdaptiveThrottle(max_delay=1.0)
+
+    with RecordedSleeps():
+        try:
+            new_store(index)._upsert_with_retry([("a", [1.0], {})], throttle, max_retries=2)
+            raise AssertionError("upsert should give up")
+        except Exception as e:
+            assert "after 2 attempts" in str(e)
+
+    # 2 * 10 rate-limit backoffs, then the regular budget of 2 attempts
+    assert throttle.rate_limited == 20
+    assert index.attempts[("a",)] == 22
+
+
+def test_upload_upserts_every_batch_exactly_once():
+    def plan(ids, attempt):
+        # Every third batch is throttled once, every fifth fails once
+        number = int(ids[0].split("-")[1]) // 4
+        if attempt == 1 and number % 3 == 0:
+            return RateLimited("429 Too Many Requests")
+        if attempt <= 2 and number % 5 == 0:
+            return TimeoutError("deadline exceeded")
+        return None
+
+    index = FakeIndex(plan)
+    chunks = [Document(page_content=f"đoạn {i}", metadata={"i": i}) for i in range(30)]
+    ids = [f"id-{i}" for i in range(30)]
+    config = settings.vector_store
+    previous = (config.embed_batch_size, config.upsert_concurrency)
+    config.embed_batch_size, config.upsert_concurrency = 8, 3
+
+    try:
+        with RecordedSleeps():
+            new_store(index).uploadToStore(
+                iter(chunks), FakeEmbeddings(), batch_size=4, max_retries=3, ids=ids
+            )
+    finally:
+        config.embed_batch_size, config.upsert_concurrency = previous
+
+    assert index.upserted == Counter({row_id: 1 for row_id in ids})
+    # 8-chunk embedding windows split into 4-vector upserts, never straddling
+    assert set(index.attempts) == {tuple(ids[i : i + 4]) for i in range(0, 30, 4)}
+
+
+def test_upload_fails_when_a_batch_exhausts_retries():
+    index = FakeIndex(
+        lambda ids, attempt: ValueError("bad vector") if ids[0] == "id-4" else None
+    )
+    chunks = [Document(page_content=f"đoạn {i}") for i in range(12)]
+
+    with RecordedSleeps():
+        try:
+            new_store(index).uploadToStore(
+                chunks,
+                FakeEmbeddings(),
+                batch_size=4,
+                max_retries=2,
+                ids=[f"id-{i}" for i in range(12)],
+            )
+            raise AssertionError("upload should fail")
+        except Exception as e:
+            assert "after 2 attempts" in str(e)
+
+    assert index.attempts[("id-4", "id-5", "id-6", "id-7")] == 2
+
+
+if __name__ == "__main__":
+    test_throttle_backs_off_and_recovers()
+    test_rate_limits_back_off_then_succeed()
+    test_transient_errors_exhaust_retry_budget()
+    test_endless_rate_limits_fall_back_to_retry_budget()
+    test_upload_upserts_every_batch_exactly_once()
+    test_upload_fails_when_a_batch_exhausts_retries()
+    print("✅ Store upload tests passed")
@@ -0,0 +1,174 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import time
+import timeit
+
+import core.tracing
+from core.context_assembler import ContextAssembler, TokenCounter
+from core.tracing import Histogram, Tracer
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram(
+        "latency_seconds", "Latency", buckets=(0.1, 1.0), labelnames=("stage",)
+    )
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "search")
+
+    lines = histogram.render()
+    assert lines[:2] == [
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+    ]
+    assert lines[2:] == [
+        'latency_seconds_bucket{stage="search",le="0.1"} 2',
+        'latency_seconds_bucket{stage="search",le="1.0"} 3',
+        'latency_seconds_bucket{stage="search",le="+Inf"} 4',
+        'latency_seconds_sum{stage="search"} 3.65',
+        'latency_seconds_count{stage="search"} 4',
+    ]
+
+
+def test_request_records_spans_ttft_and_token_rate():
+    tracer = Tracer(enabled=True)
+    trace = tracer.start_request()
+    with tracer.span("retrieval"):
+        time.sleep(0.01)
+    trace.token()
+    time.sleep(0.01)
+    trace.token()
+    trace.finish("Học phí là 12 triệu", TokenCounter())
+
+    assert tracer.stage_seconds.count("retrieval") == 1
+    assert tracer.time_to_first_token.count() == 1
+    assert tracer.request_seconds.count("ok") == 1
+    assert tracer.tokens_per_second.count() == 1
+    assert "rag_time_to_first_token_seconds_count 1" in tracer.render()
+
+    tracer.start_request().finish(status="error")
+    assert tracer.request_seconds.count("error") == 1
+    assert 'rag_request_duration_seconds_count{status="error"} 1' in tracer.render()
+
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer(enabled=False)
+    with tracer.span("retrieval"):
+        pass
+    tracer.observe_stage("llm_stream", 1.0)
+    trace = tracer.start_request()
+    trace.token()
+    trace.finish("ok", TokenCounter(), status="error")
+    assert tracer.stage_seconds.count("retrieval") == 0
+    assert tracer.request_seconds.count("error") == 0
+
+
+class StubQueryAnalyzer:
+    async def analyze_query(self, query, context_messages):
+        return {"type": "general", "requires_context": False}
+
+
+class StubPromptEngine:
+    def count_prompt_tokens(self, query_analysis, counter):
+        return 0
+
+    def format_context_aware_messages(self, **kwargs):
+        return []
+
+
+class FailingAnswerChain:
+    async def astream(self, messages):
+        yield "Học phí năm nay"
+        raise RuntimeError("LLM connection reset")
+
+
+class StubContextManager:
+    summary = None
+
+    def __init__(self):
+        self.messages = []
+
+    async def sync_from_shared_store(self):
+        pass
+
+    async def add_message(self, role, content):
+        self.messages.append(content)
+
+    async def get_context_messages(self):
+        return []
+
+    def schedule_summary(self, summarizer):
+        pass
+
+
+def test_llm_failure_is_labelled_error():
+    from core.rag_engine import RagEngine
+    from services.chat_service import ChatService
+
+    engine = RagEngine.__new__(RagEngine)
+    engine.query_analyzer = StubQueryAnalyzer()
+    engine.query_rewriter = None
+    engine.docsearch = None
+    engine.answer_cache = None
+    engine.context_assembler = ContextAssembler(TokenCounter())
+    engine.prompt_engine = StubPromptEngine()
+    engine.answer_chain = FailingAnswerChain()
+
+    async def no_documents(*args, **kwargs):
+        return []
+
+    engine._enhanced_retrieval = no_documents
+
+    service = ChatService.__new__(ChatService)
+    service.conversation_id = "c1"
+    service.rag_engine = engine
+    service.context_manager = StubContextManager()
+
+    async def chat():
+        return [chunk["delta"] async for chunk in service.process_message_stream("Học phí?")]
+
+    tracer = Tracer(enabled=True)
+    # Engine and service import the process-wide tracer by name
+    modules = [sys.modules["core.rag_engine"], sys.modules["services.chat_service"]]
+    for module in modules:
+        module.tracer = tracer
+    try:
+        deltas = asyncio.run(chat())
+    finally:
+        for module in modules:
+            module.tracer = core.tracing.tracer
+
+    assert deltas[0] == "Học phí năm nay"
+    assert deltas[-1].startswith("Xin lỗi")
+    assert service.context_manager.messages[-1] == deltas[-1]
+    assert tracer.request_seconds.count("error") == 1
+    assert tracer.request_seconds.count("ok") == 0
+    # The apology is not a generated reply
+    assert tracer.tokens_per_second.count() == 0
+
+
+def benchmark(number: int = 100000):
+    """Cost of one span with tracing on and off"""
+    for enabled in (True, False):
+        tracer = Tracer(enabled=enabled)
+
+        def span():
+            with tracer.span("retrieval"):
+                pass
+
+        elapsed = timeit.timeit(span, number=number)
+        state = "on" if enabled else "off"
+        print(f"Span with tracing {state}: {elapsed / number * 1e9:.0f} ns")
+
+
+if __name__ == "__main__":
+    test_histogram_renders_cumulative_buckets()
+    test_request_records_spans_ttft_and_token_rate()
+    test_disabled_tracer_records_nothing()
+    test_llm_failure_is_labelled_error()
+    print("✅ Tracing tests passed")
+    benchmark()
@@ -0,0 +1,100 @@
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+from loguru import logger
+import sys
+import os
+
+# Add the src directory to Python path for absolute imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config.settings import settings
+from data_pipeline.ingestion_worker import (
+    JobRejected,
+    QueueFullError,
+    UnsupportedDataType,
+    ingestion_worker,
+)
+from data_pipeline.pipeline_runner import PipelineJob
+from infrastructure.embedding_pipeline import close_batch_embedders, configure_torch_threads
+
+# Configure logging
+logger.remove()
+logger.add(sys.stderr, level="INFO", format="{time} | {level} | {message}")
+
+app = FastAPI(
+    title="RAG Admissions Consulting Ingestion Worker",
+    description="Keeps the embedding model warm and ingests data sources from a queue",
+    version="1.0.0",
+)
+
+
+class JobRequest(BaseModel):
+    data_source_id: str
+    data_type: str  # website, pdf, csv, manual
+    input_path: str  # URL, file path or (base64) manual JSON
+    force: bool = False
+    max_pages: Optional[int] = None
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Start workers and load the embedding model once"""
+    # This process only ingests, so it may size torch's thread pool
+    configure_torch_threads()
+    try:
+        await ingestion_worker.start()
+        logger.info(f"📊 Ingestion worker status: {ingestion_worker.get_status()}")
+    except Exception as e:
+        logger.error(f"❌ Error loading pipeline models: {e}")
+        logger.warning("⚠️ Models will be loaded by the first job")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await ingestion_worker.stop()
+    close_batch_embedders()
+
+
+@app.get("/health")
+async def health_check():
+    return {"status": "healthy" if ingestion_worker.running else "stopped"}
+
+
+@app.get("/status")
+async def get_status():
+    return ingestion_worker.get_status()
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(request: JobRequest):
+    """Queue a data source for ingestion"""
+    try:
+        job = ingestion_worker.submit(PipelineJob(**request.model_dump()))
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except UnsupportedDataType as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except JobRejected as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return job.to_dict()
+
+
+@app.get("/jobs/{data_source_id}")
+async def get_job(data_source_id: str):
+    job = ingestion_worker.get_job(data_source_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(
+        "worker:app",
+        host=settings.pipeline.worker_host,
+        port=settings.pipeline.worker_port,
+        log_level="info",
+    )
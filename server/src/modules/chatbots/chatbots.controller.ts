@@ -24,6 +24,8 @@ import { infinityPagination } from '../../utils/infinity-pagination';
 import { FindChatbotHistoryDto } from './dto/find-chatbot-history.dto';
 import { ChatbotHistory } from './domain/chatbot-history';
 import { CreateChatbotHistoryDto } from './dto/create-chatbot-history.dto';
+import { CreateChatbotHistoryBatchDto } from './dto/create-chatbot-history-batch.dto';
+import { CreateChatbotHistoryBatchResultDto } from './dto/create-chatbot-history-batch-result.dto';
 import { GetChatbotHistoryDto } from './dto/get-chatbot-history.dto';
 import { ConversationDto } from './dto/conversation.dto';
 import { Public } from 'src/decorators/public.decorator';
@@ -200,6 +202,22 @@ export class chatbotsController {
     return this.chatbotsService.createHistory(createChatbotHistoryDto);
   }
 
+  @Post('history/batch')
+  @ApiOperation({ summary: 'Create several chat messages in one request' })
+  @ApiCreatedResponse({
+    description:
+      'Messages saved in order; on failure only the messages before `failed.index` are saved',
+    type: CreateChatbotHistoryBatchResultDto,
+  })
+  @Public() // Python service gom nhiều tin nhắn vào một request
+  async createHistoryBatch(
+    @Body() createChatbotHistoryBatchDto: CreateChatbotHistoryBatchDto,
+  ): Promise<CreateChatbotHistoryBatchResultDto> {
+    return this.chatbotsService.createHistoryBatch(
+      createChatbotHistoryBatchDto.messages,
+    );
+  }
+
   @Delete(':id')
   @ApiParam({
     name: 'id',
@@ -1,8 +1,10 @@
-import { Injectable } from '@nestjs/common';
+import { HttpException, HttpStatus, Injectable } from '@nestjs/common';
 import { chatbotRepository } from './infrastructure/persistence/chatbot.repository';
 import { IPaginationOptions } from '../../utils/types/pagination-options';
 import { CreateChatbotHistoryDto } from './dto/create-chatbot-history.dto';
 import { GetChatbotHistoryDto } from './dto/get-chatbot-history.dto';
+import { CreateChatbotHistoryBatchResultDto } from './dto/create-chatbot-history-batch-result.dto';
+import { ChatbotHistory } from './domain/chatbot-history';
 import { AnalyticsService } from '../analytics/analytics.service';
 
 import { AnalyticsEventType } from '../analytics/infrastructure/persistence/relational/entities/analytics.entity';
@@ -126,6 +128,34 @@ export class chatbotsService {
     return history;
   }
 
+  async createHistoryBatch(
+    dtos: CreateChatbotHistoryDto[],
+  ): Promise<CreateChatbotHistoryBatchResultDto> {
+    // Sequential so messages of a conversation keep their order. Stops at the
+    // first failure and reports what was saved, so the client resends only
+    // the rest instead of duplicating the saved prefix.
+    const saved: ChatbotHistory[] = [];
+    for (let index = 0; index < dtos.length; index++) {
+      try {
+        saved.push(await this.createHistory(dtos[index]));
+      } catch (error) {
+        console.error(`Failed to save history batch item ${index}:`, error);
+        return {
+          saved,
+          failed: {
+            index,
+            status:
+              error instanceof HttpException
+                ? error.getStatus()
+                : HttpStatus.INTERNAL_SERVER_ERROR,
+            message: error instanceof Error ? error.message : String(error),
+          },
+        };
+      }
+    }
+    return { saved };
+  }
+
   /**
    * Track enhanced analytics with rule-based evaluation (async, non-blocking)
    */
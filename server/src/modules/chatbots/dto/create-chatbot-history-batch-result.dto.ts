@@ -0,0 +1,36 @@
+import { ApiProperty } from '@nestjs/swagger';
+import { ChatbotHistory } from '../domain/chatbot-history';
+
+export class ChatbotHistoryBatchFailureDto {
+  @ApiProperty({
+    description: 'Vị trí tin nhắn lỗi trong danh sách gửi lên',
+    example: 3,
+  })
+  index: number;
+
+  @ApiProperty({
+    description: 'HTTP status của lỗi (4xx: tin nhắn không hợp lệ, gửi lại cũng không được)',
+    example: 500,
+  })
+  status: number;
+
+  @ApiProperty({ description: 'Thông báo lỗi' })
+  message: string;
+}
+
+export class CreateChatbotHistoryBatchResultDto {
+  @ApiProperty({
+    description:
+      'Tin nhắn đã lưu, theo thứ tự gửi lên. Khi có lỗi, đây là các tin nhắn trước tin nhắn lỗi',
+    type: [ChatbotHistory],
+  })
+  saved: ChatbotHistory[];
+
+  @ApiProperty({
+    description:
+      'Tin nhắn đầu tiên lưu không được; các tin nhắn sau nó chưa được lưu và cần gửi lại',
+    type: ChatbotHistoryBatchFailureDto,
+    required: false,
+  })
+  failed?: ChatbotHistoryBatchFailureDto;
+}
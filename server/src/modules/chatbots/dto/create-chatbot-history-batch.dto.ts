@@ -0,0 +1,16 @@
+import { ApiProperty } from '@nestjs/swagger';
+import { Type } from 'class-transformer';
+import { ArrayMaxSize, ArrayNotEmpty, ValidateNested } from 'class-validator';
+import { CreateChatbotHistoryDto } from './create-chatbot-history.dto';
+
+export class CreateChatbotHistoryBatchDto {
+  @ApiProperty({
+    description: 'Danh sách tin nhắn, lưu theo đúng thứ tự gửi lên',
+    type: [CreateChatbotHistoryDto],
+  })
+  @ArrayNotEmpty()
+  @ArrayMaxSize(100)
+  @ValidateNested({ each: true })
+  @Type(() => CreateChatbotHistoryDto)
+  messages: CreateChatbotHistoryDto[];
+}
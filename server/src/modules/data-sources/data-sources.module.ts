@@ -2,11 +2,12 @@ import { Module } from '@nestjs/common';
 import { DataSourcesService } from './data-sources.service';
 import { DataSourcesController } from './data-sources.controller';
 import { DataSourcesGateway } from './data-sources.gateway';
+import { IngestionStatusController } from './ingestion-status.controller';
 import { RelationalDataSourcePersistenceModule } from './infrastructure/persistence/relational/relational-persistence.module';
 
 @Module({
   imports: [RelationalDataSourcePersistenceModule],
-  controllers: [DataSourcesController],
+  controllers: [DataSourcesController, IngestionStatusController],
   providers: [DataSourcesService, DataSourcesGateway],
   exports: [
     DataSourcesService,
@@ -1,10 +1,16 @@
-import { Injectable, BadRequestException, Logger } from '@nestjs/common';
+import {
+  Injectable,
+  BadRequestException,
+  Logger,
+  NotFoundException,
+} from '@nestjs/common';
 import {
   CreateDataSourceDto,
   DataSourceType,
   DataSourceStatus,
 } from './dto/create-data-source.dto';
 import { UpdateDataSourceDto } from './dto/update-data-source.dto';
+import { UpdateIngestionStatusDto } from './dto/update-ingestion-status.dto';
 import { DataSourceRepository } from './infrastructure/persistence/data-source.repository';
 import { IPaginationOptions } from '../../utils/types/pagination-options';
 import { DataSource } from './domain/data-source';
@@ -303,6 +309,39 @@ export class DataSourcesService {
         progress: 10,
       });
 
+      // Prefer the long-running ingestion worker (model already loaded);
+      // it PATCHes the data source status itself when the job finishes
+      const ingestionWorkerUrl = process.env.INGESTION_WORKER_URL;
+      if (ingestionWorkerUrl) {
+        const response = await fetch(`${ingestionWorkerUrl}/jobs`, {
+          method: 'POST',
+          headers: {
+            'Content-Type': 'application/json',
+          },
+          body: JSON.stringify({
+            data_source_id: dataSourceId,
+            data_type: pipelineType,
+            input_path: processedInput,
+          }),
+        });
+
+        if (!response.ok) {
+          throw new Error(
+            `Ingestion worker rejected job: ${response.status} ${await response.text()}`,
+          );
+        }
+
+        this.dataSourcesGateway.emitProcessingLog({
+          dataSourceId,
+          timestamp: new Date().toISOString(),
+          level: 'info',
+          message: `📥 Queued on ingestion worker`,
+          step: 'execute',
+          progress: 20,
+        });
+        return;
+      }
+
       // Use the unified pipeline runner
       const command = `cd "${pythonScriptPath}" && python scripts/run_data_pipeline.py "${dataSourceId}" "${pipelineType}" "${processedInput}"`;
 
@@ -554,6 +593,29 @@ export class DataSourcesService {
     return this.dataSourceRepository.update(id, updateDataSourceDto);
   }
 
+  async reportIngestionStatus(
+    id: DataSource['id'],
+    updateIngestionStatusDto: UpdateIngestionStatusDto,
+  ) {
+    const dataSource = await this.dataSourceRepository.findById(id);
+    if (!dataSource) {
+      throw new NotFoundException('Data source not found');
+    }
+
+    const updatedDataSource = await this.dataSourceRepository.update(
+      id,
+      updateIngestionStatusDto,
+    );
+
+    this.dataSourcesGateway.emitStatusUpdate(
+      id,
+      updateIngestionStatusDto.status,
+      updateIngestionStatusDto,
+    );
+
+    return updatedDataSource;
+  }
+
   remove(id: DataSource['id']) {
     return this.dataSourceRepository.remove(id);
   }
@@ -1,4 +1,5 @@
 import { ApiProperty, PartialType } from '@nestjs/swagger';
+import { Type } from 'class-transformer';
 import {
   CreateDataSourceDto,
   DataSourceStatus,
@@ -49,6 +50,7 @@ export class UpdateDataSourceDto extends PartialType(CreateDataSourceDto) {
     description: 'Thời gian bắt đầu xử lý',
     required: false,
   })
+  @Type(() => Date)
   @IsDate()
   @IsOptional()
   processingStartedAt?: Date;
@@ -57,6 +59,7 @@ export class UpdateDataSourceDto extends PartialType(CreateDataSourceDto) {
     description: 'Thời gian hoàn thành xử lý',
     required: false,
   })
+  @Type(() => Date)
   @IsDate()
   @IsOptional()
   processingCompletedAt?: Date;
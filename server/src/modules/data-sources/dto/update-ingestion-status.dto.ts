@@ -0,0 +1,61 @@
+import { ApiProperty } from '@nestjs/swagger';
+import { Type } from 'class-transformer';
+import {
+  IsDate,
+  IsEnum,
+  IsNumber,
+  IsOptional,
+  IsString,
+} from 'class-validator';
+import { DataSourceStatus } from './create-data-source.dto';
+
+export class UpdateIngestionStatusDto {
+  @ApiProperty({
+    description: 'Trạng thái xử lý',
+    enum: DataSourceStatus,
+  })
+  @IsEnum(DataSourceStatus)
+  status: DataSourceStatus;
+
+  @ApiProperty({
+    description: 'Số lượng documents đã xử lý',
+    required: false,
+  })
+  @IsNumber()
+  @IsOptional()
+  documentsCount?: number;
+
+  @ApiProperty({
+    description: 'Số lượng vectors đã tạo',
+    required: false,
+  })
+  @IsNumber()
+  @IsOptional()
+  vectorsCount?: number;
+
+  @ApiProperty({
+    description: 'Thời gian bắt đầu xử lý',
+    required: false,
+  })
+  @Type(() => Date)
+  @IsDate()
+  @IsOptional()
+  processingStartedAt?: Date;
+
+  @ApiProperty({
+    description: 'Thời gian hoàn thành xử lý',
+    required: false,
+  })
+  @Type(() => Date)
+  @IsDate()
+  @IsOptional()
+  processingCompletedAt?: Date;
+
+  @ApiProperty({
+    description: 'Thông báo lỗi (nếu có)',
+    required: false,
+  })
+  @IsString()
+  @IsOptional()
+  errorMessage?: string;
+}
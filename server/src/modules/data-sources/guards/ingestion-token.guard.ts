@@ -0,0 +1,38 @@
+import {
+  CanActivate,
+  ExecutionContext,
+  Injectable,
+  UnauthorizedException,
+} from '@nestjs/common';
+import { timingSafeEqual } from 'crypto';
+
+export const INGESTION_TOKEN_HEADER = 'x-ingestion-token';
+
+/**
+ * Service-to-service auth for the Python ingestion worker: the request must
+ * carry INGESTION_WORKER_TOKEN in the x-ingestion-token header. With no
+ * token configured every request is rejected.
+ */
+@Injectable()
+export class IngestionTokenGuard implements CanActivate {
+  canActivate(context: ExecutionContext): boolean {
+    const expected = process.env.INGESTION_WORKER_TOKEN;
+    const request = context.switchToHttp().getRequest();
+    const provided = request.headers[INGESTION_TOKEN_HEADER];
+
+    if (!expected || typeof provided !== 'string') {
+      throw new UnauthorizedException();
+    }
+
+    const expectedBuffer = Buffer.from(expected);
+    const providedBuffer = Buffer.from(provided);
+    if (
+      expectedBuffer.length !== providedBuffer.length ||
+      !timingSafeEqual(expectedBuffer, providedBuffer)
+    ) {
+      throw new UnauthorizedException();
+    }
+
+    return true;
+  }
+}
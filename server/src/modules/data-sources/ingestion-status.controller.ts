@@ -0,0 +1,41 @@
+import { Body, Controller, Param, Patch, UseGuards } from '@nestjs/common';
+import { ApiHeader, ApiOkResponse, ApiParam, ApiTags } from '@nestjs/swagger';
+import { DataSourcesService } from './data-sources.service';
+import { DataSource } from './domain/data-source';
+import { UpdateIngestionStatusDto } from './dto/update-ingestion-status.dto';
+import {
+  INGESTION_TOKEN_HEADER,
+  IngestionTokenGuard,
+} from './guards/ingestion-token.guard';
+
+// Kept apart from DataSourcesController, whose JWT + admin role guards
+// apply to every route; the ingestion worker has no user session.
+@ApiTags('Datasources')
+@ApiHeader({ name: INGESTION_TOKEN_HEADER, required: true })
+@UseGuards(IngestionTokenGuard)
+@Controller({
+  path: 'data-sources',
+  version: '1',
+})
+export class IngestionStatusController {
+  constructor(private readonly dataSourcesService: DataSourcesService) {}
+
+  @Patch(':id/ingestion-status')
+  @ApiParam({
+    name: 'id',
+    type: String,
+    required: true,
+  })
+  @ApiOkResponse({
+    type: DataSource,
+  })
+  updateIngestionStatus(
+    @Param('id') id: string,
+    @Body() updateIngestionStatusDto: UpdateIngestionStatusDto,
+  ) {
+    return this.dataSourcesService.reportIngestionStatus(
+      id,
+      updateIngestionStatusDto,
+    );
+  }
+}